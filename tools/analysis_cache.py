@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Cache de resultados para el Sistema de Puntuación de Idiomas - Tutorium
+Caché direccionada por contenido: LRU en memoria con expiración (TTL) y un
+nivel opcional en SQLite compartido entre procesos de la API.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+def cache_key(text: str, language: str, version: str) -> str:
+    """
+    Clave de caché para un análisis. El texto se usa tal cual: las posiciones
+    de las correcciones dependen de cada carácter, así que cualquier
+    normalización adicional (la API ya recorta espacios) cambiaría el resultado.
+    """
+    digest = hashlib.sha256()
+    for part in (version, language, text):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """
+    Caché de análisis serializados (cadenas JSON).
+
+    El nivel en memoria es un LRU acotado a `max_entries`; las entradas
+    caducan `ttl` segundos después de escribirse. Si se indica `db_path`,
+    los fallos en memoria se consultan en SQLite, de modo que varios
+    procesos de la API comparten los aciertos.
+    """
+
+    PURGE_INTERVAL = 256  # escrituras entre limpiezas de filas caducadas
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600,
+                 db_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self._entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._db = self._connect() if db_path else None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre la base de datos compartida y crea la tabla si no existe."""
+        db = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False,
+                             isolation_level=None)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS analysis_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL)'
+        )
+        return db
+
+    def get(self, key: str) -> Optional[str]:
+        """Retorna el análisis serializado o None si no está o ha caducado."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires_at FROM analysis_cache WHERE key = ?',
+                    (key,)
+                ).fetchone()
+                if row is not None and row[1] > now:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """Guarda un análisis serializado en todos los niveles."""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO analysis_cache (key, value, expires_at) '
+                    'VALUES (?, ?, ?)',
+                    (key, value, expires_at)
+                )
+                self._writes += 1
+                if self._writes % self.PURGE_INTERVAL == 0:
+                    self._db.execute('DELETE FROM analysis_cache WHERE expires_at <= ?',
+                                     (time.time(),))
+
+    def _store(self, key: str, value: str, expires_at: float) -> None:
+        """Inserta en el LRU en memoria expulsando la entrada más antigua."""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Vacía todos los niveles de la caché."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM analysis_cache')
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de aciertos, fallos y expulsiones."""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
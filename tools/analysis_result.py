@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Resultados compactos del análisis - Tutorium
+`LanguageScoringSystem.analyze` retorna un `AnalysisResult` en lugar del
+diccionario de `analyze_text`: las puntuaciones son atributos (`__slots__`)
+y las coincidencias de reglas se guardan en una tabla plana de enteros
+(categoría, índice de regla, inicio, fin), sin un diccionario, una tupla y
+dos cadenas por corrección. Los textos (el error y el mensaje) se obtienen
+del texto analizado y del motor de reglas sólo al materializar.
+
+`to_dict()` produce exactamente el diccionario de `analyze_text`; hasta
+entonces el resultado ocupa unos pocos objetos, lo que reduce las
+asignaciones y el trabajo del recolector de basura con muchas peticiones
+en curso.
+"""
+
+from array import array
+from datetime import datetime
+from itertools import compress
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from progress_accumulator import SKILLS
+from rule_engine import RuleEngine, RuleMatch
+
+# Categorías de la tabla de coincidencias (su posición es el código)
+MATCH_KINDS = RuleEngine.KINDS + (RuleEngine.PHRASE_KIND,)
+_KIND_CODES = {kind: code for code, kind in enumerate(MATCH_KINDS)}
+_SYNTAX_CODE = _KIND_CODES['syntax']
+
+# Enteros por fila de la tabla
+_ROW = 4
+
+
+def _finding_table(strings, kind, columns, text, messages):
+    """
+    Columnas de correcciones o sugerencias en el formato compacto. Los textos
+    se internan en el mismo orden que `wire_format.compact` (tipo, texto
+    del error y mensaje), de modo que ambos caminos dan el mismo resultado.
+    """
+    codes, rule_indexes, starts, ends = columns
+    if not starts:
+        return {}
+    intern = strings.setdefault
+    type_id = intern(kind, len(strings))
+    spans = [intern(text[start:end], len(strings)) for start, end in zip(starts, ends)]
+    message_ids = {}
+    notes = []
+    for key in zip(codes, rule_indexes):
+        message_id = message_ids.get(key)
+        if message_id is None:
+            message = messages[MATCH_KINDS[key[0]]][key[1]]
+            message_id = message_ids[key] = intern(message, len(strings))
+        notes.append(message_id)
+    span_key, note_key = ('issue', 'suggestion') if kind == 'syntax' else ('error', 'correction')
+    return {'type': [type_id] * len(spans), span_key: spans, note_key: notes,
+            'start': starts, 'end': ends}
+
+
+def _select(column, flags):
+    """Elementos de una columna de la tabla marcados en `flags`."""
+    return array('q', compress(column, flags))
+
+
+class MatchTable:
+    """
+    Coincidencias de reglas en un `array` de enteros, cuatro por fila:
+    código de categoría (`MATCH_KINDS`), índice de regla, inicio y fin.
+    """
+
+    __slots__ = ('rows',)
+
+    def __init__(self, rows: Optional[array] = None):
+        self.rows = rows if rows is not None else array('q')
+
+    @classmethod
+    def from_matches(cls, matches: Sequence[RuleMatch]) -> 'MatchTable':
+        rows = array('q')
+        for match in matches:
+            rows.extend((_KIND_CODES[match.kind], match.rule_index, match.start, match.end))
+        return cls(rows)
+
+    def __len__(self) -> int:
+        return len(self.rows) // _ROW
+
+    def __iter__(self):
+        """(categoría, índice de regla, inicio, fin) de cada coincidencia."""
+        rows = self.rows
+        for offset in range(0, len(rows), _ROW):
+            yield (MATCH_KINDS[rows[offset]], rows[offset + 1],
+                   rows[offset + 2], rows[offset + 3])
+
+    def counts(self) -> Tuple[int, int]:
+        """(correcciones, sugerencias): la sintaxis sugiere, el resto corrige."""
+        issues = self.rows[::_ROW].count(_SYNTAX_CODE)
+        return len(self) - issues, issues
+
+
+class AnalysisResult:
+    """
+    Resultado de analizar un texto. Guarda una referencia al texto y al motor
+    de reglas del idioma para resolver los textos de las correcciones en
+    `to_dict()`; los resultados que vienen de la caché (`from_dict`) guardan
+    el diccionario ya decodificado.
+    """
+
+    __slots__ = ('language', 'created', 'text_length', 'grammar', 'syntax',
+                 'vocabulary', 'pronunciation', 'overall_score',
+                 'matches', '_text', '_engine', '_analysis')
+
+    def __init__(self, language: str, text_length: int, grammar: int, syntax: int,
+                 vocabulary: int, pronunciation: int, overall_score: int,
+                 matches: Optional[MatchTable] = None, text: str = '',
+                 engine: Optional[RuleEngine] = None, created: Optional[datetime] = None):
+        self.language = language
+        self.created = created or datetime.utcnow()
+        self.text_length = text_length
+        self.grammar = grammar
+        self.syntax = syntax
+        self.vocabulary = vocabulary
+        self.pronunciation = pronunciation
+        self.overall_score = overall_score
+        self.matches = matches if matches is not None else MatchTable()
+        self._text = text
+        self._engine = engine
+        self._analysis: Optional[Dict] = None
+
+    @classmethod
+    def from_dict(cls, analysis: Dict) -> 'AnalysisResult':
+        """Envuelve un análisis ya materializado (p. ej. leído de la caché)."""
+        scores = analysis['scores']
+        result = cls(analysis['language'], analysis['text_length'], scores['grammar'],
+                     scores['syntax'], scores['vocabulary'], scores['pronunciation'],
+                     analysis['overall_score'])
+        result._analysis = analysis
+        return result
+
+    def __getstate__(self):
+        # El motor de reglas no viaja entre procesos (ver `bind_engine`)
+        return {name: getattr(self, name) for name in self.__slots__ if name != '_engine'}
+
+    def __setstate__(self, state: Dict) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
+        self._engine = None
+
+    def bind_engine(self, engine: Optional[RuleEngine]) -> 'AnalysisResult':
+        """
+        Asigna el motor de reglas del idioma a un resultado recibido de otro
+        proceso (con las mismas reglas que lo produjeron).
+        """
+        self._engine = engine
+        return self
+
+    @property
+    def scores(self) -> Dict[str, int]:
+        return {'grammar': self.grammar, 'syntax': self.syntax,
+                'vocabulary': self.vocabulary, 'pronunciation': self.pronunciation}
+
+    def score_row(self) -> List[int]:
+        """Puntuaciones en el orden de `SKILLS` (ver `ProgressAccumulator`)."""
+        return [getattr(self, skill) for skill in SKILLS]
+
+    def findings(self) -> Tuple[List[Dict], List[Dict]]:
+        """(correcciones, sugerencias) en el formato de `analyze_text`."""
+        if self._analysis is not None:
+            return self._analysis['corrections'], self._analysis['suggestions']
+        text = self._text
+        messages = self._engine.messages if self._engine is not None else {}
+        corrections, suggestions = [], []
+        for kind, rule_index, start, end in self.matches:
+            if kind == 'syntax':
+                suggestions.append({
+                    'type': 'syntax',
+                    'issue': text[start:end],
+                    'suggestion': messages[kind][rule_index],
+                    'position': (start, end)
+                })
+            else:
+                corrections.append({
+                    'type': 'grammar',
+                    'error': text[start:end],
+                    'correction': messages[kind][rule_index],
+                    'position': (start, end)
+                })
+        return corrections, suggestions
+
+    def finding_columns(self, strings: Dict[str, int]) -> Tuple[Dict, Dict]:
+        """
+        (correcciones, sugerencias) por columnas para el formato compacto (ver
+        `wire_format`), sin crear un diccionario por hallazgo: los textos pasan
+        a índices de `strings` (texto -> índice, se amplía) y las posiciones
+        son arrays de enteros.
+        """
+        if self._analysis is not None:
+            raise ValueError('Materialized results have no match table')
+        rows = self.matches.rows
+        codes = rows[0::_ROW]
+        columns = (codes, rows[1::_ROW], rows[2::_ROW], rows[3::_ROW])
+        issues = codes.count(_SYNTAX_CODE)
+        if not issues:
+            grammar, syntax = columns, ((),) * 4
+        else:
+            first = codes.index(_SYNTAX_CODE)
+            if codes[first:first + issues].count(_SYNTAX_CODE) == issues:
+                # Orden de `RuleEngine.scan`: gramática, sintaxis y frases
+                grammar = tuple(column[:first] + column[first + issues:] for column in columns)
+                syntax = tuple(column[first:first + issues] for column in columns)
+            else:
+                is_syntax = [code == _SYNTAX_CODE for code in codes]
+                is_grammar = [not flag for flag in is_syntax]
+                grammar = tuple(_select(column, is_grammar) for column in columns)
+                syntax = tuple(_select(column, is_syntax) for column in columns)
+        text = self._text
+        messages = self._engine.messages if self._engine is not None else {}
+        return (_finding_table(strings, 'grammar', grammar, text, messages),
+                _finding_table(strings, 'syntax', syntax, text, messages))
+
+    def to_dict(self) -> Dict:
+        """
+        El diccionario de `analyze_text`. Se construye en cada llamada, salvo
+        en los resultados de `from_dict`, que retornan el suyo.
+        """
+        if self._analysis is not None:
+            return self._analysis
+        corrections, suggestions = self.findings()
+        return {
+            'language': self.language,
+            'timestamp': self.created.isoformat(),
+            'text_length': self.text_length,
+            'scores': self.scores,
+            'corrections': corrections,
+            'suggestions': suggestions,
+            'overall_score': self.overall_score
+        }
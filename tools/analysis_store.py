@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Almacenamiento de análisis para el Sistema de Puntuación de Idiomas - Tutorium
+Tabla de análisis de sólo inserción indexada por (student_id, created_at) y
+agregados por estudiante mantenidos en cada escritura, de modo que el reporte
+de progreso es una consulta O(1) en lugar de recorrer todo el historial.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from progress_accumulator import WINDOW_SIZE, ProgressAccumulator
+
+
+def sqlite_path(database_url: str) -> str:
+    """Convierte `sqlite:///archivo.db` en la ruta que entiende sqlite3."""
+    prefix = 'sqlite:///'
+    if not database_url or not database_url.startswith(prefix):
+        raise ValueError(f"Unsupported DATABASE_URL: {database_url!r} (only sqlite is supported)")
+    return database_url[len(prefix):] or ':memory:'
+
+
+class AnalysisStore:
+    """
+    Persistencia de análisis por estudiante.
+
+    `analyses` guarda cada análisis completo; `student_progress` guarda por
+    estudiante el estado de su `ProgressAccumulator` (suma y número de
+    puntuaciones por habilidad y ventanas de los primeros y últimos
+    `WINDOW_SIZE` análisis). Los análisis se consideran en el orden en que
+    se escriben.
+    """
+
+    def __init__(self, database_url: str):
+        self.path = sqlite_path(database_url)
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión propia de cada hilo (sqlite3 no las comparte)."""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema(db)
+                    self._schema_ready = True
+        return db
+
+    @staticmethod
+    def _create_schema(db: sqlite3.Connection) -> None:
+        """Crea las tablas e índices si no existen."""
+        db.executescript('''
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                student_id TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                language TEXT,
+                overall_score INTEGER,
+                analysis TEXT NOT NULL,
+                session_data TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_student_created
+                ON analyses (student_id, created_at);
+            CREATE TABLE IF NOT EXISTS student_progress (
+                student_id TEXT PRIMARY KEY,
+                total_sessions INTEGER NOT NULL,
+                skill_sums TEXT NOT NULL,
+                skill_counts TEXT NOT NULL,
+                first_window TEXT NOT NULL,
+                last_window TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            );
+        ''')
+
+    def save_analysis(self, student_id: str, analysis: Dict,
+                      session_data: Optional[Dict] = None) -> None:
+        """Guarda un análisis y actualiza los agregados del estudiante."""
+        self.save_analyses([(student_id, analysis, session_data)])
+
+    def save_analyses(self, records: Iterable[Tuple[str, Dict, Optional[Dict]]]) -> int:
+        """
+        Inserción masiva de (student_id, analysis, session_data) en una sola
+        transacción. Retorna el número de análisis guardados.
+        """
+        rows = []
+        by_student: Dict[str, List[Dict]] = {}
+        for student_id, analysis, session_data in records:
+            student_id = str(student_id)
+            scores = analysis.get('scores', {})
+            rows.append((
+                student_id,
+                analysis.get('language'),
+                analysis.get('overall_score'),
+                json.dumps(analysis),
+                json.dumps(session_data) if session_data is not None else None
+            ))
+            by_student.setdefault(student_id, []).append(scores)
+
+        if not rows:
+            return 0
+
+        db = self._connection()
+        # BEGIN IMMEDIATE serializa a los escritores de varios procesos
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            # `created_at` es la hora del servidor al escribir, dentro de la
+            # transacción: ordena igual que los agregados (orden de escritura).
+            # El `timestamp` del cliente sólo se guarda dentro del análisis.
+            now = datetime.utcnow().isoformat()
+            db.executemany(
+                'INSERT INTO analyses (student_id, created_at, language, overall_score, '
+                'analysis, session_data) VALUES (?, ?, ?, ?, ?, ?)',
+                [(row[0], now) + row[1:] for row in rows]
+            )
+            for student_id, score_list in by_student.items():
+                self._update_progress(db, student_id, score_list, now)
+            db.execute('COMMIT')
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        return len(rows)
+
+    @staticmethod
+    def _load_progress(db: sqlite3.Connection, student_id: str) -> Optional[ProgressAccumulator]:
+        """Lee el acumulador de un estudiante, o None si no tiene análisis."""
+        row = db.execute(
+            'SELECT total_sessions, skill_sums, skill_counts, first_window, last_window '
+            'FROM student_progress WHERE student_id = ?',
+            (student_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        sums, counts, first_window, last_window = (json.loads(v) for v in row[1:])
+        return ProgressAccumulator.from_dict({
+            'total_sessions': row[0],
+            'sums': sums,
+            'counts': counts,
+            'first_window': first_window,
+            'last_window': last_window,
+        })
+
+    def _update_progress(self, db: sqlite3.Connection, student_id: str,
+                         score_list: List[Dict], now: str) -> None:
+        """Aplica nuevos análisis a los agregados de un estudiante."""
+        accumulator = self._load_progress(db, student_id) or ProgressAccumulator()
+        for scores in score_list:
+            accumulator.update_scores(scores)
+
+        state = accumulator.to_dict()
+        db.execute(
+            'INSERT OR REPLACE INTO student_progress (student_id, total_sessions, '
+            'skill_sums, skill_counts, first_window, last_window, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (student_id, state['total_sessions'], json.dumps(state['sums']),
+             json.dumps(state['counts']), json.dumps(state['first_window']),
+             json.dumps(state['last_window']), now)
+        )
+
+    def get_progress(self, student_id: str) -> Optional[ProgressAccumulator]:
+        """
+        Retorna el acumulador de progreso del estudiante (una sola fila, sin
+        recorrer su historial), o None si no hay datos.
+        """
+        return self._load_progress(self._connection(), str(student_id))
+
+    def recent_analyses(self, student_id: str, limit: int = WINDOW_SIZE) -> List[Dict]:
+        """Últimos análisis del estudiante (más reciente primero) vía el índice."""
+        rows = self._connection().execute(
+            'SELECT analysis FROM analyses WHERE student_id = ? '
+            'ORDER BY created_at DESC, id DESC LIMIT ?',
+            (str(student_id), limit)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Registro de backends de NLP con carga diferida - Tutorium
+spaCy, stanza, nltk, librosa, scikit-learn o pandas sólo se importan (y sus
+modelos sólo se cargan) la primera vez que un analizador los pide. Así un
+proceso que sólo atiende `/api/health` o el análisis por reglas no paga su
+coste de arranque ni su memoria.
+
+Uso:
+  from backends import BACKENDS
+  nlp = BACKENDS.get('spacy_en')       # importa spaCy y carga el modelo
+  BACKENDS.preload(['spacy_en'])        # carga anticipada al arrancar
+"""
+
+import importlib
+import importlib.util
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import SystemConfig
+
+
+class BackendUnavailableError(ImportError):
+    """La dependencia opcional (o el modelo) de un backend no está instalada."""
+
+
+class Backend:
+    """Un backend: módulos que necesita y función que construye el objeto."""
+
+    def __init__(self, name: str, modules: Tuple[str, ...], loader: Callable[[], Any],
+                 description: str = ''):
+        self.name = name
+        self.modules = modules
+        self.loader = loader
+        self.description = description
+        self.instance: Any = None
+        self.loaded = False
+        self.load_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def is_installed(self) -> bool:
+        """Comprueba los módulos sin importarlos."""
+        return all(importlib.util.find_spec(module) is not None for module in self.modules)
+
+
+class BackendRegistry:
+    """
+    Backends registrados por nombre. `get` carga cada uno una sola vez, aunque
+    lo pidan varios hilos a la vez; los fallos de carga se recuerdan y se
+    vuelven a lanzar sin reintentar el import.
+    """
+
+    def __init__(self):
+        self._backends: Dict[str, Backend] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, modules: Iterable[str], loader: Callable[[], Any],
+                 description: str = '') -> None:
+        """Registra un backend (no importa nada)."""
+        self._backends[name] = Backend(name, tuple(modules), loader, description)
+
+    def names(self) -> List[str]:
+        return list(self._backends)
+
+    def _backend(self, name: str) -> Backend:
+        backend = self._backends.get(name)
+        if backend is None:
+            raise KeyError(f"Unknown NLP backend: {name!r}")
+        return backend
+
+    def is_available(self, name: str) -> bool:
+        """True si las dependencias del backend están instaladas."""
+        return self._backend(name).is_installed()
+
+    def is_loaded(self, name: str) -> bool:
+        return self._backend(name).loaded
+
+    def get(self, name: str) -> Any:
+        """Retorna el backend, importándolo y cargándolo en el primer uso."""
+        backend = self._backend(name)
+        if backend.loaded:
+            return backend.instance
+        with self._lock:
+            if backend.loaded:
+                return backend.instance
+            if backend.error is not None:
+                raise BackendUnavailableError(backend.error)
+            start = time.perf_counter()
+            try:
+                backend.instance = backend.loader()
+            except (ImportError, OSError) as e:  # spaCy: OSError si falta el modelo
+                backend.error = f"NLP backend {name!r} is not available: {e}"
+                raise BackendUnavailableError(backend.error) from e
+            backend.load_seconds = time.perf_counter() - start
+            backend.loaded = True
+            return backend.instance
+
+    def preload(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Carga los backends indicados (p. ej. `SystemConfig.NLP_PRELOAD`).
+        Retorna nombre -> error (None si cargó); un backend ausente no
+        impide arrancar.
+        """
+        errors: Dict[str, Optional[str]] = {}
+        for name in names:
+            try:
+                self.get(name)
+                errors[name] = None
+            except (BackendUnavailableError, KeyError) as e:
+                errors[name] = str(e)
+        return errors
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Estado de cada backend: instalado, cargado y tiempo de carga."""
+        return {
+            name: {
+                'description': backend.description,
+                'installed': backend.is_installed(),
+                'loaded': backend.loaded,
+                'load_ms': None if backend.load_seconds is None
+                else round(backend.load_seconds * 1000, 1),
+                'error': backend.error,
+            }
+            for name, backend in self._backends.items()
+        }
+
+
+def _import(module: str) -> Callable[[], Any]:
+    return lambda: importlib.import_module(module)
+
+
+def _spacy_model(language: str) -> Callable[[], Any]:
+    def load():
+        spacy = importlib.import_module('spacy')
+        # Los componentes que no usa ningún analizador ni se cargan
+        return spacy.load(SystemConfig.SPACY_MODELS[language], exclude=SystemConfig.SPACY_EXCLUDE)
+    return load
+
+
+def _stanza_pipeline(language: str) -> Callable[[], Any]:
+    def load():
+        stanza = importlib.import_module('stanza')
+        return stanza.Pipeline(language, processors='tokenize,pos,lemma', verbose=False)
+    return load
+
+
+BACKENDS = BackendRegistry()
+BACKENDS.register('spacy_en', ['spacy'], _spacy_model('en'), 'spaCy + modelo inglés')
+BACKENDS.register('spacy_es', ['spacy'], _spacy_model('es'), 'spaCy + modelo español')
+BACKENDS.register('stanza_en', ['stanza'], _stanza_pipeline('en'), 'Pipeline stanza inglés')
+BACKENDS.register('stanza_es', ['stanza'], _stanza_pipeline('es'), 'Pipeline stanza español')
+BACKENDS.register('nltk', ['nltk'], _import('nltk'), 'Natural Language Toolkit')
+BACKENDS.register('librosa', ['librosa'], _import('librosa'), 'Análisis de audio')
+BACKENDS.register('soundfile', ['soundfile'], _import('soundfile'), 'Lectura de FLAC')
+BACKENDS.register('msgpack', ['msgpack'], _import('msgpack'), 'Respuestas MessagePack')
+BACKENDS.register('pyarrow', ['pyarrow'], _import('pyarrow'), 'Tablas Arrow')
+BACKENDS.register('pyarrow_parquet', ['pyarrow'], _import('pyarrow.parquet'), 'Salida Parquet')
+BACKENDS.register('sklearn', ['sklearn'], _import('sklearn'), 'scikit-learn')
+BACKENDS.register('pandas', ['pandas'], _import('pandas'), 'pandas')
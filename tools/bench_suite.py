@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks del Sistema de Puntuación de Idiomas - Tutorium
+Genera un corpus sintético (en/es, longitud y densidad de errores
+configurables), mide percentiles de latencia, throughput y pico de memoria
+por etapa y compara el resultado con una baseline JSON guardada.
+
+Uso:
+  python tools/bench_suite.py                     # Ejecuta y compara con la baseline
+  python tools/bench_suite.py --update-baseline   # Guarda el resultado como baseline
+  python tools/bench_suite.py --lengths 200 5000 --error-density 0.1
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Las etapas de la API no deben escribir en la base de datos real
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from config import SystemConfig
+from language_detector import get_detector
+from language_scoring_system import LanguageScoringSystem
+
+CORPUS_WORDS = {
+    'en': [
+        'the', 'student', 'is', 'learning', 'english', 'every', 'day', 'with',
+        'friends', 'and', 'teachers', 'at', 'school', 'however', 'she', 'reads',
+        'books', 'about', 'environment', 'knowledge', 'we', 'go', 'to', 'park',
+        'they', 'were', 'happy', 'because', 'weather', 'nice', 'therefore',
+    ],
+    'es': [
+        'el', 'estudiante', 'aprende', 'español', 'cada', 'día', 'con', 'sus',
+        'amigos', 'y', 'profesores', 'en', 'la', 'escuela', 'sin', 'embargo',
+        'ella', 'lee', 'libros', 'sobre', 'medio', 'ambiente', 'nosotros',
+        'vamos', 'al', 'parque', 'ellos', 'estaban', 'felices', 'porque', 'clima',
+    ],
+}
+
+# Errores que disparan las reglas regex además de las frases de la configuración
+REGEX_ERRORS = {
+    'en': ['he are', 'they was', 'a apple', 'really good'],
+    'es': ['la problema', 'esta bueno', 'yo soy teniendo'],
+}
+
+# Métricas comparadas con la baseline: (métrica, sentido en el que empeora)
+REGRESSION_METRICS = (('p95_ms', 'higher'), ('throughput', 'lower'), ('peak_kb', 'higher'),
+                      ('accuracy', 'lower'))
+
+# Longitudes (caracteres) de los textos de la etapa de detección de idioma
+DETECTION_LENGTHS = (30, 200, 1000)
+
+# Diferencias absolutas por debajo de estas se consideran ruido
+NOISE_FLOOR = {'p95_ms': 0.05, 'peak_kb': 16.0}
+
+
+def error_phrases(language: str) -> List[str]:
+    """Frases de error del idioma: configuración + reglas regex."""
+    phrases = [error for error, correction in
+               SystemConfig.get_language_config(language).common_errors
+               if error.lower() != correction.lower()]
+    return phrases + REGEX_ERRORS.get(language, [])
+
+
+def synthetic_corpus(language: str, count: int, length: int,
+                     error_density: float = 0.05, seed: int = 0) -> List[str]:
+    """
+    Genera `count` textos de ~`length` caracteres. `error_density` es la
+    probabilidad de insertar una frase de error en lugar de cada palabra.
+    """
+    rng = random.Random(f'{language}:{length}:{error_density}:{seed}')
+    words = CORPUS_WORDS[language]
+    errors = error_phrases(language)
+    texts = []
+    for _ in range(count):
+        parts: List[str] = []
+        size = 0
+        while size < length:
+            part = rng.choice(errors) if rng.random() < error_density else rng.choice(words)
+            if rng.random() < 0.1:
+                part += '.'
+            parts.append(part)
+            size += len(part) + 1
+        text = ' '.join(parts)[:length].strip()
+        texts.append(text[0].upper() + text[1:])
+    return texts
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Percentil por rango más cercano."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(func: Callable[[object], object], inputs: Sequence[object],
+            rounds: int = 3, memory_samples: int = 3) -> Dict[str, float]:
+    """
+    Latencia por llamada, throughput y pico de memoria de `func` sobre
+    `inputs`. Se recorre el corpus `rounds` veces y se conserva la ronda más
+    rápida, lo que reduce el ruido de otros procesos de la máquina.
+    """
+    func(inputs[0])  # calentamiento
+    latencies: List[float] = []
+    wall = float('inf')
+    for _ in range(max(1, rounds)):
+        round_latencies = []
+        started = time.perf_counter()
+        for item in inputs:
+            start = time.perf_counter()
+            func(item)
+            round_latencies.append((time.perf_counter() - start) * 1000)
+        elapsed = time.perf_counter() - started
+        if elapsed < wall:
+            wall, latencies = elapsed, round_latencies
+
+    # tracemalloc ralentiza: el pico se mide aparte con pocas llamadas
+    tracemalloc.start()
+    try:
+        for item in inputs[:memory_samples]:
+            func(item)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'samples': len(latencies),
+        'p50_ms': round(percentile(latencies, 0.50), 4),
+        'p95_ms': round(percentile(latencies, 0.95), 4),
+        'p99_ms': round(percentile(latencies, 0.99), 4),
+        'mean_ms': round(sum(latencies) / len(latencies), 4),
+        'throughput': round(len(latencies) / wall, 2),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_suite(lengths: Sequence[int], iterations: int = 50, error_density: float = 0.05,
+              languages: Sequence[str] = ('en', 'es'), include_api: bool = True) -> Dict:
+    """Ejecuta todas las etapas y retorna el informe completo."""
+    scorer = LanguageScoringSystem()  # sin caché: se mide el análisis real
+    results: Dict[str, Dict[str, float]] = {}
+
+    for language in languages:
+        for length in lengths:
+            corpus = synthetic_corpus(language, iterations, length, error_density)
+            results[f'analyze_text/{language}/{length}'] = measure(
+                lambda text: scorer.analyze_text(text, language), corpus)
+
+        batches = [synthetic_corpus(language, 50, 500, error_density, seed=i)
+                   for i in range(max(3, iterations // 10))]
+        results[f'analyze_batch/{language}/50x500'] = measure(
+            lambda texts: scorer.analyze_batch(texts, language), batches)
+
+    results.update(run_detection(iterations, error_density, languages))
+
+    history = [scorer.analyze_text(text, 'en')
+               for text in synthetic_corpus('en', 100, 300, error_density)]
+    results['export_progress_report/100'] = measure(
+        scorer.export_progress_report, [history] * iterations)
+
+    if include_api:
+        results.update(run_api_stages(iterations, error_density, languages))
+
+    return {
+        'meta': {
+            'generated_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'lengths': list(lengths),
+            'iterations': iterations,
+            'error_density': error_density,
+        },
+        'results': results,
+    }
+
+
+def run_detection(iterations: int, error_density: float,
+                  languages: Sequence[str]) -> Dict[str, Dict[str, float]]:
+    """Latencia y acierto de la detección de idioma (`language: "auto"`)."""
+    detector = get_detector()
+    results = {}
+    for length in DETECTION_LENGTHS:
+        labelled = [(text, language) for language in languages
+                    for text in synthetic_corpus(language, iterations, length,
+                                                 error_density, seed=2)]
+        metrics = measure(lambda item: detector.detect(item[0]), labelled)
+        hits = sum(detector.detect(text).language == language for text, language in labelled)
+        metrics['accuracy'] = round(hits / len(labelled), 4)
+        results[f'detect_language/{length}'] = metrics
+    return results
+
+
+def run_api_stages(iterations: int, error_density: float,
+                   languages: Sequence[str]) -> Dict[str, Dict[str, float]]:
+    """Endpoints Flask medidos en proceso con el cliente de pruebas."""
+    import language_api
+
+    client = language_api.app.test_client()
+    # Sin caché de resultados: cada ronda repite los mismos textos
+    language_api.scorer.cache = None
+    results = {}
+    for language in languages:
+        corpus = synthetic_corpus(language, iterations, 1000, error_density, seed=1)
+
+        def post_text(text, language=language):
+            response = client.post('/api/analyze-language',
+                                   json={'text': text, 'language': language})
+            assert response.status_code == 200, response.get_data(as_text=True)
+
+        results[f'api_analyze/{language}/1000'] = measure(post_text, corpus)
+
+        batches = [synthetic_corpus(language, 20, 500, error_density, seed=100 + i)
+                   for i in range(max(3, iterations // 10))]
+
+        def post_batch(texts, language=language):
+            response = client.post('/api/analyze-language/batch',
+                                   json={'texts': texts, 'language': language})
+            assert response.status_code == 200
+            response.get_data()  # consumir el NDJSON completo
+
+        results[f'api_batch/{language}/20x500'] = measure(post_batch, batches)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """Retorna una descripción por cada métrica que empeora más de `threshold`."""
+    regressions = []
+    for stage, metrics in results.items():
+        reference = baseline.get(stage)
+        if not reference:
+            continue
+        for metric, worse in REGRESSION_METRICS:
+            current, previous = metrics.get(metric), reference.get(metric)
+            if current is None or not previous:
+                continue
+            if worse == 'higher':
+                change = current / previous - 1
+                noise = abs(current - previous) < NOISE_FLOOR.get(metric, 0)
+            else:
+                change = previous / current - 1 if current else float('inf')
+                noise = False
+            if change > threshold and not noise:
+                regressions.append(f'{stage} {metric}: {previous} -> {current} '
+                                   f'({change:+.0%})')
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, float]],
+                  baseline: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    """Tabla de resultados con la variación de p95 frente a la baseline."""
+    print(f"{'etapa':<32} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9} "
+          f"{'pico KB':>9} {'Δp95':>7}")
+    for stage, metrics in results.items():
+        delta = ''
+        reference = (baseline or {}).get(stage)
+        if reference and reference.get('p95_ms'):
+            delta = f"{metrics['p95_ms'] / reference['p95_ms'] - 1:+.0%}"
+        print(f"{stage:<32} {metrics['p50_ms']:>9.3f} {metrics['p95_ms']:>9.3f} "
+              f"{metrics['p99_ms']:>9.3f} {metrics['throughput']:>9.1f} "
+              f"{metrics['peak_kb']:>9.1f} {delta:>7}")
+
+    accuracies = {stage: metrics['accuracy'] for stage, metrics in results.items()
+                  if 'accuracy' in metrics}
+    if accuracies:
+        print("\nAcierto de la detección de idioma:")
+        for stage, accuracy in accuracies.items():
+            print(f"  {stage:<30} {accuracy:.1%}")
+
+
+def main() -> int:
+    """Función principal; retorna 1 si hay regresiones."""
+    parser = argparse.ArgumentParser(description="Suite de benchmarks con baseline")
+    parser.add_argument('--lengths', type=int, nargs='+',
+                        default=[200, 1000, SystemConfig.MAX_TEXT_LENGTH])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--error-density', type=float, default=0.05)
+    parser.add_argument('--languages', nargs='+', default=['en', 'es'], choices=['en', 'es'])
+    parser.add_argument('--no-api', action='store_true', help='Omitir las etapas HTTP')
+    parser.add_argument('--baseline', default=SystemConfig.BENCH_BASELINE_PATH)
+    parser.add_argument('--threshold', type=float,
+                        default=SystemConfig.BENCH_REGRESSION_THRESHOLD)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--output', help='Guardar también el informe en este archivo')
+    args = parser.parse_args()
+
+    if any(length > SystemConfig.MAX_TEXT_LENGTH for length in args.lengths):
+        parser.error(f'lengths must not exceed MAX_TEXT_LENGTH ({SystemConfig.MAX_TEXT_LENGTH})')
+
+    report = run_suite(args.lengths, args.iterations, args.error_density,
+                       args.languages, include_api=not args.no_api)
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)['results']
+
+    print_results(report['results'], baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+    if baseline is None:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+        print(f"\nBaseline guardada en {args.baseline}")
+        return 0
+
+    regressions = compare(report['results'], baseline, args.threshold)
+    if regressions:
+        print(f"\nRegresiones (umbral {args.threshold:.0%}):")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"\nSin regresiones frente a {args.baseline} (umbral {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+"""
+Puntuación masiva offline - Tutorium
+Vuelve a puntuar un corpus histórico de textos (JSONL o CSV) cuando cambian
+las reglas. El corpus se lee de forma perezosa, por bloques de
+`BULK_CHUNK_SIZE` registros que se reparten entre un pool de procesos (cada
+uno con su `LanguageScoringSystem` y `analyze_batch`), y los resultados se
+escriben en el orden del corpus en JSONL o Parquet.
+
+Cada pocos segundos se guarda un punto de control (`<salida>.checkpoint.json`)
+con la posición en bytes del corpus y el tamaño de la salida ya confirmada.
+Si el proceso muere, al relanzar el mismo comando se descarta lo escrito
+después del último punto de control y se continúa desde esa posición. El
+número de bloques en vuelo está acotado, así que la memoria no crece con el
+tamaño del corpus.
+
+Uso:
+  python tools/bulk_scoring.py corpus.jsonl -o scores.jsonl
+  python tools/bulk_scoring.py corpus.csv -o scores.parquet --workers 8
+  python tools/bulk_scoring.py corpus.jsonl -o scores.jsonl --restart
+
+Cada registro necesita un campo de texto (`--text-field`, por defecto
+`text`); el identificador (`--id-field`) y el idioma (`--language-field`,
+`en`, `es` o `auto`) son opcionales.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from backends import BACKENDS, BackendUnavailableError
+from config import SystemConfig
+
+CHECKPOINT_VERSION = 1
+AUTO_LANGUAGE = 'auto'
+FORMATS = ('jsonl', 'csv')
+OUTPUT_FORMATS = ('jsonl', 'parquet')
+
+# Sistema de puntuación propio de cada proceso
+_bulk_scorer = None
+
+
+class BulkScoringError(ValueError):
+    """Corpus, salida o punto de control no válidos para esta ejecución."""
+
+
+class CorpusRecord(NamedTuple):
+    """Un registro del corpus y la posición (bytes) en la que termina."""
+    index: int
+    id: Any
+    text: Any
+    language: str
+    end: int
+    error: Optional[str] = None
+
+
+def input_format(path: str, requested: Optional[str] = None) -> str:
+    if requested:
+        return requested
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def output_format(path: str, requested: Optional[str] = None) -> str:
+    if requested:
+        return requested
+    return 'parquet' if path.lower().endswith('.parquet') else 'jsonl'
+
+
+def _jsonl_rows(handle, offset: int) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """(fin, fila, error) de cada línea no vacía a partir de `offset`."""
+    handle.seek(offset)
+    for line in handle:
+        offset += len(line)
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield offset, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(row, dict):
+            yield offset, None, 'Record must be a JSON object'
+            continue
+        yield offset, row, None
+
+
+def _csv_rows(handle, offset: int) -> Iterator[Tuple[int, List[str]]]:
+    """
+    (fin, campos) de cada fila a partir de `offset`. `csv.reader` pide las
+    líneas de una en una, así que al terminar una fila `position` es
+    exactamente su final aunque tenga campos entre comillas con saltos de
+    línea.
+    """
+    handle.seek(offset)
+    position = [offset]
+
+    def lines():
+        for line in handle:
+            position[0] += len(line)
+            yield line.decode('utf-8')
+
+    for fields in csv.reader(lines()):
+        yield position[0], fields
+
+
+def read_corpus(path: str, fmt: str = 'jsonl', offset: int = 0, index: int = 0,
+                text_field: str = 'text', id_field: str = 'id',
+                language_field: str = 'language',
+                default_language: str = 'en') -> Iterator[CorpusRecord]:
+    """
+    Registros del corpus desde la posición `offset` (0 = principio), leídos
+    de uno en uno. `index` es el número del primer registro que se lee.
+    """
+    with open(path, 'rb') as handle:
+        if fmt == 'csv':
+            header_end, header = next(_csv_rows(handle, 0), (0, None))
+            if header is None:
+                return
+            header[0] = header[0].lstrip('\ufeff')
+            columns = {name: number for number, name in enumerate(header)}
+            if text_field not in columns:
+                raise BulkScoringError(f'CSV has no {text_field!r} column')
+            rows = ((end, dict(zip(header, fields)), None)
+                    for end, fields in _csv_rows(handle, max(offset, header_end)))
+        else:
+            rows = _jsonl_rows(handle, offset)
+
+        for end, row, error in rows:
+            if row is None:
+                yield CorpusRecord(index, index, None, default_language, end, error)
+            else:
+                yield CorpusRecord(index, row.get(id_field, index), row.get(text_field),
+                                   row.get(language_field) or default_language, end)
+            index += 1
+
+
+def _init_worker() -> None:
+    """Construye el sistema de puntuación del proceso una sola vez."""
+    global _bulk_scorer
+    from language_scoring_system import LanguageScoringSystem
+    _bulk_scorer = LanguageScoringSystem()
+
+
+def _record_error(record: CorpusRecord, supported: List[str]) -> Optional[str]:
+    if record.error:
+        return record.error
+    if not isinstance(record.text, str) or not record.text.strip():
+        return 'Text must be a non-empty string'
+    if record.language != AUTO_LANGUAGE and record.language not in supported:
+        return f'Language {record.language} not supported'
+    return None
+
+
+def score_chunk(records: List[CorpusRecord]) -> List[Dict]:
+    """
+    Puntúa un bloque con `analyze_batch`, un lote por idioma, y retorna una
+    salida por registro en el orden del bloque.
+    """
+    from language_detector import detect_language
+
+    if _bulk_scorer is None:
+        _init_worker()
+    scorer = _bulk_scorer
+    outputs: List[Optional[Dict]] = [None] * len(records)
+    groups: Dict[str, List[int]] = {}
+    for position, record in enumerate(records):
+        error = _record_error(record, scorer.supported_languages)
+        if error:
+            outputs[position] = {'index': record.index, 'id': record.id, 'error': error}
+            continue
+        language = record.language
+        if language == AUTO_LANGUAGE:
+            language = detect_language(record.text).language
+        groups.setdefault(language, []).append(position)
+
+    for language, positions in groups.items():
+        analyses = scorer.analyze_batch([records[p].text for p in positions], language)
+        for position, analysis in zip(positions, analyses):
+            # Sin timestamp: relanzar la puntuación produce la misma salida
+            analysis.pop('timestamp', None)
+            record = records[position]
+            outputs[position] = {'index': record.index, 'id': record.id,
+                                 'analysis': analysis}
+    return outputs
+
+
+class JsonlOutput:
+    """Una línea JSON por registro; al reanudar se trunca a lo confirmado."""
+
+    def __init__(self, path: str, state: Optional[Dict] = None):
+        self.path = path
+        size = (state or {}).get('bytes', 0)
+        self._handle = open(path, 'r+b' if size else 'wb')
+        self._handle.truncate(size)
+        self._handle.seek(size)
+
+    def write(self, outputs: List[Dict]) -> None:
+        self._handle.write(b''.join(
+            json.dumps(output, ensure_ascii=False).encode('utf-8') + b'\n'
+            for output in outputs))
+
+    def pending(self) -> int:
+        return 0
+
+    def commit(self) -> Dict:
+        """Lleva lo escrito a disco y retorna el estado del punto de control."""
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        return {'bytes': self._handle.tell()}
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class ParquetOutput:
+    """
+    Directorio de Parquet (un conjunto de datos `part-NNNNN.parquet`): cada
+    confirmación escribe una parte nueva, así que reanudar no reescribe las
+    anteriores. Necesita `pyarrow` (backend opcional).
+    """
+
+    COLUMNS = ('index', 'id', 'language', 'error', 'text_length', 'grammar', 'syntax',
+               'vocabulary', 'pronunciation', 'overall_score', 'corrections', 'suggestions')
+
+    def __init__(self, path: str, state: Optional[Dict] = None, part_rows: int = 50000):
+        self._arrow = BACKENDS.get('pyarrow')
+        self._parquet = BACKENDS.get('pyarrow_parquet')
+        self.path = path
+        self.part_rows = part_rows
+        self.parts = (state or {}).get('parts', 0)
+        os.makedirs(path, exist_ok=True)
+        # Partes escritas después del último punto de control
+        for name in os.listdir(path):
+            if name.startswith('part-') and name.endswith('.parquet') \
+                    and int(name[5:-8]) >= self.parts:
+                os.unlink(os.path.join(path, name))
+        self._rows: Dict[str, List[Any]] = {column: [] for column in self.COLUMNS}
+
+    def write(self, outputs: List[Dict]) -> None:
+        rows = self._rows
+        for output in outputs:
+            analysis = output.get('analysis') or {}
+            scores = analysis.get('scores', {})
+            rows['index'].append(output['index'])
+            rows['id'].append(str(output['id']))
+            rows['language'].append(analysis.get('language'))
+            rows['error'].append(output.get('error'))
+            rows['text_length'].append(analysis.get('text_length'))
+            for skill in ('grammar', 'syntax', 'vocabulary', 'pronunciation'):
+                rows[skill].append(scores.get(skill))
+            rows['overall_score'].append(analysis.get('overall_score'))
+            for field in ('corrections', 'suggestions'):
+                rows[field].append(json.dumps(analysis[field], ensure_ascii=False)
+                                   if field in analysis else None)
+
+    def pending(self) -> int:
+        return len(self._rows['index'])
+
+    def commit(self) -> Dict:
+        if self.pending():
+            table = self._arrow.table(self._rows)
+            target = os.path.join(self.path, f'part-{self.parts:05d}.parquet')
+            handle, temporary = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+            os.close(handle)
+            try:
+                self._parquet.write_table(table, temporary)
+                os.replace(temporary, target)
+            except BaseException:
+                os.unlink(temporary)
+                raise
+            self.parts += 1
+            self._rows = {column: [] for column in self.COLUMNS}
+        return {'parts': self.parts}
+
+    def close(self) -> None:
+        pass
+
+
+def _open_output(path: str, fmt: str, state: Optional[Dict]):
+    if fmt == 'parquet':
+        return ParquetOutput(path, state)
+    return JsonlOutput(path, state)
+
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    try:
+        with open(path, encoding='utf-8') as handle:
+            checkpoint = json.load(handle)
+    except FileNotFoundError:
+        return None
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        raise BulkScoringError(f'Unsupported checkpoint version in {path}')
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict) -> None:
+    """Escribe el punto de control en un temporal y lo renombra (atómico)."""
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                         suffix='.tmp')
+    with os.fdopen(handle, 'w', encoding='utf-8') as output:
+        json.dump(checkpoint, output, indent=2)
+    os.replace(temporary, path)
+
+
+def _chunks(records: Iterator[CorpusRecord], size: int) -> Iterator[List[CorpusRecord]]:
+    chunk: List[CorpusRecord] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _rules_version() -> str:
+    """
+    Versión de reglas, pesos y vocabulario con la que se puntúa. Construye el
+    sistema de este proceso, que los procesos del pool heredan con fork.
+    """
+    if _bulk_scorer is None:
+        _init_worker()
+    return _bulk_scorer._cache_version()
+
+
+def score_corpus(input_path: str, output_path: str, input_fmt: Optional[str] = None,
+                 output_fmt: Optional[str] = None, checkpoint_path: Optional[str] = None,
+                 workers: Optional[int] = None, chunk_size: Optional[int] = None,
+                 restart: bool = False, limit: Optional[int] = None,
+                 checkpoint_seconds: Optional[float] = None,
+                 report_seconds: float = 10, report=None, **fields) -> Dict:
+    """
+    Puntúa el corpus y retorna un resumen (registros, errores, docs/s).
+    `limit` detiene la ejecución tras ese número de registros en total (la
+    siguiente ejecución continúa). `fields` son `text_field`, `id_field`,
+    `language_field` y `default_language` de `read_corpus`.
+    """
+    input_fmt = input_format(input_path, input_fmt)
+    output_fmt = output_format(output_path, output_fmt)
+    checkpoint_path = checkpoint_path or f'{output_path}.checkpoint.json'
+    chunk_size = chunk_size or SystemConfig.BULK_CHUNK_SIZE
+    if checkpoint_seconds is None:
+        checkpoint_seconds = SystemConfig.BULK_CHECKPOINT_SECONDS
+    if workers is None:
+        workers = SystemConfig.API_WORKERS or multiprocessing.cpu_count()
+
+    rules_version = _rules_version()
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    if checkpoint is not None:
+        if checkpoint['input'] != os.path.abspath(input_path):
+            raise BulkScoringError(
+                f"Checkpoint belongs to {checkpoint['input']}; use --restart to start over")
+        if checkpoint['rules_version'] != rules_version:
+            raise BulkScoringError(
+                'Rules changed since the checkpoint was written; use --restart to start over')
+    else:
+        checkpoint = {
+            'version': CHECKPOINT_VERSION,
+            'input': os.path.abspath(input_path),
+            'output': os.path.abspath(output_path),
+            'output_format': output_fmt,
+            'rules_version': rules_version,
+            'offset': 0,
+            'records': 0,
+            'errors': 0,
+            'output_state': None,
+            'finished': False,
+        }
+
+    summary = {'records': 0, 'errors': 0, 'resumed_from': checkpoint['records'],
+               'seconds': 0.0, 'docs_per_second': 0.0}
+    if checkpoint['finished']:
+        summary['total_records'] = checkpoint['records']
+        return summary
+
+    writer = _open_output(output_path, output_fmt, checkpoint['output_state'])
+    records = read_corpus(input_path, input_fmt, checkpoint['offset'], checkpoint['records'],
+                          **fields)
+    if limit is not None:
+        # Deja de leer la entrada en cuanto se alcanza el límite
+        records = islice(records, max(0, limit - checkpoint['records']))
+
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.Pool(processes=workers, initializer=_init_worker)
+    # Bloques en vuelo: suficientes para que ningún proceso espere
+    max_pending = max(1, workers) * 2
+    pending: deque = deque()
+    started = time.perf_counter()
+    last_checkpoint = last_report = started
+    position = {'offset': checkpoint['offset'], 'records': checkpoint['records']}
+
+    previous_errors = checkpoint['errors']
+
+    def commit(finished: bool = False) -> None:
+        checkpoint['output_state'] = writer.commit()
+        checkpoint['offset'] = position['offset']
+        checkpoint['records'] = position['records']
+        checkpoint['errors'] = previous_errors + summary['errors']
+        checkpoint['finished'] = finished
+        save_checkpoint(checkpoint_path, checkpoint)
+
+    def handle(chunk: List[CorpusRecord], outputs: List[Dict]) -> None:
+        nonlocal last_checkpoint, last_report
+        writer.write(outputs)
+        summary['records'] += len(outputs)
+        summary['errors'] += sum(1 for output in outputs if 'error' in output)
+        position['offset'] = chunk[-1].end
+        position['records'] = chunk[-1].index + 1
+        now = time.perf_counter()
+        if now - last_checkpoint >= checkpoint_seconds or \
+                writer.pending() >= getattr(writer, 'part_rows', float('inf')):
+            commit()
+            last_checkpoint = now
+        if report is not None and now - last_report >= report_seconds:
+            elapsed = now - started
+            report(f"{position['records']} registros, "
+                   f"{summary['records'] / elapsed:.0f} docs/s")
+            last_report = now
+
+    try:
+        for chunk in _chunks(records, chunk_size):
+            if pool is None:
+                handle(chunk, score_chunk(chunk))
+                continue
+            pending.append((chunk, pool.apply_async(score_chunk, (chunk,))))
+            if len(pending) >= max_pending:
+                chunk, result = pending.popleft()
+                handle(chunk, result.get())
+        while pending:
+            chunk, result = pending.popleft()
+            handle(chunk, result.get())
+        reached_limit = limit is not None and position['records'] >= limit
+        commit(finished=not reached_limit)
+    except KeyboardInterrupt:
+        # Se confirma lo ya escrito en orden; lo que estaba en vuelo se repite
+        commit()
+        raise
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        writer.close()
+
+    summary['seconds'] = time.perf_counter() - started
+    if summary['seconds']:
+        summary['docs_per_second'] = summary['records'] / summary['seconds']
+    summary['total_records'] = checkpoint['records']
+    return summary
+
+
+def main() -> int:
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Puntuación masiva de un corpus")
+    parser.add_argument('input', help='Corpus JSONL o CSV')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Salida JSONL, o directorio Parquet si termina en .parquet')
+    parser.add_argument('--input-format', choices=FORMATS)
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS)
+    parser.add_argument('--checkpoint', help='Por defecto <salida>.checkpoint.json')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignorar el punto de control y empezar de cero')
+    parser.add_argument('--workers', type=int,
+                        help='Procesos (1 = en este proceso; por defecto API_WORKERS o CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=SystemConfig.BULK_CHUNK_SIZE)
+    parser.add_argument('--limit', type=int, help='Parar tras este número de registros')
+    parser.add_argument('--text-field', default='text')
+    parser.add_argument('--id-field', default='id')
+    parser.add_argument('--language-field', default='language')
+    parser.add_argument('--language', default='en', choices=['en', 'es', AUTO_LANGUAGE],
+                        help='Idioma de los registros que no lo indican')
+    args = parser.parse_args()
+
+    def report(message: str) -> None:
+        print(message, file=sys.stderr, flush=True)
+
+    try:
+        summary = score_corpus(
+            args.input, args.output, args.input_format, args.output_format, args.checkpoint,
+            args.workers, args.chunk_size, args.restart, args.limit, report=report,
+            text_field=args.text_field, id_field=args.id_field,
+            language_field=args.language_field, default_language=args.language)
+    except (BulkScoringError, BackendUnavailableError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if summary['resumed_from']:
+        print(f"Reanudado tras {summary['resumed_from']} registros")
+    print(f"{summary['records']} registros puntuados ({summary['errors']} con error) "
+          f"en {summary['seconds']:.1f} s: {summary['docs_per_second']:.0f} docs/s; "
+          f"total {summary['total_records']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -136,6 +136,22 @@ class SystemConfig:
     API_PORT = int(os.getenv('API_PORT', '5000'))
     API_DEBUG = os.getenv('API_DEBUG', 'True').lower() == 'true'
     
+    # Modo producción con pool de procesos (0 = servidor de desarrollo)
+    API_WORKERS = int(os.getenv('API_WORKERS', '0'))
+    API_QUEUE_SIZE = int(os.getenv('API_QUEUE_SIZE', '32'))
+    API_WORKER_TIMEOUT = float(os.getenv('API_WORKER_TIMEOUT', '30'))
+    API_RETRY_AFTER = int(os.getenv('API_RETRY_AFTER', '1'))  # segundos
+    
+    # API ASGI con agrupación de peticiones ('thread' | 'process')
+    ASGI_PORT = int(os.getenv('ASGI_PORT', '5001'))
+    ASGI_EXECUTOR = os.getenv('ASGI_EXECUTOR', 'thread')
+    ASGI_WORKERS = int(os.getenv('ASGI_WORKERS', '0'))  # 0 = valor por defecto
+    
+    # Instantánea precompilada de reglas (ver rule_snapshot.py); vacío = reglas
+    # del código. La recarga en caliente exige ADMIN_TOKEN (vacío = desactivada)
+    RULE_SNAPSHOT = os.getenv('RULE_SNAPSHOT', '')
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN', '')
+    
     # Configuración de base de datos
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///tutorium_language.db')
     
@@ -143,6 +159,18 @@ class SystemConfig:
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads/')
     MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', '10485760'))  # 10MB
     
+    # Análisis de voz: tramas fijas leídas por bloques (ver speech_analysis)
+    SPEECH_FRAME_MS = int(os.getenv('SPEECH_FRAME_MS', '20'))
+    SPEECH_BLOCK_FRAMES = int(os.getenv('SPEECH_BLOCK_FRAMES', '50'))
+    SPEECH_VAD_MARGIN_DB = float(os.getenv('SPEECH_VAD_MARGIN_DB', '12'))
+    SPEECH_MIN_PAUSE_MS = int(os.getenv('SPEECH_MIN_PAUSE_MS', '300'))
+    SPEECH_FEATURE_BANDS = int(os.getenv('SPEECH_FEATURE_BANDS', '24'))
+    
+    # Índice de plantillas de pronunciación (ver phoneme_templates.py)
+    PHONEME_TEMPLATE_INDEX = os.getenv('PHONEME_TEMPLATE_INDEX', 'data/phoneme_templates')
+    # Semiancho de la banda de Sakoe–Chiba como fracción de la secuencia más larga
+    DTW_BAND_RATIO = float(os.getenv('DTW_BAND_RATIO', '0.1'))
+    
     # Configuración de logging
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     LOG_FILE = os.getenv('LOG_FILE', 'logs/language_api.log')
@@ -154,8 +182,60 @@ class SystemConfig:
     MAX_TEXT_LENGTH = int(os.getenv('MAX_TEXT_LENGTH', '5000'))
     MIN_TEXT_LENGTH = int(os.getenv('MIN_TEXT_LENGTH', '10'))
     
+    # Límites de análisis por lotes
+    MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '500'))
+    BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', '50'))
+    
+    # Puntuación masiva offline (ver bulk_scoring.py)
+    BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '200'))
+    BULK_CHECKPOINT_SECONDS = float(os.getenv('BULK_CHECKPOINT_SECONDS', '10'))
+    
+    # Documentos largos por fragmentos de oraciones (ver long_document.py)
+    LONG_DOCUMENT_MAX_LENGTH = int(os.getenv('LONG_DOCUMENT_MAX_LENGTH', '1000000'))
+    LONG_DOCUMENT_SHARD_CHARS = int(os.getenv('LONG_DOCUMENT_SHARD_CHARS', '5000'))
+    
+    # Análisis incremental por oraciones (escritura en vivo)
+    INCREMENTAL_SEGMENT_CACHE_SIZE = int(os.getenv('INCREMENTAL_SEGMENT_CACHE_SIZE', '20000'))
+    INCREMENTAL_MAX_SESSIONS = int(os.getenv('INCREMENTAL_MAX_SESSIONS', '1000'))
+    
+    # Análisis en streaming por WebSocket (límites por conexión)
+    STREAM_MAX_CHARS = int(os.getenv('STREAM_MAX_CHARS', '100000'))
+    STREAM_MAX_PENDING_CHARS = int(os.getenv('STREAM_MAX_PENDING_CHARS', '2000'))
+    STREAM_MAX_CHUNK_CHARS = int(os.getenv('STREAM_MAX_CHUNK_CHARS', '8192'))
+    STREAM_SEND_QUEUE_SIZE = int(os.getenv('STREAM_SEND_QUEUE_SIZE', '32'))
+    STREAM_SCORE_INTERVAL = float(os.getenv('STREAM_SCORE_INTERVAL', '1.0'))
+    
+    # Backends de NLP: se cargan en el primer uso salvo los de NLP_PRELOAD
+    # (lista separada por comas, p. ej. "spacy_en,spacy_es")
+    NLP_PRELOAD = [name.strip() for name in os.getenv('NLP_PRELOAD', '').split(',') if name.strip()]
+    SPACY_MODELS = {
+        'en': os.getenv('SPACY_MODEL_EN', 'en_core_web_sm'),
+        'es': os.getenv('SPACY_MODEL_ES', 'es_core_news_sm'),
+    }
+    
+    # Modo de análisis profundo (spaCy): componentes excluidos al cargar,
+    # procesos de `nlp.pipe`, tamaño de lote y caché de lemas
+    SPACY_EXCLUDE = [name.strip() for name in
+                     os.getenv('SPACY_EXCLUDE', 'ner,entity_linker,entity_ruler,textcat').split(',')
+                     if name.strip()]
+    SPACY_N_PROCESS = int(os.getenv('SPACY_N_PROCESS', '1'))
+    SPACY_BATCH_SIZE = int(os.getenv('SPACY_BATCH_SIZE', '64'))
+    LEMMA_CACHE_SIZE = int(os.getenv('LEMMA_CACHE_SIZE', '50000'))
+    
+    # Presupuesto de arranque en frío de la API (ms), ver `start.py info`
+    STARTUP_BUDGET_MS = int(os.getenv('STARTUP_BUDGET_MS', '1500'))
+    
+    # Histogramas de latencia por etapa expuestos en /api/metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    
+    # Benchmarks: baseline guardada y regresión tolerada (0.25 = 25%)
+    BENCH_BASELINE_PATH = os.getenv('BENCH_BASELINE_PATH', 'tools/bench_baseline.json')
+    BENCH_REGRESSION_THRESHOLD = float(os.getenv('BENCH_REGRESSION_THRESHOLD', '0.25'))
+    
     # Configuración de cache
     CACHE_TIMEOUT = int(os.getenv('CACHE_TIMEOUT', '3600'))  # 1 hora
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '2048'))
+    CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', '')  # vacío = sólo memoria
     
     @classmethod
     def get_language_config(cls, language_code: str) -> LanguageConfig:
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Análisis profundo con spaCy - Tutorium
+Modo opcional del sistema de puntuación: los textos pasan por un pipeline de
+spaCy (sin los componentes que no se usan) en lotes con `nlp.pipe` y se
+buscan errores de concordancia a partir de la morfología y las dependencias.
+
+Los lemas se calculan fuera del pipeline con una caché acotada compartida
+(token, categoría, morfología) -> lema, de modo que los tokens frecuentes no
+se lematizan una y otra vez. La categoría gramatical depende del contexto y
+la asigna siempre el tagger.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from backends import BACKENDS
+from config import SystemConfig
+from tokenizer import WORD_PATTERN
+
+# Componentes que el pipeline no ejecuta: el lematizador se sustituye por la caché
+PIPE_DISABLED = ['lemmatizer']
+
+DEEP_CORRECTIONS = {
+    'en': {
+        'subject_verb': 'Subject and verb must agree in number',
+        'article_number': 'Use "a/an" only with singular nouns',
+    },
+    'es': {
+        'subject_verb': 'El sujeto y el verbo deben concordar en número',
+        'determiner_agreement': 'El determinante debe concordar en género y número con el sustantivo',
+    },
+}
+
+
+class DeepResult(NamedTuple):
+    """Resultado profundo de un texto."""
+    corrections: List[Dict]  # mismo formato que las correcciones regex
+    lemmas: List[str]        # lemas en minúsculas de las palabras, en orden
+
+
+class LemmaCache:
+    """Caché LRU acotada y segura entre hilos: clave de token -> lema."""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, ...], str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, ...]) -> Optional[str]:
+        with self._lock:
+            lemma = self._entries.get(key)
+            if lemma is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return lemma
+
+    def set(self, key: Tuple[str, ...], lemma: str) -> None:
+        with self._lock:
+            self._entries[key] = lemma
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+# Caché de lemas compartida por todos los análisis del proceso
+LEMMA_CACHE = LemmaCache(SystemConfig.LEMMA_CACHE_SIZE)
+
+
+class DeepAnalyzer:
+    """
+    Analizador gramatical sobre spaCy.
+
+    `analyze_many` procesa todos los textos de una vez con
+    `nlp.pipe(n_process=..., batch_size=...)` y retorna, por texto, las
+    correcciones (mismo formato que las reglas regex) y los lemas, que el
+    sistema de puntuación usa para el índice de vocabulario.
+    """
+
+    def __init__(self, n_process: Optional[int] = None, batch_size: Optional[int] = None,
+                 lemma_cache: Optional[LemmaCache] = None):
+        self.n_process = n_process or SystemConfig.SPACY_N_PROCESS
+        self.batch_size = batch_size or SystemConfig.SPACY_BATCH_SIZE
+        self.lemma_cache = lemma_cache if lemma_cache is not None else LEMMA_CACHE
+
+    def nlp(self, language: str):
+        """Pipeline del idioma (se carga en el primer uso, ver `backends`)."""
+        return BACKENDS.get(f'spacy_{language}')
+
+    def lemma(self, token, language: str) -> str:
+        """Lema del token, calculado una sola vez por (texto, POS, morfología)."""
+        key = (language, token.lower_, token.pos_, str(token.morph))
+        lemma = self.lemma_cache.get(key)
+        if lemma is None:
+            lemmatizer = self._lemmatizer(language)
+            lemmas = lemmatizer.lemmatize(token) if lemmatizer is not None else []
+            lemma = lemmas[0] if lemmas else token.lower_
+            self.lemma_cache.set(key, lemma)
+        return lemma
+
+    def _lemmatizer(self, language: str):
+        nlp = self.nlp(language)
+        return nlp.get_pipe('lemmatizer') if 'lemmatizer' in nlp.pipe_names else None
+
+    def analyze_many(self, texts: Iterable[str], language: str) -> List[DeepResult]:
+        """Resultado profundo de cada texto, en el orden de entrada."""
+        nlp = self.nlp(language)
+        disabled = [name for name in PIPE_DISABLED if name in nlp.pipe_names]
+        return [
+            DeepResult(self._doc_corrections(doc, language), self._doc_lemmas(doc, language))
+            for doc in nlp.pipe(texts, n_process=self.n_process,
+                                batch_size=self.batch_size, disable=disabled)
+        ]
+
+    def analyze(self, text: str, language: str) -> DeepResult:
+        return self.analyze_many([text], language)[0]
+
+    def _doc_lemmas(self, doc, language: str) -> List[str]:
+        return [self.lemma(token, language).lower() for token in doc
+                if WORD_PATTERN.fullmatch(token.text)]
+
+    def _doc_corrections(self, doc, language: str) -> List[Dict]:
+        messages = DEEP_CORRECTIONS.get(language, {})
+        corrections = []
+        for token in doc:
+            head = token.head
+            # Concordancia sujeto-verbo
+            if token.dep_ in ('nsubj', 'nsubj:pass') and head.pos_ in ('VERB', 'AUX'):
+                verb = _finite_verb(head)
+                if _subject_verb_mismatch(token, verb, language):
+                    corrections.append(_correction(doc, token, verb,
+                                                   messages.get('subject_verb')))
+            # Concordancia determinante-sustantivo
+            elif token.dep_ == 'det' and head.pos_ == 'NOUN':
+                if language == 'en':
+                    if token.lower_ in ('a', 'an') and head.morph.get('Number') == ['Plur']:
+                        corrections.append(_correction(doc, token, head,
+                                                       messages.get('article_number')))
+                elif _disagree(token, head, 'Gender') or _disagree(token, head, 'Number'):
+                    corrections.append(_correction(doc, token, head,
+                                                   messages.get('determiner_agreement')))
+        return corrections
+
+
+def _finite_verb(head):
+    """El auxiliar conjugado del verbo si lo tiene ("he *are* going"), si no el verbo."""
+    if head.morph.get('VerbForm') == ['Fin']:
+        return head
+    for child in head.children:
+        if child.dep_ in ('aux', 'aux:pass', 'cop') and child.morph.get('VerbForm') == ['Fin']:
+            return child
+    return head
+
+
+def _subject_verb_mismatch(subject, verb, language: str) -> bool:
+    """Sujeto y verbo conjugado en presente no concuerdan."""
+    if language == 'en':
+        # El inglés sólo marca 3.ª persona singular del presente (VBZ frente a VBP)
+        number = subject.morph.get('Number')
+        if subject.pos_ == 'PRON':
+            singular = number == ['Sing'] and subject.morph.get('Person') == ['3']
+            plural = number == ['Plur']
+        else:
+            singular = subject.tag_ in ('NN', 'NNP')
+            plural = subject.tag_ in ('NNS', 'NNPS')
+        return (singular and verb.tag_ == 'VBP') or (plural and verb.tag_ == 'VBZ')
+    return bool(_disagree(subject, verb, 'Number'))
+
+
+def _disagree(first, second, feature: str) -> Optional[bool]:
+    """True/False si ambos tokens tienen el rasgo; None si falta en alguno."""
+    first_value = first.morph.get(feature)
+    second_value = second.morph.get(feature)
+    if not first_value or not second_value:
+        return None
+    return first_value != second_value
+
+
+def _correction(doc, first, second, message: Optional[str]) -> Dict:
+    start = min(first.idx, second.idx)
+    end = max(first.idx + len(first.text), second.idx + len(second.text))
+    return {
+        'type': 'grammar',
+        'error': doc.text[start:end],
+        'correction': message,
+        'position': (start, end),
+    }
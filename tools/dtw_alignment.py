@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Alineamiento DTW para la puntuación de pronunciación - Tutorium
+Alinea la secuencia de rasgos de una grabación (tramas x bandas, ver
+`speech_analysis.spectral_features`) con plantillas de referencia (ver
+`phoneme_templates`) mediante DTW restringido a una banda de Sakoe–Chiba.
+
+La programación dinámica recorre la matriz por antidiagonales: todas las
+celdas de una antidiagonal dependen sólo de las dos anteriores, así que cada
+una se calcula con unas pocas operaciones NumPy sobre la banda en lugar de
+un bucle de Python por celda. Las distancias entre tramas de la banda se
+calculan de una vez antes de recorrerla.
+
+`align_batch` compara una grabación con muchas plantillas: las ordena por una
+cota inferior barata, descarta las que no pueden mejorar la mejor y abandona
+el cálculo en cuanto el coste acumulado de una antidiagonal la supera.
+"""
+
+import math
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import SystemConfig
+
+# Cada cuántas antidiagonales se comprueba si el coste ya supera el límite
+# (el mínimo de la antidiagonal es una operación más por antidiagonal)
+ABANDON_STRIDE = 8
+
+
+class Alignment(NamedTuple):
+    """Resultado de alinear la grabación con una plantilla."""
+    index: int                   # posición de la plantilla en la lista
+    cost: float                  # coste acumulado (inf si se abandonó)
+    normalized_cost: float       # coste / (tramas de la grabación + de la plantilla)
+    path: Optional[np.ndarray]   # pares (i, j) de tramas alineadas, si se pidió
+
+    @property
+    def abandoned(self) -> bool:
+        return math.isinf(self.cost)
+
+
+def cell_distances(query: np.ndarray, template: np.ndarray,
+                   rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """Distancia euclídea entre las tramas `query[rows]` y `template[columns]`."""
+    difference = query[rows] - template[columns]
+    return np.sqrt(np.einsum('ij,ij->i', difference, difference))
+
+
+def _band_distances(query: np.ndarray, template: np.ndarray,
+                    rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """
+    Como `cell_distances` para las celdas de la banda: los productos escalares
+    salen de un único producto de matrices (BLAS), más rápido que restar las
+    tramas celda a celda aunque calcule también los de fuera de la banda.
+    """
+    squared = (np.einsum('ij,ij->i', query, query)[rows]
+               + np.einsum('ij,ij->i', template, template)[columns]
+               - 2 * (query @ template.T)[rows, columns])
+    return np.sqrt(np.maximum(squared, 0))
+
+
+def band_width(n: int, m: int, band_ratio: float) -> int:
+    """
+    Semiancho de la banda en columnas. Nunca es menor que el necesario para
+    que exista un camino entre (1, 1) y (n, m) cuando las longitudes difieren.
+    """
+    if n == 1:
+        return m
+    slope = (m - 1) / (n - 1)
+    return max(1, math.ceil(band_ratio * max(n, m)), math.ceil(slope / 2))
+
+
+def _diagonal_bounds(n: int, m: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Filas [lo, hi] de cada antidiagonal k = i + j (celdas 1..n x 1..m) dentro
+    de la banda |(j - 1) - (i - 1) * (m - 1) / (n - 1)| <= width, calculadas
+    con enteros para que la banda no dependa del redondeo.
+    """
+    k = np.arange(n + m + 1, dtype=np.int64)
+    lo = np.maximum(1, k - m)
+    hi = np.minimum(n, k - 1)
+    a, b = n - 1, m - 1
+    if a:
+        center = (k - 1) * a + b
+        lo = np.maximum(lo, -((width * a - center) // (a + b)))  # techo
+        hi = np.minimum(hi, (center + width * a) // (a + b))
+    return lo, hi
+
+
+def _banded_dtw(query: np.ndarray, template: np.ndarray, width: int, max_cost: float,
+                return_path: bool) -> Tuple[float, Optional[np.ndarray]]:
+    """
+    DTW de las dos secuencias por antidiagonales. Retorna (coste, camino);
+    coste inf si se supera `max_cost`.
+    """
+    n, m = len(query), len(template)
+    lo, hi = _diagonal_bounds(n, m, width)
+    sizes = np.maximum(hi - lo + 1, 0)
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    # Distancias de las celdas de la banda, antidiagonal tras antidiagonal
+    rows = np.repeat(lo, sizes) + np.arange(offsets[-1]) - np.repeat(offsets[:-1], sizes)
+    columns = np.repeat(np.arange(n + m + 1), sizes) - rows
+    band = _band_distances(query, template, rows - 1, columns - 1)
+    accumulated = np.empty_like(band) if return_path else None
+
+    # Diagonal a partir de la cual se comprueba el abandono (ésta y la siguiente)
+    check_from = ABANDON_STRIDE if not math.isinf(max_cost) else n + m + 1
+    if check_from <= n + m:
+        # Coste que le queda como mínimo a un camino que pasa por cada celda:
+        # visitará todas las filas y columnas posteriores
+        row_min = np.full(n, np.inf)
+        column_min = np.full(m, np.inf)
+        np.minimum.at(row_min, rows - 1, band)
+        np.minimum.at(column_min, columns - 1, band)
+        rest_rows = np.concatenate([np.cumsum(row_min[::-1])[::-1], [0.0]])
+        rest_columns = np.concatenate([np.cumsum(column_min[::-1])[::-1], [0.0]])
+        remaining = np.maximum(rest_rows[rows], rest_columns[columns])
+        # Margen para el redondeo: la cota puede igualar al coste exacto
+        limit = max_cost * (1 + 1e-9)
+
+    lo, hi, offsets = lo.tolist(), hi.tolist(), offsets.tolist()
+    # Tres antidiagonales (k, k - 1, k - 2) indexadas por fila 0..n; la fila 0 es el borde
+    diagonals = [np.full(n + 1, np.inf) for _ in range(3)]
+    diagonals[0][0] = 0.0  # D[0, 0]
+    written = [(0, 1), (0, 0), (0, 0)]
+    scratch = np.empty(n + 1)
+    previous_min = 0.0
+
+    for k in range(2, n + m + 1):
+        current = diagonals[k % 3]
+        previous1 = diagonals[(k - 1) % 3]
+        previous2 = diagonals[(k - 2) % 3]
+        old_start, old_stop = written[k % 3]
+        current[old_start:old_stop] = np.inf
+        start, stop = lo[k], hi[k] + 1
+        written[k % 3] = (start, stop)
+        if start >= stop:
+            current_min = math.inf
+        else:
+            best = scratch[:stop - start]
+            np.minimum(previous1[start - 1:stop - 1], previous1[start:stop], out=best)
+            np.minimum(best, previous2[start - 1:stop - 1], out=best)
+            np.add(best, band[offsets[k]:offsets[k + 1]], out=current[start:stop])
+            if accumulated is not None:
+                accumulated[offsets[k]:offsets[k + 1]] = current[start:stop]
+            if check_from <= k:
+                np.add(current[start:stop], remaining[offsets[k]:offsets[k + 1]], out=best)
+                current_min = best.min()
+            else:
+                current_min = 0.0
+        # Todo camino pasa por la antidiagonal k o por la k - 1
+        if k == check_from + 1:
+            if min(current_min, previous_min) > limit:
+                return math.inf, None
+            check_from += ABANDON_STRIDE
+        previous_min = current_min
+
+    cost = float(diagonals[(n + m) % 3][n])
+    if cost > max_cost or math.isinf(cost):
+        return math.inf, None
+    if accumulated is None:
+        return cost, None
+    return cost, _backtrack(accumulated, lo, hi, offsets, n, m)
+
+
+def _backtrack(accumulated: np.ndarray, lo: List[int], hi: List[int],
+               offsets: List[int], n: int, m: int) -> np.ndarray:
+    """Camino óptimo desde (n, m) hasta (1, 1), en índices de trama 0-based."""
+    def value(cell: Tuple[int, int]) -> float:
+        i, j = cell
+        k = i + j
+        if i < 1 or j < 1 or not lo[k] <= i <= hi[k]:
+            return math.inf
+        return accumulated[offsets[k] + i - lo[k]]
+
+    i, j = n, m
+    path = [(i - 1, j - 1)]
+    while (i, j) != (1, 1):
+        i, j = min(((i - 1, j - 1), (i - 1, j), (i, j - 1)), key=value)
+        path.append((i - 1, j - 1))
+    return np.array(path[::-1], dtype=np.int64)
+
+
+def _straight_path(n: int, m: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Celdas (0-based) del camino que avanza en línea recta de (1, 1) a (n, m).
+    Es un camino válido dentro de la banda, así que su coste acota el óptimo.
+    """
+    steps = max(n, m)
+    position = np.arange(steps)
+    scale = 2 * max(steps - 1, 1)
+    # Redondeo al más cercano: se separa de la diagonal como mucho media pendiente
+    rows = (2 * position * (n - 1) + scale // 2) // scale
+    columns = (2 * position * (m - 1) + scale // 2) // scale
+    return rows, columns
+
+
+def _as_features(sequence: np.ndarray) -> np.ndarray:
+    return np.asarray(sequence, dtype=np.float64)
+
+
+def align(query: np.ndarray, template: np.ndarray, band_ratio: Optional[float] = None,
+          max_cost: float = math.inf, return_path: bool = False) -> Alignment:
+    """Alinea una grabación con una plantilla."""
+    return _align(0, _as_features(query), _as_features(template), band_ratio,
+                  max_cost, return_path)
+
+
+def _align(index: int, query: np.ndarray, template: np.ndarray, band_ratio: Optional[float],
+           max_cost: float, return_path: bool) -> Alignment:
+    n, m = len(query), len(template)
+    if not n or not m:
+        return Alignment(index, math.inf, math.inf, None)
+    ratio = SystemConfig.DTW_BAND_RATIO if band_ratio is None else band_ratio
+    cost, path = _banded_dtw(query, template, band_width(n, m, ratio), max_cost, return_path)
+    return Alignment(index, cost, cost / (n + m), path)
+
+
+def align_batch(query: np.ndarray, templates: Sequence[np.ndarray],
+                band_ratio: Optional[float] = None,
+                return_path: bool = False) -> List[Alignment]:
+    """
+    Alinea la grabación con cada plantilla y retorna los resultados en el
+    orden de `templates`. Sólo el de menor coste normalizado es exacto: las
+    plantillas que no pueden mejorarlo quedan abandonadas (coste inf).
+    """
+    results: List[Alignment] = [Alignment(index, math.inf, math.inf, None)
+                                for index in range(len(templates))]
+    query = _as_features(query)
+    templates = [_as_features(template) for template in templates]
+    n = len(query)
+    if not n:
+        return results
+
+    # Cotas del coste normalizado de cada plantilla: inferior, la primera y la
+    # última celda (están en todo camino); superior, el camino recto
+    candidates = []
+    for index, template in enumerate(templates):
+        m = len(template)
+        if not m:
+            continue
+        rows, columns = _straight_path(n, m)
+        straight = cell_distances(query, template, rows, columns)
+        first_last = straight[0] + (straight[-1] if len(straight) > 1 else 0.0)
+        candidates.append((straight.sum() / (n + m), first_last / (n + m), index))
+    if not candidates:
+        return results
+
+    # Las más prometedoras primero; la mejor cota superior ya limita el coste
+    candidates.sort()
+    best = candidates[0][0]
+    best_index = None
+    for _, lower_bound, index in candidates:
+        if lower_bound > best:
+            continue
+        template = templates[index]
+        result = _align(index, query, template, band_ratio, best * (n + len(template)), False)
+        if not result.abandoned and (best_index is None or result.normalized_cost < best):
+            best = result.normalized_cost
+            best_index = index
+        results[index] = result
+
+    if return_path and best_index is not None:
+        results[best_index] = _align(best_index, query, templates[best_index], band_ratio,
+                                     math.inf, True)
+    return results
+
+
+def best_alignment(query: np.ndarray, templates: Sequence[np.ndarray],
+                   band_ratio: Optional[float] = None,
+                   return_path: bool = False) -> Optional[Alignment]:
+    """La plantilla más parecida a la grabación, o None si no hay ninguna."""
+    results = [result for result in align_batch(query, templates, band_ratio, return_path)
+               if not result.abandoned]
+    return min(results, key=lambda result: result.normalized_cost) if results else None
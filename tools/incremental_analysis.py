@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Análisis incremental por oraciones - Tutorium
+Para la corrección en vivo mientras el estudiante escribe: el texto se divide
+en oraciones, los hallazgos de cada oración se guardan por el hash de su
+texto y sólo se analizan las oraciones nuevas o editadas. Las posiciones de
+las coincidencias guardadas se desplazan al offset actual de la oración y
+las puntuaciones de documento (unicidad del vocabulario, número de
+oraciones) salen de contadores que se actualizan con la diferencia entre la
+versión anterior del texto y la nueva.
+
+El resultado es idéntico al de `LanguageScoringSystem.analyze_text`. Si
+alguna regla o frase del idioma puede atravesar un separador de oración
+(`RuleEngine.sentence_local` es False) se analiza el texto completo.
+"""
+
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import SystemConfig
+from rule_engine import RuleEngine, RuleMatch
+from tokenizer import TokenStream
+
+# Fin de oración: separadores seguidos de espacio. El espacio queda al
+# principio de la oración siguiente, de modo que ninguna palabra (según
+# `split()`) ni ninguna racha de separadores queda partida entre dos oraciones
+SEGMENT_END = re.compile(r'[.!?]+(?=\s)')
+
+
+def split_segments(text: str) -> List[Tuple[int, str]]:
+    """(offset, texto) de cada oración; concatenadas reproducen `text`."""
+    segments = []
+    start = 0
+    for match in SEGMENT_END.finditer(text):
+        segments.append((start, text[start:match.end()]))
+        start = match.end()
+    segments.append((start, text[start:]))
+    return segments
+
+
+def segment_digest(segment: str) -> bytes:
+    """Hash del texto de una oración (clave de la caché)."""
+    return hashlib.blake2b(segment.encode('utf-8'), digest_size=16).digest()
+
+
+class Segment:
+    """Hallazgos y contadores de una oración, con posiciones relativas a ella."""
+
+    __slots__ = ('matches', 'words', 'terms', 'boundaries', 'weighted_hits')
+
+    def __init__(self, matches: List[RuleMatch], words: List[str], terms: List[str],
+                 boundaries: int, weighted_hits: int):
+        self.matches = matches
+        self.words = words
+        self.terms = terms
+        self.boundaries = boundaries
+        self.weighted_hits = weighted_hits
+
+
+def analyze_segment(scorer, language: str, piece: str) -> Segment:
+    """Escanea y tokeniza una oración suelta."""
+    tokens = TokenStream(piece)
+    matches = scorer._scan_rules(piece, language, tokens)
+    terms = tokens.terms
+    return Segment(
+        matches, tokens.words, terms, len(tokens.sentence_boundaries),
+        scorer.vocabulary_indexes[language].weighted_hits(terms)
+    )
+
+
+class SegmentCache:
+    """Caché LRU acotada y segura entre hilos: (idioma, versión, hash) -> Segment."""
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[str, str, bytes], Segment]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str, bytes]) -> Optional[Segment]:
+        with self._lock:
+            segment = self._entries.get(key)
+            if segment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return segment
+
+    def set(self, key: Tuple[str, str, bytes], segment: Segment) -> None:
+        with self._lock:
+            self._entries[key] = segment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+class IncrementalAnalyzer:
+    """
+    Estado de un documento que se edita: las oraciones de la última versión
+    y los contadores de documento derivados de ellas.
+
+    `analyze(text)` acepta cada nueva versión completa del texto y retorna
+    el mismo análisis que `analyze_text`; `last_stats` indica cuántas
+    oraciones tenía y cuántas hubo que analizar.
+    """
+
+    def __init__(self, scorer, language: str = 'en',
+                 segment_cache: Optional[SegmentCache] = None):
+        if language not in scorer.supported_languages:
+            raise ValueError(f"Language {language} not supported")
+        self.scorer = scorer
+        self.language = language
+        self.segment_cache = segment_cache if segment_cache is not None else \
+            SegmentCache(SystemConfig.INCREMENTAL_SEGMENT_CACHE_SIZE)
+        self.last_stats: Dict[str, int] = {'segments': 0, 'reanalyzed': 0}
+        self._lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, version: Optional[str]) -> None:
+        """Vacía el estado del documento (p. ej. si cambian las reglas)."""
+        self._version = version
+        self._keys: Counter = Counter()
+        self._segments: Dict[bytes, Segment] = {}
+        self._word_counts: Counter = Counter()
+        self._word_total = 0
+        self._unique_length = 0
+        self._boundaries = 0
+        self._weighted_hits = 0
+
+    def analyze(self, text: str) -> Dict:
+        """Analiza la nueva versión del texto reutilizando las oraciones sin cambios."""
+        with self._lock:
+            version = self.scorer._cache_version()
+            if version != self._version:
+                self._reset(version)
+
+            engine = self.scorer.rule_engines.get(self.language)
+            if engine is None or not engine.sentence_local:
+                self.last_stats = {'segments': 1, 'reanalyzed': 1}
+                return self.scorer.analyze_text(text, self.language)
+
+            pieces = split_segments(text)
+            keys = []
+            segments = {}
+            reanalyzed = 0
+            for _, piece in pieces:
+                key = segment_digest(piece)
+                keys.append(key)
+                if key in segments:
+                    continue
+                segment = self._segments.get(key)
+                if segment is None:
+                    cache_key = (self.language, version, key)
+                    segment = self.segment_cache.get(cache_key)
+                    if segment is None:
+                        segment = self._analyze_segment(piece)
+                        self.segment_cache.set(cache_key, segment)
+                        reanalyzed += 1
+                segments[key] = segment
+
+            self._update_counters(Counter(keys), segments)
+            self.last_stats = {'segments': len(pieces), 'reanalyzed': reanalyzed}
+            return self._build_analysis(pieces, keys, engine)
+
+    def _analyze_segment(self, piece: str) -> Segment:
+        return analyze_segment(self.scorer, self.language, piece)
+
+    def _update_counters(self, keys: Counter, segments: Dict[bytes, Segment]) -> None:
+        """Aplica a los contadores las oraciones que salen y las que entran."""
+        for key, times in (self._keys - keys).items():
+            self._apply(self._segments[key], -times)
+        for key, times in (keys - self._keys).items():
+            self._apply(segments[key], times)
+        self._keys = keys
+        self._segments = segments
+
+    def _apply(self, segment: Segment, times: int) -> None:
+        """Suma (`times` > 0) o resta (`times` < 0) una oración a los contadores."""
+        self._word_total += len(segment.words) * times
+        self._boundaries += segment.boundaries * times
+        self._weighted_hits += segment.weighted_hits * times
+        word_counts = self._word_counts
+        for word in segment.words:
+            before = word_counts[word]
+            after = before + times
+            if after > 0:
+                word_counts[word] = after
+            else:
+                del word_counts[word]
+            if before == 0:
+                self._unique_length += len(word)
+            elif after == 0:
+                self._unique_length -= len(word)
+
+    def _document_weighted_hits(self, keys: List[bytes]) -> int:
+        """
+        Aciertos de nivel del documento. Es la suma por oración salvo que una
+        expresión del índice cruce de una oración a otra, caso en el que se
+        recuenta la secuencia completa.
+        """
+        index = self.scorer.vocabulary_indexes[self.language]
+        reach = index.max_phrase_words - 1
+        tail: List[str] = []
+        for key in keys:
+            terms = self._segments[key].terms
+            if not terms:
+                continue
+            if tail and index.crosses(tail, terms):
+                return index.weighted_hits(
+                    [term for other in keys for term in self._segments[other].terms])
+            tail = (tail + terms)[-reach:] if reach else []
+        return self._weighted_hits
+
+    def _build_analysis(self, pieces: List[Tuple[int, str]], keys: List[bytes],
+                        engine: RuleEngine) -> Dict:
+        """Ensambla el análisis de documento con las posiciones desplazadas."""
+        rule_matches: List[RuleMatch] = []
+        phrase_matches: List[RuleMatch] = []
+        for (offset, _), key in zip(pieces, keys):
+            for match in self._segments[key].matches:
+                shifted = match._replace(start=match.start + offset, end=match.end + offset)
+                if match.kind == engine.PHRASE_KIND:
+                    phrase_matches.append(shifted)
+                else:
+                    rule_matches.append(shifted)
+        # Mismo orden que `RuleEngine.scan`: categoría, regla y posición
+        kind_order = {kind: n for n, kind in enumerate(engine.KINDS)}
+        rule_matches.sort(key=lambda m: (kind_order[m.kind], m.rule_index, m.start))
+        matches = rule_matches + phrase_matches
+
+        scorer = self.scorer
+        corrections = scorer._grammar_corrections(matches, self.language)
+        suggestions = scorer._syntax_suggestions(matches, self.language)
+        scores = {
+            'grammar': scorer._grammar_score(len(corrections), self._word_total),
+            'syntax': scorer._syntax_score(self._boundaries + 1, len(suggestions)),
+            'vocabulary': scorer._vocabulary_score(
+                self._word_total, len(self._word_counts), self._unique_length,
+                self._document_weighted_hits(keys)),
+            'pronunciation': 85,  # Placeholder para audio
+        }
+        return {
+            'language': self.language,
+            'timestamp': datetime.utcnow().isoformat(),
+            'text_length': self._word_total,
+            'scores': scores,
+            'corrections': corrections,
+            'suggestions': suggestions,
+            'overall_score': scorer._calculate_overall_score(scores),
+        }
+
+
+class IncrementalSessions:
+    """
+    Analizadores incrementales por sesión de edición (LRU acotado). Todas las
+    sesiones comparten la caché de oraciones.
+    """
+
+    def __init__(self, scorer, max_sessions: Optional[int] = None,
+                 segment_cache: Optional[SegmentCache] = None):
+        self.scorer = scorer
+        self.max_sessions = max_sessions or SystemConfig.INCREMENTAL_MAX_SESSIONS
+        self.segment_cache = segment_cache if segment_cache is not None else \
+            SegmentCache(SystemConfig.INCREMENTAL_SEGMENT_CACHE_SIZE)
+        self._sessions: 'OrderedDict[Tuple[str, str], IncrementalAnalyzer]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str, language: str) -> IncrementalAnalyzer:
+        """
+        Analizador de la sesión. Se crea si no existe o si `scorer` ha
+        cambiado (recarga de reglas): la sesión sigue con las reglas nuevas.
+        """
+        key = (session_id, language)
+        with self._lock:
+            analyzer = self._sessions.get(key)
+            if analyzer is None or analyzer.scorer is not self.scorer:
+                analyzer = IncrementalAnalyzer(self.scorer, language, self.segment_cache)
+                self._sessions[key] = analyzer
+            self._sessions.move_to_end(key)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return analyzer
+
+    def discard(self, session_id: str) -> None:
+        """Olvida el estado de una sesión (todos sus idiomas)."""
+        with self._lock:
+            for key in [key for key in self._sessions if key[0] == session_id]:
+                del self._sessions[key]
+
+    def __len__(self) -> int:
+        return len(self._sessions)
@@ -4,16 +4,34 @@ API Backend para el Sistema de Puntuación de Idiomas - Tutorium
 Endpoint para análisis de texto y puntuación de habilidades lingüísticas.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
+import argparse
+import json
+import math
 import sys
 import os
+import time
 
 # Agregar el directorio tools al path para importar el sistema de puntuación
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tools'))
 
 try:
     from language_scoring_system import LanguageScoringSystem
+    from analysis_cache import AnalysisCache
+    from analysis_store import AnalysisStore
+    from progress_accumulator import SKILLS
+    from worker_pool import PoolBusyError, create_pool
+    from metrics import REGISTRY, REQUEST_METRIC
+    from backends import BACKENDS, BackendUnavailableError
+    from language_detector import AUTO_LANGUAGE, detect_language
+    from incremental_analysis import IncrementalSessions
+    from long_document import analyze_document
+    from speech_analysis import AudioFormatError, analyze_audio
+    from phoneme_templates import get_template_index
+    from wire_format import JSON, negotiate
+    from rule_snapshot import RuleSetManager, admin_error
+    from config import SystemConfig
 except ImportError:
     print("Error: No se pudo importar el sistema de puntuación")
     print("Asegúrate de que language_scoring_system.py esté en la carpeta tools/")
@@ -22,8 +40,158 @@ except ImportError:
 app = Flask(__name__)
 CORS(app)  # Permitir requests desde el frontend
 
+# Caché de resultados compartida (memoria + SQLite opcional)
+analysis_cache = AnalysisCache(
+    max_entries=SystemConfig.CACHE_MAX_ENTRIES,
+    ttl=SystemConfig.CACHE_TIMEOUT,
+    db_path=SystemConfig.CACHE_DB_PATH or None
+)
+
 # Instancia global del sistema de puntuación
-scorer = LanguageScoringSystem()
+scorer = LanguageScoringSystem(cache=analysis_cache)
+
+# Persistencia de análisis y agregados de progreso
+analysis_store = AnalysisStore(SystemConfig.DATABASE_URL)
+
+# Pool de procesos de puntuación (sólo en modo producción, ver main())
+scoring_pool = None
+
+# Estado por sesión del análisis incremental (escritura en vivo)
+incremental_sessions = IncrementalSessions(scorer)
+
+
+def install_scorer(new_scorer):
+    """
+    Instala el sistema de puntuación de una carga o recarga de reglas. Las
+    peticiones en curso conservan la referencia al anterior.
+    """
+    global scorer
+    scorer = new_scorer
+    incremental_sessions.scorer = new_scorer
+    if scoring_pool is not None:
+        scoring_pool.snapshot = rule_sets.worker_snapshot()
+
+
+# Reglas activas: instantánea precompilada (RULE_SNAPSHOT) o las del código;
+# la API está lista cuando se han cargado y calentado (ver main())
+rule_sets = RuleSetManager(SystemConfig.RULE_SNAPSHOT, cache=analysis_cache,
+                           scorer=scorer, on_swap=install_scorer)
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    """Histograma por ruta; en respuestas en streaming se mide hasta el cierre."""
+    started = g.get('request_started')
+    if started is not None:
+        labels = (request.url_rule.rule if request.url_rule else 'unmatched',
+                  request.method, str(response.status_code))
+        record = lambda: REGISTRY.observe(REQUEST_METRIC, labels, time.perf_counter() - started)
+        if response.is_streamed:
+            response.call_on_close(record)
+        else:
+            record()
+    return response
+
+
+def busy_response():
+    """Respuesta 503 cuando la cola del pool está llena."""
+    return jsonify({'error': 'Server busy, please retry later'}), 503, {
+        'Retry-After': str(SystemConfig.API_RETRY_AFTER)
+    }
+
+
+def wire_response(payload, status=200):
+    """
+    Respuesta de análisis en el formato que pide `Accept`: JSON detallado
+    (por defecto) o compacto por columnas en JSON o MessagePack.
+    """
+    wire_format = negotiate(request.headers.get('Accept'))
+    if wire_format is JSON:
+        response = jsonify(payload)
+    else:
+        response = Response(wire_format.encode(payload), mimetype=wire_format.media_type)
+    response.headers['Vary'] = 'Accept'
+    return response, status
+
+
+def result_response(wire_format, result, extra):
+    """Respuesta compacta construida desde un `AnalysisResult` (ver wire_format)."""
+    response = Response(wire_format.encode_result(result, extra),
+                        mimetype=wire_format.media_type)
+    response.headers['Vary'] = 'Accept'
+    return response, 200
+
+
+def deep_unavailable_response():
+    """Respuesta 501 cuando el modo profundo no tiene spaCy o su modelo."""
+    return jsonify({'error': 'Deep analysis mode is not available on this server'}), 501
+
+
+def run_analysis(text, language, deep=False):
+    """Analiza un texto en el pool si está activo o en este proceso."""
+    if scoring_pool is None:
+        return scorer.analyze_text(text, language, deep)
+    scoring_pool.acquire()
+    try:
+        return scoring_pool.analyze_text(text, language, deep)
+    finally:
+        scoring_pool.release()
+
+
+def run_analysis_result(text, language):
+    """Como `run_analysis` (sin modo profundo) pero retorna un `AnalysisResult`."""
+    if scoring_pool is None:
+        return scorer.analyze(text, language)
+    engine = scorer.rule_engines.get(language)
+    scoring_pool.acquire()
+    try:
+        return scoring_pool.analyze(text, language).bind_engine(engine)
+    finally:
+        scoring_pool.release()
+
+
+def run_batch_analysis(texts, language, deep=False):
+    """Analiza un bloque de textos en el pool si está activo o en este proceso."""
+    if scoring_pool is None:
+        return scorer.analyze_batch(texts, language, deep)
+    return scoring_pool.analyze_batch(texts, language, deep)
+
+
+def run_document_analysis(text, language):
+    """
+    Analiza un documento largo por fragmentos: en el pool, repartidos entre
+    sus procesos, o en este proceso. Retorna (`AnalysisResult`, fragmentos).
+    """
+    current = scorer
+    if scoring_pool is None:
+        return analyze_document(current, text, language)
+    scoring_pool.acquire()
+    try:
+        return scoring_pool.analyze_document(current, text, language)
+    finally:
+        scoring_pool.release()
+
+
+def resolve_language(text):
+    """Detecta el idioma de `text`; retorna (idioma, dict para la respuesta)."""
+    started = time.perf_counter()
+    detection = detect_language(text)
+    REGISTRY.observe_stage('detect_language', detection.language, len(text),
+                           time.perf_counter() - started)
+    return detection.language, {'language': detection.language,
+                                'confidence': detection.confidence}
+
+def parse_mode(data):
+    """Retorna (deep, error) a partir del campo opcional `mode`."""
+    mode = data.get('mode', 'regex')
+    if mode not in ('regex', 'deep'):
+        return False, 'Mode must be "regex" or "deep"'
+    return mode == 'deep', None
 
 @app.route('/api/analyze-language', methods=['POST'])
 def analyze_language():
@@ -33,9 +201,13 @@ def analyze_language():
     Request body:
     {
         "text": "The text to analyze",
-        "language": "en" | "es"
+        "language": "en" | "es" | "auto",
+        "mode": "regex" | "deep"   (opcional, "deep" usa spaCy)
     }
     
+    Con "auto" el idioma se detecta por trigramas y la respuesta incluye
+    "detected_language": {"language": "es", "confidence": 0.15}.
+    
     Response:
     {
         "scores": {
@@ -59,9 +231,13 @@ def analyze_language():
             "Practice with more complex sentences"
         ]
     }
+    
+    Con `Accept: application/vnd.tutorium.compact+json` (o `+msgpack`) la
+    respuesta usa el formato compacto por columnas (ver wire_format.py).
     """
     try:
         # Validar request
+        parse_started = time.perf_counter()
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
@@ -72,27 +248,387 @@ def analyze_language():
         if not text:
             return jsonify({'error': 'Text is required'}), 400
         
-        if language not in ['en', 'es']:
-            return jsonify({'error': 'Language must be "en" or "es"'}), 400
+        if language not in ['en', 'es', AUTO_LANGUAGE]:
+            return jsonify({'error': 'Language must be "en", "es" or "auto"'}), 400
+        
+        deep, mode_error = parse_mode(data)
+        if mode_error:
+            return jsonify({'error': mode_error}), 400
+        
+        REGISTRY.observe_stage('parse_json', language, len(text),
+                               time.perf_counter() - parse_started)
+        
+        detection = None
+        if language == AUTO_LANGUAGE:
+            language, detection = resolve_language(text)
+        
+        # Las respuestas compactas salen de la tabla de coincidencias sin
+        # materializar un diccionario por corrección
+        wire_format = negotiate(request.headers.get('Accept'))
+        if wire_format.compact and not deep:
+            result = run_analysis_result(text, language)
+            extra = {} if detection is None else {'detected_language': detection}
+            advice_started = time.perf_counter()
+            extra['advice'] = scorer.get_improvement_advice(
+                {'language': result.language, 'scores': result.scores})
+            REGISTRY.observe_stage('advice', language, len(text),
+                                   time.perf_counter() - advice_started)
+            return result_response(wire_format, result, extra)
         
         # Analizar el texto
-        analysis = scorer.analyze_text(text, language)
+        analysis = run_analysis(text, language, deep)
+        if detection is not None:
+            analysis['detected_language'] = detection
         
         # Generar consejos de mejora
+        advice_started = time.perf_counter()
         advice = scorer.get_improvement_advice(analysis)
         analysis['advice'] = advice
+        REGISTRY.observe_stage('advice', language, len(text),
+                               time.perf_counter() - advice_started)
         
         # Limpiar datos sensibles del timestamp
         if 'timestamp' in analysis:
             del analysis['timestamp']
         
-        return jsonify(analysis), 200
+        return wire_response(analysis)
         
+    except PoolBusyError:
+        return busy_response()
+    except BackendUnavailableError:
+        return deep_unavailable_response()
     except Exception as e:
         app.logger.error(f"Error analyzing language: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
 
+@app.route('/api/analyze-language/batch', methods=['POST'])
+def analyze_language_batch():
+    """
+    Endpoint para analizar un lote de textos (p. ej. una clase completa).
+    
+    Request body:
+    {
+        "texts": ["First text", "Second text", ...],
+        "language": "en" | "es" | "auto",
+        "mode": "regex" | "deep"
+    }
+    
+    Con "auto" el idioma se detecta por separado en cada texto.
+    
+    Response (application/x-ndjson, una línea por texto en el orden de entrada):
+    {"index": 0, "analysis": {... mismo formato que /api/analyze-language ...}}
+    {"index": 1, "error": "Text is required"}
+    
+    Con `Accept` compacto cada análisis va en formato compacto: líneas JSON
+    (application/vnd.tutorium.compact+ndjson) u objetos MessagePack seguidos.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'No JSON data provided'}), 400
+    
+    texts = data.get('texts')
+    language = data.get('language', 'en')
+    
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'error': 'texts must be a non-empty list'}), 400
+    
+    if len(texts) > SystemConfig.MAX_BATCH_SIZE:
+        return jsonify({
+            'error': f'Batch size must not exceed {SystemConfig.MAX_BATCH_SIZE} texts'
+        }), 400
+    
+    if language not in ['en', 'es', AUTO_LANGUAGE]:
+        return jsonify({'error': 'Language must be "en", "es" or "auto"'}), 400
+    
+    deep, mode_error = parse_mode(data)
+    if mode_error:
+        return jsonify({'error': mode_error}), 400
+    languages = ['en', 'es'] if language == AUTO_LANGUAGE else [language]
+    if deep and not all(BACKENDS.is_available(f'spacy_{name}') for name in languages):
+        return deep_unavailable_response()
+    
+    # El lote completo ocupa un hueco del pool mientras se transmite
+    if scoring_pool is not None:
+        try:
+            scoring_pool.acquire()
+        except PoolBusyError:
+            return busy_response()
+    
+    wire_format = negotiate(request.headers.get('Accept'))
+    
+    def generate():
+        chunk_size = max(1, SystemConfig.BATCH_CHUNK_SIZE)
+        for offset in range(0, len(texts), chunk_size):
+            chunk = texts[offset:offset + chunk_size]
+            for index, item in _analyze_batch_chunk(chunk, language, offset, deep):
+                if wire_format is JSON:
+                    yield json.dumps(item) + '\n'
+                else:
+                    yield wire_format.encode_item(item)
+    
+    response = Response(generate(), mimetype=wire_format.stream_media_type)
+    response.headers['Vary'] = 'Accept'
+    if scoring_pool is not None:
+        response.call_on_close(scoring_pool.release)
+    return response, 200
+
+
+def _validate_batch_text(text):
+    """Retorna el mensaje de error de un texto del lote, o None si es válido."""
+    if not isinstance(text, str) or not text.strip():
+        return 'Text is required'
+    if len(text) > SystemConfig.MAX_TEXT_LENGTH:
+        return f'Text exceeds {SystemConfig.MAX_TEXT_LENGTH} characters'
+    return None
+
+
+def _is_score(value):
+    """True si `value` es una puntuación numérica finita (no booleana)."""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value))
+
+
+def _validate_saved_analysis(analysis):
+    """Retorna el mensaje de error de un análisis a guardar, o None si es válido."""
+    if not isinstance(analysis, dict) or not isinstance(analysis.get('scores'), dict):
+        return 'analysis must include a scores object'
+    scores = analysis['scores']
+    for skill in SKILLS:
+        if scores.get(skill) is not None and not _is_score(scores[skill]):
+            return f'scores.{skill} must be a number'
+    if analysis.get('overall_score') is not None and not _is_score(analysis['overall_score']):
+        return 'overall_score must be a number'
+    return None
+
+
+def _finish_analysis(analysis):
+    """Añade consejos y retira el timestamp, igual que el endpoint individual."""
+    analysis['advice'] = scorer.get_improvement_advice(analysis)
+    analysis.pop('timestamp', None)
+    return analysis
+
+
+def _analyze_batch_chunk(chunk, language, offset, deep=False):
+    """Analiza un bloque del lote y genera (índice, resultado) en orden."""
+    items = {}
+    # Con "auto" cada texto va al grupo de su idioma detectado
+    groups = {}
+    detections = {}
+    for position, text in enumerate(chunk, start=offset):
+        error = _validate_batch_text(text)
+        if error:
+            items[position] = {'index': position, 'error': error}
+            continue
+        text = text.strip()
+        text_language = language
+        if language == AUTO_LANGUAGE:
+            text_language, detections[position] = resolve_language(text)
+        groups.setdefault(text_language, []).append((position, text))
+    
+    for text_language, valid in groups.items():
+        _analyze_batch_group(valid, text_language, deep, items)
+    
+    for position, detection in detections.items():
+        if 'analysis' in items[position]:
+            items[position]['analysis']['detected_language'] = detection
+    
+    for position in range(offset, offset + len(chunk)):
+        yield position, items[position]
+
+
+def _analyze_batch_group(valid, language, deep, items):
+    """Analiza los textos (posición, texto) de un mismo idioma y rellena `items`."""
+    try:
+        analyses = run_batch_analysis([text for _, text in valid], language, deep)
+        for (position, _), analysis in zip(valid, analyses):
+            items[position] = {'index': position, 'analysis': _finish_analysis(analysis)}
+    except Exception as e:
+        # Aislar el texto problemático sin hacer fallar el resto del lote
+        app.logger.error(f"Error analyzing batch chunk: {str(e)}")
+        for position, text in valid:
+            try:
+                analysis = run_batch_analysis([text], language, deep)[0]
+                items[position] = {'index': position, 'analysis': _finish_analysis(analysis)}
+            except Exception as item_error:
+                app.logger.error(f"Error analyzing batch item {position}: {str(item_error)}")
+                items[position] = {'index': position, 'error': 'Internal server error'}
+
+
+@app.route('/api/analyze-language/incremental', methods=['POST'])
+def analyze_language_incremental():
+    """
+    Endpoint para la corrección en vivo: el cliente envía el texto completo
+    en cada edición y sólo se vuelven a analizar las oraciones que cambiaron.
+    
+    Request body:
+    {
+        "text": "The text being edited",
+        "language": "en" | "es",
+        "session_id": "identificador del documento que se edita"
+    }
+    
+    Response: mismo formato que /api/analyze-language más
+    "incremental": {"segments": 12, "reanalyzed": 1}
+    
+    El análisis se hace en este proceso (no en el pool): el estado de la
+    sesión vive aquí y cada petición sólo analiza unas pocas oraciones.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'No JSON data provided'}), 400
+    
+    text = data.get('text', '')
+    language = data.get('language', 'en')
+    session_id = data.get('session_id')
+    
+    if not isinstance(text, str) or not text.strip():
+        return jsonify({'error': 'Text is required'}), 400
+    if len(text) > SystemConfig.MAX_TEXT_LENGTH:
+        return jsonify({'error': f'Text exceeds {SystemConfig.MAX_TEXT_LENGTH} characters'}), 400
+    if language not in ['en', 'es']:
+        return jsonify({'error': 'Language must be "en" or "es"'}), 400
+    if not isinstance(session_id, str) or not session_id:
+        return jsonify({'error': 'session_id is required'}), 400
+    
+    try:
+        started = time.perf_counter()
+        analyzer = incremental_sessions.get(session_id, language)
+        analysis = analyzer.analyze(text)
+        REGISTRY.observe_stage('incremental', language, len(text),
+                               time.perf_counter() - started)
+        analysis = _finish_analysis(analysis)
+        analysis['incremental'] = dict(analyzer.last_stats)
+        return wire_response(analysis)
+    except Exception as e:
+        app.logger.error(f"Error in incremental analysis: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@app.route('/api/analyze-language/document', methods=['POST'])
+def analyze_language_document():
+    """
+    Endpoint para documentos largos (hasta LONG_DOCUMENT_MAX_LENGTH
+    caracteres): el texto se corta en fragmentos de oraciones completas que
+    se analizan en paralelo y se combinan con las posiciones del documento.
+    
+    Request body:
+    {
+        "text": "A long essay...",
+        "language": "en" | "es"
+    }
+    
+    Response: mismo formato que /api/analyze-language más
+    "document": {"characters": 120000, "shards": 24}
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'No JSON data provided'}), 400
+    
+    text = data.get('text', '')
+    language = data.get('language', 'en')
+    
+    if not isinstance(text, str) or not text.strip():
+        return jsonify({'error': 'Text is required'}), 400
+    if len(text) > SystemConfig.LONG_DOCUMENT_MAX_LENGTH:
+        return jsonify({'error': f'Text exceeds {SystemConfig.LONG_DOCUMENT_MAX_LENGTH} characters'}), 400
+    if language not in ['en', 'es']:
+        return jsonify({'error': 'Language must be "en" or "es"'}), 400
+    
+    try:
+        started = time.perf_counter()
+        result, shards = run_document_analysis(text, language)
+        REGISTRY.observe_stage('long_document', language, len(text),
+                               time.perf_counter() - started)
+        document = {'characters': len(text), 'shards': shards}
+        wire_format = negotiate(request.headers.get('Accept'))
+        if wire_format.compact:
+            advice = scorer.get_improvement_advice(
+                {'language': result.language, 'scores': result.scores})
+            return result_response(wire_format, result, {'advice': advice, 'document': document})
+        analysis = _finish_analysis(result.to_dict())
+        analysis['document'] = document
+        return wire_response(analysis)
+    except PoolBusyError:
+        return busy_response()
+    except Exception as e:
+        app.logger.error(f"Error in document analysis: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+
+@app.route('/api/analyze-speech', methods=['POST'])
+def analyze_speech():
+    """
+    Endpoint para puntuar la pronunciación a partir de una grabación.
+    
+    Request (multipart/form-data):
+        audio: archivo WAV (PCM) o FLAC, hasta MAX_FILE_SIZE bytes
+        text: transcripción de lo dicho (opcional)
+        language: "en" | "es"
+    
+    Response: con `text`, el mismo formato que /api/analyze-language con la
+    pronunciación medida en la grabación; sin `text`, sólo esa puntuación.
+    En ambos casos "speech" incluye los rasgos de la grabación:
+    {"duration": 6.0, "speech_duration": 3.4, "pause_count": 1, ...}
+    """
+    # Rechazar antes de que se lea el cuerpo
+    if request.content_length is not None and request.content_length > SystemConfig.MAX_FILE_SIZE:
+        return jsonify({
+            'error': f'Audio file exceeds {SystemConfig.MAX_FILE_SIZE} bytes'
+        }), 413
+    
+    upload = request.files.get('audio')
+    if upload is None:
+        return jsonify({'error': 'audio file is required'}), 400
+    
+    language = request.form.get('language', 'en')
+    if language not in ['en', 'es']:
+        return jsonify({'error': 'Language must be "en" or "es"'}), 400
+    
+    text = request.form.get('text', '').strip()
+    if len(text) > SystemConfig.MAX_TEXT_LENGTH:
+        return jsonify({'error': f'Text exceeds {SystemConfig.MAX_TEXT_LENGTH} characters'}), 400
+    
+    stream = upload.stream
+    stream.seek(0, os.SEEK_END)
+    if stream.tell() > SystemConfig.MAX_FILE_SIZE:
+        return jsonify({
+            'error': f'Audio file exceeds {SystemConfig.MAX_FILE_SIZE} bytes'
+        }), 413
+    stream.seek(0)
+    
+    try:
+        started = time.perf_counter()
+        speech = analyze_audio(stream)
+        REGISTRY.observe_stage('speech', language, len(text), time.perf_counter() - started)
+    except AudioFormatError as e:
+        return jsonify({'error': str(e)}), 400
+    except BackendUnavailableError:
+        return jsonify({'error': 'FLAC decoding is not available on this server'}), 501
+    
+    speech_data = dict(speech.features.to_dict(), format=speech.info.format,
+                       sample_rate=speech.info.sample_rate)
+    if not text:
+        return jsonify({
+            'language': language,
+            'scores': {'pronunciation': speech.score},
+            'speech': speech_data,
+        }), 200
+    
+    try:
+        analysis = run_analysis(text, language)
+    except PoolBusyError:
+        return busy_response()
+    except Exception as e:
+        app.logger.error(f"Error analyzing speech transcript: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+    
+    scorer.apply_pronunciation(analysis, speech.score)
+    analysis = _finish_analysis(analysis)
+    analysis['speech'] = speech_data
+    return jsonify(analysis), 200
+
+
 @app.route('/api/student-progress/<student_id>', methods=['GET'])
 def get_student_progress(student_id):
     """
@@ -119,16 +655,10 @@ def get_student_progress(student_id):
     }
     """
     try:
-        # Aquí normalmente consultarías la base de datos
-        # Por ahora, datos de ejemplo
+        # Agregados mantenidos en cada escritura: sin recorrer el historial
+        progress = analysis_store.get_progress(student_id)
         
-        # TODO: Implementar persistencia de datos
-        # analyses = get_student_analyses_from_db(student_id)
-        
-        # Datos de ejemplo para demostración
-        example_analyses = []
-        
-        if not example_analyses:
+        if progress is None or not progress.total_sessions:
             return jsonify({
                 'student_id': student_id,
                 'message': 'No data found for this student',
@@ -136,8 +666,11 @@ def get_student_progress(student_id):
             }), 404
         
         # Generar reporte de progreso
-        progress_report = scorer.export_progress_report(example_analyses)
-        progress_report['student_id'] = student_id
+        progress_report = {
+            'student_id': student_id,
+            **scorer.progress_report(progress),
+            'recent_sessions': analysis_store.recent_analyses(student_id)
+        }
         
         return jsonify(progress_report), 200
         
@@ -157,24 +690,39 @@ def save_analysis():
         "analysis": { ... },
         "session_data": { ... }
     }
+    
+    Para guardar varios análisis en una sola transacción, enviar
+    "analyses": [{ ... }, ...] en lugar de "analysis".
     """
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
             return jsonify({'error': 'No JSON data provided'}), 400
         
         student_id = data.get('student_id')
-        analysis = data.get('analysis')
+        analyses = data.get('analyses')
+        if analyses is None and data.get('analysis'):
+            analyses = [data.get('analysis')]
         
-        if not student_id or not analysis:
+        if not student_id or not analyses:
             return jsonify({'error': 'student_id and analysis are required'}), 400
         
-        # TODO: Implementar guardado en base de datos
-        # save_analysis_to_db(student_id, analysis)
+        if not isinstance(analyses, list):
+            return jsonify({'error': 'analyses must be a list'}), 400
+        for analysis in analyses:
+            error = _validate_saved_analysis(analysis)
+            if error:
+                return jsonify({'error': error}), 400
+        
+        session_data = data.get('session_data')
+        saved = analysis_store.save_analyses(
+            (student_id, analysis, session_data) for analysis in analyses
+        )
         
         return jsonify({
             'message': 'Analysis saved successfully',
-            'student_id': student_id
+            'student_id': student_id,
+            'saved': saved
         }), 200
         
     except Exception as e:
@@ -192,6 +740,67 @@ def health_check():
     }), 200
 
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Lista sólo cuando las reglas están cargadas y calentadas."""
+    status = rule_sets.status()
+    if not status['ready']:
+        return jsonify({'status': 'error' if status['error'] else 'starting',
+                        'rules': status}), 503
+    return jsonify({'status': 'ready', 'rules': status}), 200
+
+
+@app.route('/api/admin/reload-rules', methods=['POST'])
+def reload_rules():
+    """
+    Vuelve a cargar la instantánea de reglas (`RULE_SNAPSHOT`) y la instala
+    sin interrumpir las peticiones en curso. Requiere `X-Admin-Token`.
+    """
+    error = admin_error(request.headers.get('X-Admin-Token'))
+    if error:
+        return jsonify({'error': error[0]}), error[1]
+    previous = rule_sets.version
+    try:
+        status = rule_sets.load()
+    except Exception as e:
+        app.logger.error(f"Error reloading rules: {str(e)}")
+        return jsonify({'error': 'Rule snapshot could not be loaded',
+                        'rules': rule_sets.status()}), 500
+    return jsonify({'previous_version': previous, 'rules': status}), 200
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+    Retorna los contadores de la caché de análisis y el estado del índice de
+    plantillas de pronunciación (None si no se ha construido).
+    """
+    stats = analysis_cache.stats()
+    templates = get_template_index()
+    stats['phoneme_templates'] = templates.stats() if templates is not None else None
+    return jsonify(stats), 200
+
+
+@app.route('/api/pool/stats', methods=['GET'])
+def pool_stats():
+    """Retorna el estado del pool de procesos (modo producción)."""
+    if scoring_pool is None:
+        return jsonify({'workers': 0, 'mode': 'development'}), 200
+    return jsonify(scoring_pool.stats()), 200
+
+
+@app.route('/api/backends', methods=['GET'])
+def backends_status():
+    """Backends de NLP opcionales: instalados, cargados y tiempo de carga."""
+    return jsonify(BACKENDS.status()), 200
+
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Histogramas de latencia en formato de texto de Prometheus."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4'), 200
+
+
 @app.route('/api/supported-languages', methods=['GET'])
 def supported_languages():
     """Retorna los idiomas soportados."""
@@ -219,10 +828,58 @@ def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 
+def main():
+    """Inicia la API en modo desarrollo o con pool de procesos."""
+    global scoring_pool
+    
+    parser = argparse.ArgumentParser(description="API de Puntuación de Idiomas - Tutorium")
+    parser.add_argument('--workers', type=int, default=SystemConfig.API_WORKERS,
+                        help='Procesos de puntuación (0 = servidor de desarrollo)')
+    parser.add_argument('--queue-size', type=int, default=SystemConfig.API_QUEUE_SIZE,
+                        help='Peticiones en espera antes de responder 503')
+    parser.add_argument('--host', default=SystemConfig.API_HOST)
+    parser.add_argument('--port', type=int, default=SystemConfig.API_PORT)
+    args = parser.parse_args()
+    
+    # Carga anticipada opcional; con fork los procesos del pool la heredan
+    for name, error in BACKENDS.preload(SystemConfig.NLP_PRELOAD).items():
+        if error:
+            print(f"Warning: {error}", file=sys.stderr)
+    
+    # Índice de plantillas de pronunciación: se mapea antes de crear el pool
+    # para que los procesos hijos hereden los mapeos sin copiar los arrays
+    templates = get_template_index()
+    if templates is None:
+        print(f"Warning: no phoneme template index at {SystemConfig.PHONEME_TEMPLATE_INDEX}",
+              file=sys.stderr)
+    else:
+        templates.map_all()
+    
+    if args.workers <= 0:
+        # Configuración para desarrollo
+        rule_sets.start()
+        app.run(
+            host=args.host,
+            port=args.port,
+            debug=True
+        )
+        return
+    
+    # Modo producción: el pool se crea antes de arrancar los hilos HTTP
+    from werkzeug.serving import make_server
+    
+    scoring_pool = create_pool(args.workers, args.queue_size)
+    # Después de crear el pool: no se hace fork con la carga a medias
+    rule_sets.start()
+    server = make_server(args.host, args.port, app, threaded=True)
+    print(f"Serving with {args.workers} scoring workers on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scoring_pool.close()
+
+
 if __name__ == '__main__':
-    # Configuración para desarrollo
-    app.run(
-        host='127.0.0.1',
-        port=5000,
-        debug=True
-    )
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+API ASGI para el Sistema de Puntuación de Idiomas - Tutorium
+Variante asíncrona de /api/analyze-language: las peticiones idénticas en
+vuelo (mismo texto e idioma) comparten una sola ejecución de `analyze_text`
+en un executor de hilos o procesos.
+
+/ws/analyze-stream es un canal WebSocket para análisis en streaming: el
+cliente envía el texto por partes y recibe las correcciones de cada oración
+completa y, periódicamente, las puntuaciones en curso (ver
+`streaming_analysis`).
+
+Uso:
+  python tools/language_asgi.py
+  ASGI_EXECUTOR=process ASGI_WORKERS=4 python tools/language_asgi.py
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from analysis_cache import AnalysisCache, cache_key
+from backends import BackendUnavailableError
+from config import SystemConfig
+from language_detector import AUTO_LANGUAGE, detect_language
+from language_scoring_system import LanguageScoringSystem
+from request_coalescer import RequestCoalescer
+from rule_snapshot import RuleSetManager, admin_error
+from streaming_analysis import StreamLimitError, StreamSession
+from wire_format import JSON, negotiate
+import worker_pool
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyzeRequest(BaseModel):
+    text: str = ''
+    language: str = 'en'
+    mode: str = 'regex'
+
+
+def create_executor():
+    """Executor de análisis según `SystemConfig.ASGI_EXECUTOR`."""
+    workers = SystemConfig.ASGI_WORKERS or None
+    if SystemConfig.ASGI_EXECUTOR == 'process':
+        return ProcessPoolExecutor(max_workers=workers, initializer=worker_pool._init_worker)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+# Sistema de puntuación local: consejos, versión de reglas y modo hilos
+scorer = LanguageScoringSystem(cache=AnalysisCache(
+    max_entries=SystemConfig.CACHE_MAX_ENTRIES,
+    ttl=SystemConfig.CACHE_TIMEOUT,
+    db_path=SystemConfig.CACHE_DB_PATH or None
+))
+
+
+def install_scorer(new_scorer):
+    """Instala el sistema de una carga o recarga de reglas (ver `rule_sets`)."""
+    global scorer
+    scorer = new_scorer
+
+
+# Reglas activas: instantánea precompilada (RULE_SNAPSHOT) o las del código
+rule_sets = RuleSetManager(SystemConfig.RULE_SNAPSHOT, cache=scorer.cache,
+                           scorer=scorer, on_swap=install_scorer)
+
+
+def analyze_in_thread(text, language, deep=False, snapshot=None):
+    """Análisis con el sistema activo cuando empieza la ejecución."""
+    return scorer.analyze_text(text, language, deep)
+
+
+executor = create_executor()
+# En procesos, `snapshot` indica la instantánea que debe tener cada worker
+analyze_in_executor = (worker_pool._analyze_text
+                       if SystemConfig.ASGI_EXECUTOR == 'process' else analyze_in_thread)
+coalescer = RequestCoalescer(executor)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Al arrancar, carga y calienta las reglas en segundo plano (ver /api/ready)."""
+    rule_sets.start()
+    yield
+
+
+asgi_app = FastAPI(title="Tutorium Language Scoring API", version="1.0.0", lifespan=lifespan)
+
+
+@asgi_app.post("/api/analyze-language")
+async def analyze_language(payload: AnalyzeRequest, request: Request):
+    """Mismo contrato que el endpoint Flask, con peticiones agrupadas."""
+    text = payload.text.strip()
+    language = payload.language
+
+    if not text:
+        return JSONResponse({'error': 'Text is required'}, status_code=400)
+
+    if language not in ['en', 'es', AUTO_LANGUAGE]:
+        return JSONResponse({'error': 'Language must be "en", "es" or "auto"'}, status_code=400)
+
+    if payload.mode not in ('regex', 'deep'):
+        return JSONResponse({'error': 'Mode must be "regex" or "deep"'}, status_code=400)
+    deep = payload.mode == 'deep'
+
+    detection = None
+    if language == AUTO_LANGUAGE:
+        # Microsegundos: se hace en el bucle de eventos, antes de agrupar
+        detected = detect_language(text)
+        language = detected.language
+        detection = {'language': language, 'confidence': detected.confidence}
+
+    try:
+        key = cache_key(text, language, f'{scorer._cache_version()}:{payload.mode}')
+        shared = await coalescer.run(key, analyze_in_executor, text, language, deep,
+                                     rule_sets.worker_snapshot())
+    except BackendUnavailableError:
+        return JSONResponse({'error': 'Deep analysis mode is not available on this server'},
+                            status_code=501)
+    except Exception as e:
+        logger.error(f"Error analyzing language: {str(e)}")
+        return JSONResponse({'error': 'Internal server error'}, status_code=500)
+
+    # Copia propia: el resultado compartido no se modifica
+    analysis = dict(shared)
+    analysis['advice'] = scorer.get_improvement_advice(analysis)
+    analysis.pop('timestamp', None)
+    if detection is not None:
+        analysis['detected_language'] = detection
+    wire_format = negotiate(request.headers.get('accept'))
+    if wire_format is JSON:
+        return JSONResponse(analysis, headers={'Vary': 'Accept'})
+    return Response(wire_format.encode(analysis), media_type=wire_format.media_type,
+                    headers={'Vary': 'Accept'})
+
+
+@asgi_app.websocket("/ws/analyze-stream")
+async def analyze_stream(websocket: WebSocket, language: str = 'en'):
+    """
+    Análisis en streaming. Mensajes JSON del cliente:
+      {"type": "chunk", "text": "..."}   texto nuevo (se concatena)
+      {"type": "end"}                    fin del texto: puntuación final y cierre
+    Mensajes del servidor:
+      {"type": "ready", ...}             límites de la conexión
+      {"type": "sentence", "index": 0, "position": [0, 18],
+       "corrections": [...], "suggestions": [...]}
+      {"type": "scores", ...}            puntuaciones en curso (periódicas)
+      {"type": "final", ...}             puntuaciones del texto completo
+      {"type": "error", "error": "..."}
+
+    Contrapresión: los eventos pasan por una cola acotada hacia el emisor; si
+    el cliente no lee, la cola se llena, el servidor deja de leer mensajes y
+    TCP frena al cliente. Las puntuaciones periódicas no se encolan: sólo se
+    envía la más reciente.
+    """
+    await websocket.accept()
+    if language not in ['en', 'es']:
+        await websocket.send_json({'type': 'error', 'error': 'Language must be "en" or "es"'})
+        await websocket.close(code=1008)
+        return
+
+    session = StreamSession(scorer, language)
+    session_lock = asyncio.Lock()
+    outbox: asyncio.Queue = asyncio.Queue(maxsize=max(1, SystemConfig.STREAM_SEND_QUEUE_SIZE))
+    dirty = asyncio.Event()
+    sender = asyncio.create_task(_stream_sender(websocket, outbox, session, session_lock, dirty))
+    # Si el emisor falla (cliente desconectado) no hay que quedarse esperando
+    # a que la cola se vacíe
+    handler = asyncio.current_task()
+    sender.add_done_callback(
+        lambda task: handler.cancel() if not task.cancelled() and task.exception() else None)
+    loop = asyncio.get_running_loop()
+
+    async def run(func, *args):
+        # El análisis se hace en un hilo; el lock ordena feed/finish/scores
+        async with session_lock:
+            return await loop.run_in_executor(None, func, *args)
+
+    close_code = 1000
+    try:
+        await outbox.put({'type': 'ready', 'language': language, 'limits': {
+            'max_chars': session.max_chars,
+            'max_chunk_chars': SystemConfig.STREAM_MAX_CHUNK_CHARS,
+            'max_pending_chars': session.max_pending,
+        }})
+        while True:
+            message = await websocket.receive_json()
+            kind = message.get('type') if isinstance(message, dict) else None
+            if kind == 'chunk':
+                text = message.get('text')
+                if not isinstance(text, str):
+                    await outbox.put({'type': 'error', 'error': 'text must be a string'})
+                    continue
+                if len(text) > SystemConfig.STREAM_MAX_CHUNK_CHARS:
+                    await outbox.put({'type': 'error', 'error':
+                                      f'Chunk exceeds {SystemConfig.STREAM_MAX_CHUNK_CHARS} characters'})
+                    continue
+                for event in await run(session.feed, text):
+                    await outbox.put(event)
+                dirty.set()
+            elif kind == 'end':
+                for event in await run(session.finish):
+                    await outbox.put(event)
+                final = await run(session.scores)
+                final['type'] = 'final'
+                await outbox.put(final)
+                break
+            else:
+                await outbox.put({'type': 'error', 'error': 'Message type must be "chunk" or "end"'})
+    except StreamLimitError as e:
+        await outbox.put({'type': 'error', 'error': str(e)})
+        close_code = 1009
+    except WebSocketDisconnect:
+        sender.cancel()
+        return
+    except ValueError:  # JSON inválido
+        await outbox.put({'type': 'error', 'error': 'Messages must be JSON'})
+        close_code = 1003
+
+    await outbox.put(None)
+    try:
+        await sender
+        await websocket.close(code=close_code)
+    except Exception:  # el cliente cerró antes de recibir todo
+        pass
+
+
+async def _stream_sender(websocket: WebSocket, outbox: asyncio.Queue, session: StreamSession,
+                         session_lock: asyncio.Lock, dirty: asyncio.Event) -> None:
+    """Emite los eventos en orden y, cada intervalo, las puntuaciones si cambiaron."""
+    loop = asyncio.get_running_loop()
+    interval = SystemConfig.STREAM_SCORE_INTERVAL
+    # Intervalo 0: puntuaciones tras cada evento, sin temporizador
+    timeout = interval if interval > 0 else None
+    last_scores = time.monotonic()
+    while True:
+        try:
+            event = await asyncio.wait_for(outbox.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            event = False
+        if event is None:
+            return
+        if event:
+            await websocket.send_json(event)
+        if dirty.is_set() and time.monotonic() - last_scores >= interval:
+            dirty.clear()
+            async with session_lock:
+                scores = await loop.run_in_executor(None, session.scores)
+            await websocket.send_json(scores)
+            last_scores = time.monotonic()
+
+
+@asgi_app.get("/api/coalescing/stats")
+async def coalescing_stats():
+    """Peticiones recibidas, ejecuciones reales y peticiones agrupadas."""
+    return coalescer.stats()
+
+
+@asgi_app.get("/api/health")
+async def health_check():
+    return {
+        'status': 'healthy',
+        'service': 'Language Scoring API (ASGI)',
+        'version': '1.0.0'
+    }
+
+
+@asgi_app.get("/api/ready")
+async def readiness_check():
+    """Lista sólo cuando las reglas están cargadas y calentadas."""
+    status = rule_sets.status()
+    if not status['ready']:
+        return JSONResponse({'status': 'error' if status['error'] else 'starting',
+                             'rules': status}, status_code=503)
+    return {'status': 'ready', 'rules': status}
+
+
+@asgi_app.post("/api/admin/reload-rules")
+async def reload_rules(request: Request):
+    """
+    Vuelve a cargar la instantánea de reglas en un hilo; las peticiones en
+    curso terminan con las reglas anteriores. Requiere `X-Admin-Token`.
+    """
+    error = admin_error(request.headers.get('x-admin-token'))
+    if error:
+        return JSONResponse({'error': error[0]}, status_code=error[1])
+    previous = rule_sets.version
+    try:
+        status = await asyncio.get_running_loop().run_in_executor(None, rule_sets.load)
+    except Exception as e:
+        logger.error(f"Error reloading rules: {str(e)}")
+        return JSONResponse({'error': 'Rule snapshot could not be loaded',
+                             'rules': rule_sets.status()}, status_code=500)
+    return {'previous_version': previous, 'rules': status}
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(asgi_app, host=SystemConfig.API_HOST, port=SystemConfig.ASGI_PORT)
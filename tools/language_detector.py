@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Detección de idioma por trigramas de caracteres - Tutorium
+Perfiles de trigramas precalculados (NumPy) a partir de los datos de
+`SystemConfig.LANGUAGES` y de un pequeño corpus incluido. Detectar un texto
+es vectorizar sus trigramas con un hash y hacer un producto escalar con la
+matriz de perfiles: no hay bucles de Python por carácter.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from config import SystemConfig
+
+# Valor del campo `language` que pide detectar el idioma
+AUTO_LANGUAGE = 'auto'
+
+# Dimensión del espacio de trigramas (hashing trick)
+FEATURES = 4096
+
+# Sólo se mira el principio de textos largos: basta para decidir
+MAX_DETECT_CHARS = 1000
+
+_NON_WORD = re.compile(r'[\W\d_]+')
+
+# Corpus incluido: texto corriente de cada idioma, además de las listas de
+# vocabulario y errores de la configuración
+BUNDLED_CORPUS = {
+    'en': (
+        "The weather was nice this morning, so we decided to walk to school. "
+        "My sister is learning to play the piano and practices every evening. "
+        "Although the exam was difficult, most of the students passed it. "
+        "I would like to travel around the world when I finish my studies. "
+        "They have been working on this project for three weeks. "
+        "Could you please tell me where the nearest train station is? "
+        "We usually have dinner with our family on Sunday. "
+        "She thinks that reading books is the best way to improve your vocabulary. "
+        "The children were playing in the garden while their parents cooked. "
+        "If it rains tomorrow, we will stay at home and watch a movie. "
+        "What do you want to do after class? I think we should study together. "
+        "His brother works in a hospital and helps people every day. "
+        "There are many opportunities for young people in this city. "
+        "The teacher explained the lesson again because nobody understood it."
+    ),
+    'es': (
+        "El clima estaba agradable esta mañana, así que decidimos caminar a la escuela. "
+        "Mi hermana está aprendiendo a tocar el piano y practica todas las tardes. "
+        "Aunque el examen fue difícil, la mayoría de los estudiantes lo aprobó. "
+        "Me gustaría viajar por el mundo cuando termine mis estudios. "
+        "Ellos han estado trabajando en este proyecto durante tres semanas. "
+        "¿Podrías decirme dónde está la estación de tren más cercana? "
+        "Normalmente cenamos con nuestra familia los domingos. "
+        "Ella piensa que leer libros es la mejor manera de mejorar el vocabulario. "
+        "Los niños jugaban en el jardín mientras sus padres cocinaban. "
+        "Si llueve mañana, nos quedaremos en casa y veremos una película. "
+        "¿Qué quieres hacer después de clase? Creo que deberíamos estudiar juntos. "
+        "Su hermano trabaja en un hospital y ayuda a la gente todos los días. "
+        "Hay muchas oportunidades para los jóvenes en esta ciudad. "
+        "El profesor explicó la lección otra vez porque nadie la entendió."
+    ),
+}
+
+
+class Detection(NamedTuple):
+    """Idioma detectado y confianza (diferencia de similitud con el segundo)."""
+    language: str
+    confidence: float
+    scores: Dict[str, float]
+
+
+def _normalize(text: str) -> str:
+    """Minúsculas y sólo letras, con espacios como fronteras de palabra."""
+    return ' ' + _NON_WORD.sub(' ', text.lower()).strip() + ' '
+
+
+def trigram_vector(text: str) -> np.ndarray:
+    """Conteo de trigramas (con hash) del texto como vector float32."""
+    normalized = _normalize(text)
+    if len(normalized) < 3:
+        return np.zeros(FEATURES, dtype=np.float32)
+    codes = np.frombuffer(normalized.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    # Hash polinómico de cada ventana de tres caracteres
+    hashes = (codes[:-2] * np.uint64(1000003) + codes[1:-1]) * np.uint64(1000003) + codes[2:]
+    return np.bincount((hashes % np.uint64(FEATURES)).astype(np.int64),
+                       minlength=FEATURES).astype(np.float32)
+
+
+class LanguageDetector:
+    """
+    Clasificador de perfiles de trigramas.
+
+    Cada perfil es el vector log(1 + conteo) normalizado (L2) de un idioma;
+    la detección retorna el idioma con mayor similitud coseno.
+    """
+
+    def __init__(self, corpora: Optional[Dict[str, str]] = None):
+        if corpora is None:
+            corpora = default_corpora()
+        self.languages: List[str] = sorted(corpora)
+        profiles = np.stack([np.log1p(trigram_vector(corpora[language]))
+                             for language in self.languages])
+        norms = np.linalg.norm(profiles, axis=1, keepdims=True)
+        self.profiles = (profiles / np.maximum(norms, 1e-9)).astype(np.float32)
+
+    def detect(self, text: str, default: str = 'en') -> Detection:
+        """Detecta el idioma; `default` si el texto no tiene letras."""
+        vector = np.log1p(trigram_vector(text[:MAX_DETECT_CHARS]))
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return Detection(default, 0.0, {language: 0.0 for language in self.languages})
+        similarities = self.profiles @ (vector / norm)
+        order = np.argsort(similarities)[::-1]
+        best = int(order[0])
+        margin = float(similarities[best] - similarities[order[1]]) if len(order) > 1 else 1.0
+        return Detection(
+            self.languages[best],
+            round(margin, 4),
+            {language: round(float(score), 4)
+             for language, score in zip(self.languages, similarities)}
+        )
+
+
+def default_corpora() -> Dict[str, str]:
+    """Corpus incluido más vocabulario y frases de `SystemConfig.LANGUAGES`."""
+    corpora = {}
+    for language, text in BUNDLED_CORPUS.items():
+        config = SystemConfig.get_language_config(language)
+        words = [entry for entries in config.vocabulary_levels.values() for entry in entries]
+        phrases = [phrase for pair in config.common_errors for phrase in pair]
+        corpora[language] = ' '.join([text] + words + phrases)
+    return corpora
+
+
+_detector: Optional[LanguageDetector] = None
+
+
+def get_detector() -> LanguageDetector:
+    """Detector compartido del proceso (los perfiles se calculan una vez)."""
+    global _detector
+    if _detector is None:
+        _detector = LanguageDetector()
+    return _detector
+
+
+def detect_language(text: str, default: str = 'en') -> Detection:
+    """Atajo: detecta el idioma con el detector compartido."""
+    return get_detector().detect(text, default)
@@ -4,16 +4,35 @@ Sistema de Puntuación y Corrección de Idiomas para Tutorium
 Evalúa pronunciación, sintaxis y gramática en inglés y español.
 """
 
+import hashlib
 import json
-import re
-from typing import Dict, List, Tuple
+import time
+from typing import Dict, List, Optional, Tuple, Union
 from datetime import datetime
 
+import numpy as np
+
+from analysis_cache import AnalysisCache, cache_key
+from analysis_result import AnalysisResult, MatchTable
+from config import SystemConfig
+from deep_analyzer import DeepAnalyzer, DeepResult
+from metrics import REGISTRY
+from progress_accumulator import ProgressAccumulator
+from rule_engine import RuleEngine, RuleMatch
+from tokenizer import TokenStream
+from vocabulary_index import VocabularyIndex
+
 
 class LanguageScoringSystem:
     """Sistema de puntuación para habilidades lingüísticas."""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[AnalysisCache] = None,
+                 rule_set: Optional[Dict] = None):
+        """
+        `rule_set` son las reglas ya compiladas de una instantánea (ver
+        `rule_snapshot`); sin ella se compilan las definidas aquí.
+        """
+        self.cache = cache
         self.supported_languages = ['en', 'es']
         self.scoring_weights = {
             'pronunciation': 0.4,
@@ -46,107 +65,471 @@ class LanguageScoringSystem:
             }
         }
 
-    def analyze_text(self, text: str, language: str = 'en') -> Dict:
-        """Analiza un texto y retorna puntuaciones y correcciones."""
+        # Frases de error literales (error, corrección) de la configuración;
+        # los pares marcados como correctos (error == corrección) se omiten
+        self.common_phrases: Dict[str, List[Tuple[str, str]]] = {
+            language: [
+                (error, correction)
+                for error, correction in SystemConfig.get_language_config(language).common_errors
+                if error.lower() != correction.lower()
+            ]
+            for language in self.supported_languages
+        }
+        
+        # Analizador spaCy del modo profundo (se crea en el primer uso)
+        self._deep_analyzer: Optional[DeepAnalyzer] = None
+        
+        if rule_set is not None:
+            self.apply_rule_set(rule_set)
+            return
+        
+        # Motores de reglas precompilados (un único escaneo por texto)
+        self.rule_engines: Dict[str, RuleEngine] = {}
+        self.rebuild_rules()
+        
+        # Índices de niveles de vocabulario (MCER) por idioma
+        self.vocabulary_indexes: Dict[str, VocabularyIndex] = {
+            language: VocabularyIndex(SystemConfig.get_language_config(language).vocabulary_levels)
+            for language in self.supported_languages
+        }
+
+    def rebuild_rules(self) -> None:
+        """Recompila los motores de reglas a partir de `common_errors`."""
+        self.rule_engines = {
+            language: RuleEngine(rules, phrases=self.common_phrases.get(language))
+            for language, rules in self.common_errors.items()
+        }
+        # Versión del conjunto de reglas: invalida la caché al cambiar
+        serialized = json.dumps([self.common_errors, self.common_phrases], sort_keys=True)
+        self.rules_version = hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:16]
+
+    def rule_set(self) -> Dict:
+        """
+        Reglas, motores compilados, índices de vocabulario y pesos: todo lo
+        que `rule_snapshot` guarda para construir el sistema sin recompilar.
+        """
+        return {
+            'common_errors': self.common_errors,
+            'common_phrases': self.common_phrases,
+            'rule_engines': self.rule_engines,
+            'rules_version': self.rules_version,
+            'vocabulary_indexes': self.vocabulary_indexes,
+            'scoring_weights': self.scoring_weights,
+        }
+
+    def apply_rule_set(self, rule_set: Dict) -> None:
+        """Sustituye reglas, índices y pesos por los de `rule_set()`."""
+        self.common_errors = rule_set['common_errors']
+        self.common_phrases = rule_set['common_phrases']
+        self.rule_engines = rule_set['rule_engines']
+        self.rules_version = rule_set['rules_version']
+        self.vocabulary_indexes = rule_set['vocabulary_indexes']
+        self.scoring_weights = rule_set['scoring_weights']
+
+    def _cache_version(self) -> str:
+        """Versión de reglas y pesos que forma parte de la clave de caché."""
+        weights = ','.join(f'{skill}={weight!r}' for skill, weight in
+                           sorted(self.scoring_weights.items()))
+        vocabulary = ','.join(index.version for _, index in
+                              sorted(self.vocabulary_indexes.items()))
+        return f'{self.rules_version}:{weights}:{vocabulary}'
+
+    def _cached_analysis(self, key: str) -> Optional[Dict]:
+        """Retorna un análisis de la caché con el timestamp regenerado."""
+        cached = self.cache.get(key)
+        if cached is None:
+            return None
+        analysis = json.loads(cached)
+        analysis['timestamp'] = datetime.utcnow().isoformat()
+        for item in analysis['corrections'] + analysis['suggestions']:
+            item['position'] = tuple(item['position'])
+        return analysis
+
+    def _scan_rules(self, text: str, language: str,
+                    tokens: Optional[TokenStream] = None) -> List[RuleMatch]:
+        """Escanea el texto una vez con todas las reglas del idioma."""
+        engine = self.rule_engines.get(language)
+        return engine.scan(text, tokens) if engine is not None else []
+
+    def analyze_text(self, text: str, language: str = 'en', deep: bool = False) -> Dict:
+        """
+        Analiza un texto y retorna puntuaciones y correcciones. Con `deep=True`
+        se añade el análisis con spaCy (ver `analyze_deep`).
+        """
         if language not in self.supported_languages:
             raise ValueError(f"Language {language} not supported")
         
-        analysis = {
-            'language': language,
-            'timestamp': datetime.utcnow().isoformat(),
-            'text_length': len(text.split()),
-            'scores': {},
-            'corrections': [],
-            'suggestions': [],
-            'overall_score': 0
-        }
+        if deep:
+            return self.analyze_deep([text], language)[0]
+        
+        timer = REGISTRY.stage_timer(language, len(text))
         
-        # Análisis de gramática
-        grammar_score, grammar_corrections = self._analyze_grammar(text, language)
-        analysis['scores']['grammar'] = grammar_score
-        analysis['corrections'].extend(grammar_corrections)
+        key = None
+        if self.cache is not None:
+            key = cache_key(text, language, self._cache_version())
+            cached = self._cached_analysis(key)
+            timer.mark('cache')
+            if cached is not None:
+                timer.total()
+                return cached
         
-        # Análisis de sintaxis
-        syntax_score, syntax_suggestions = self._analyze_syntax(text, language)
-        analysis['scores']['syntax'] = syntax_score
-        analysis['suggestions'].extend(syntax_suggestions)
+        analysis = self._analyze_result(text, language, timer).to_dict()
         
-        # Análisis de vocabulario
-        vocabulary_score = self._analyze_vocabulary(text, language)
-        analysis['scores']['vocabulary'] = vocabulary_score
+        if key is not None:
+            self.cache.set(key, json.dumps(analysis))
+        
+        timer.total()
+        return analysis
+
+    def analyze(self, text: str, language: str = 'en') -> AnalysisResult:
+        """
+        Como `analyze_text` (sin modo profundo), pero retorna un
+        `AnalysisResult`: las correcciones no se materializan como
+        diccionarios hasta llamar a `to_dict()`.
+        """
+        if language not in self.supported_languages:
+            raise ValueError(f"Language {language} not supported")
+        
+        timer = REGISTRY.stage_timer(language, len(text))
+        
+        key = None
+        if self.cache is not None:
+            key = cache_key(text, language, self._cache_version())
+            cached = self._cached_analysis(key)
+            timer.mark('cache')
+            if cached is not None:
+                timer.total()
+                return AnalysisResult.from_dict(cached)
+        
+        result = self._analyze_result(text, language, timer)
+        if key is not None:
+            # La caché guarda el JSON de siempre
+            self.cache.set(key, json.dumps(result.to_dict()))
+        
+        timer.total()
+        return result
+
+    def _analyze_result(self, text: str, language: str, timer) -> AnalysisResult:
+        """Analiza el texto sin consultar la caché."""
+        # Una sola tokenización compartida por todos los análisis
+        tokens = TokenStream(text)
+        timer.mark('tokenize')
+        
+        # Un solo escaneo alimenta gramática y sintaxis
+        matches = MatchTable.from_matches(self._scan_rules(text, language, tokens))
+        errors_found, issues_found = matches.counts()
+        timer.mark('rules')
+
+        grammar_score = self._grammar_score(errors_found, tokens.word_count)
+        timer.mark('grammar')
+        
+        syntax_score = self._syntax_score(tokens.sentence_count, issues_found)
+        timer.mark('syntax')
+        
+        vocabulary_score = self._analyze_vocabulary(text, language, tokens)
+        timer.mark('vocabulary')
         
         # Puntuación general (pronunciación se evalúa en frontend)
-        analysis['scores']['pronunciation'] = 85  # Placeholder para audio
+        scores = {
+            'grammar': grammar_score,
+            'syntax': syntax_score,
+            'vocabulary': vocabulary_score,
+            'pronunciation': 85  # Placeholder para audio
+        }
+        return AnalysisResult(
+            language, tokens.word_count, grammar_score, syntax_score, vocabulary_score,
+            scores['pronunciation'], self._calculate_overall_score(scores),
+            matches=matches, text=text, engine=self.rule_engines.get(language))
+
+    def analyze_batch(self, texts: List[str], language: str = 'en',
+                      deep: bool = False) -> List[Dict]:
+        """
+        Analiza varios textos a la vez. Cada texto se tokeniza y escanea una
+        sola vez; las puntuaciones se calculan vectorizadas con NumPy y el
+        resultado es idéntico a llamar `analyze_text` texto por texto.
+        """
+        if language not in self.supported_languages:
+            raise ValueError(f"Language {language} not supported")
+        
+        if deep:
+            return self.analyze_deep(texts, language)
+        
+        if self.cache is None:
+            return self._score_batch(texts, language)
+        
+        # Sólo se puntúan los textos que no estén en caché
+        version = self._cache_version()
+        keys = [cache_key(text, language, version) for text in texts]
+        results = [self._cached_analysis(key) for key in keys]
+        pending = [i for i, result in enumerate(results) if result is None]
+        scored = self._score_batch([texts[i] for i in pending], language)
+        for i, analysis in zip(pending, scored):
+            self.cache.set(keys[i], json.dumps(analysis))
+            results[i] = analysis
+        
+        return results
+
+    @property
+    def deep_analyzer(self) -> DeepAnalyzer:
+        """Analizador spaCy; spaCy y sus modelos se cargan en el primer uso."""
+        if self._deep_analyzer is None:
+            self._deep_analyzer = DeepAnalyzer()
+        return self._deep_analyzer
+
+    def analyze_deep(self, texts: List[str], language: str = 'en') -> List[Dict]:
+        """
+        Modo profundo: el análisis por reglas más los errores de concordancia
+        que detecta spaCy, y el vocabulario puntuado sobre lemas. Todos los
+        textos pendientes pasan juntos por `nlp.pipe`. Lanza
+        `BackendUnavailableError` si spaCy o el modelo no están instalados.
+        """
+        if language not in self.supported_languages:
+            raise ValueError(f"Language {language} not supported")
+        
+        keys: List[Optional[str]] = [None] * len(texts)
+        results: List[Optional[Dict]] = [None] * len(texts)
+        if self.cache is not None:
+            version = f'{self._cache_version()}:deep'
+            keys = [cache_key(text, language, version) for text in texts]
+            results = [self._cached_analysis(key) for key in keys]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        
+        started = time.perf_counter()
+        pending_texts = [texts[i] for i in pending]
+        deep_results = self.deep_analyzer.analyze_many(pending_texts, language)
+        if pending_texts:
+            mean_length = sum(len(text) for text in pending_texts) // len(pending_texts)
+            REGISTRY.observe_stage('deep', language, mean_length, time.perf_counter() - started)
+        
+        scored = self._score_batch(pending_texts, language)
+        for i, analysis, text, deep_result in zip(pending, scored, pending_texts, deep_results):
+            self._merge_deep(analysis, text, language, deep_result)
+            if keys[i] is not None:
+                self.cache.set(keys[i], json.dumps(analysis))
+            results[i] = analysis
+        
+        return results
+
+    def _merge_deep(self, analysis: Dict, text: str, language: str,
+                    deep_result: DeepResult) -> None:
+        """Añade las correcciones profundas y recalcula las puntuaciones afectadas."""
+        spans = [correction['position'] for correction in analysis['corrections']]
+        for correction in deep_result.corrections:
+            start, end = correction['position']
+            # Un error ya señalado por las reglas no se cuenta dos veces
+            if any(start < span_end and span_start < end for span_start, span_end in spans):
+                continue
+            analysis['corrections'].append(correction)
+            spans.append((start, end))
+        
+        total_words = analysis['text_length']
+        error_rate = len(analysis['corrections']) / max(total_words, 1)
+        analysis['scores']['grammar'] = max(0, int(100 - (error_rate * 100)))
+        analysis['scores']['vocabulary'] = self._analyze_vocabulary(
+            text, language, terms=deep_result.lemmas)
         analysis['overall_score'] = self._calculate_overall_score(analysis['scores'])
+
+    def _score_batch(self, texts: List[str], language: str) -> List[Dict]:
+        """Puntúa un lote sin consultar la caché."""
+        size = len(texts)
+        word_counts = np.zeros(size, dtype=np.int64)
+        unique_counts = np.zeros(size, dtype=np.int64)
+        unique_lengths = np.zeros(size, dtype=np.int64)
+        sentence_counts = np.zeros(size, dtype=np.int64)
+        error_counts = np.zeros(size, dtype=np.int64)
+        issue_counts = np.zeros(size, dtype=np.int64)
+        level_bonuses = np.zeros(size, dtype=np.int64)
+        vocabulary_index = self.vocabulary_indexes[language]
+        findings = []
         
-        return analysis
+        for i, text in enumerate(texts):
+            started = time.perf_counter()
+            tokens = TokenStream(text)
+            unique_words = tokens.unique_words
+            word_counts[i] = tokens.word_count
+            unique_counts[i] = len(unique_words)
+            unique_lengths[i] = sum(len(word) for word in unique_words)
+            sentence_counts[i] = tokens.sentence_count
+            level_bonuses[i] = VocabularyIndex.level_bonus(
+                vocabulary_index.weighted_hits(tokens.terms), tokens.word_count)
+            
+            matches = self._scan_rules(text, language, tokens)
+            corrections = self._grammar_corrections(matches, language)
+            suggestions = self._syntax_suggestions(matches, language)
+            error_counts[i] = len(corrections)
+            issue_counts[i] = len(suggestions)
+            findings.append((corrections, suggestions))
+            REGISTRY.observe_stage('batch_scan', language, len(text),
+                                   time.perf_counter() - started)
+        
+        started = time.perf_counter()
+        # Gramática: menos errores por palabra = mejor puntuación
+        error_rate = error_counts / np.maximum(word_counts, 1)
+        grammar = np.maximum(0, np.trunc(100 - (error_rate * 100))).astype(np.int64)
+        
+        # Sintaxis: complejidad por número de oraciones menos penalización
+        complexity = np.minimum(100, sentence_counts * 10)
+        syntax = np.maximum(0, complexity - issue_counts * 10)
+        
+        # Vocabulario: ratio de palabras únicas + bonus por longitud media y nivel
+        has_words = word_counts > 0
+        safe_words = np.maximum(word_counts, 1)
+        safe_unique = np.maximum(unique_counts, 1)
+        uniqueness = np.trunc((unique_counts / safe_words) * 100)
+        avg_length = unique_lengths / safe_unique
+        length_bonus = np.minimum(20, np.trunc((avg_length - 3) * 5))
+        vocabulary = np.where(
+            has_words, np.minimum(100, uniqueness + length_bonus + level_bonuses), 0
+        ).astype(np.int64)
+        
+        pronunciation = np.full(size, 85, dtype=np.int64)  # Placeholder para audio
+        
+        columns = {
+            'grammar': grammar,
+            'syntax': syntax,
+            'vocabulary': vocabulary,
+            'pronunciation': pronunciation,
+        }
+        overall = np.zeros(size)
+        for skill, weight in self.scoring_weights.items():
+            overall += columns[skill] * weight
+        overall = np.trunc(overall).astype(np.int64)
+        if size:
+            mean_length = sum(len(text) for text in texts) // size
+            REGISTRY.observe_stage('batch_scores', language, mean_length,
+                                   time.perf_counter() - started)
+        
+        timestamp = datetime.utcnow().isoformat()
+        results = []
+        for i, (corrections, suggestions) in enumerate(findings):
+            results.append({
+                'language': language,
+                'timestamp': timestamp,
+                'text_length': int(word_counts[i]),
+                'scores': {skill: int(column[i]) for skill, column in columns.items()},
+                'corrections': corrections,
+                'suggestions': suggestions,
+                'overall_score': int(overall[i])
+            })
+        
+        return results
+
+    def _grammar_corrections(self, matches: List[RuleMatch], language: str) -> List[Dict]:
+        """Convierte las coincidencias gramaticales en correcciones."""
+        engine = self.rule_engines.get(language)
+        return [
+            {
+                'type': 'grammar',
+                'error': match.text,
+                'correction': engine.message_for(match),
+                'position': (match.start, match.end)
+            }
+            for match in matches if match.kind in ('grammar', RuleEngine.PHRASE_KIND)
+        ]
+
+    def _syntax_suggestions(self, matches: List[RuleMatch], language: str) -> List[Dict]:
+        """Convierte las coincidencias sintácticas en sugerencias."""
+        engine = self.rule_engines.get(language)
+        return [
+            {
+                'type': 'syntax',
+                'issue': match.text,
+                'suggestion': engine.message_for(match),
+                'position': (match.start, match.end)
+            }
+            for match in matches if match.kind == 'syntax'
+        ]
 
-    def _analyze_grammar(self, text: str, language: str) -> Tuple[int, List[Dict]]:
+    def _analyze_grammar(self, text: str, language: str,
+                         matches: Optional[List[RuleMatch]] = None,
+                         tokens: Optional[TokenStream] = None) -> Tuple[int, List[Dict]]:
         """Analiza errores gramaticales."""
-        corrections = []
-        errors_found = 0
-        total_words = len(text.split())
-        
-        if language in self.common_errors:
-            for error in self.common_errors[language].get('grammar', []):
-                matches = re.finditer(error['pattern'], text, re.IGNORECASE)
-                for match in matches:
-                    corrections.append({
-                        'type': 'grammar',
-                        'error': match.group(),
-                        'correction': error['correction'],
-                        'position': match.span()
-                    })
-                    errors_found += 1
-        
-        # Calcular puntuación (menos errores = mejor puntuación)
-        error_rate = errors_found / max(total_words, 1)
-        score = max(0, int(100 - (error_rate * 100)))
+        if tokens is None:
+            tokens = TokenStream(text)
+        total_words = tokens.word_count
+        
+        if matches is None:
+            matches = self._scan_rules(text, language, tokens)
         
-        return score, corrections
+        corrections = self._grammar_corrections(matches, language)
+        return self._grammar_score(len(corrections), total_words), corrections
 
-    def _analyze_syntax(self, text: str, language: str) -> Tuple[int, List[Dict]]:
+    @staticmethod
+    def _grammar_score(errors_found: int, total_words: int) -> int:
+        """Menos errores por palabra = mejor puntuación."""
+        error_rate = errors_found / max(total_words, 1)
+        return max(0, int(100 - (error_rate * 100)))
+
+    def _analyze_syntax(self, text: str, language: str,
+                        matches: Optional[List[RuleMatch]] = None,
+                        tokens: Optional[TokenStream] = None) -> Tuple[int, List[Dict]]:
         """Analiza estructura sintáctica."""
-        suggestions = []
-        issues_found = 0
-        
-        if language in self.common_errors:
-            for pattern in self.common_errors[language].get('syntax', []):
-                matches = re.finditer(pattern['pattern'], text, re.IGNORECASE)
-                for match in matches:
-                    suggestions.append({
-                        'type': 'syntax',
-                        'issue': match.group(),
-                        'suggestion': pattern.get('suggestion', pattern.get('correction')),
-                        'position': match.span()
-                    })
-                    issues_found += 1
-        
-        # Puntuación sintáctica
-        sentence_count = len(re.split(r'[.!?]+', text))
+        if tokens is None:
+            tokens = TokenStream(text)
+        
+        if matches is None:
+            matches = self._scan_rules(text, language, tokens)
+        
+        suggestions = self._syntax_suggestions(matches, language)
+        return self._syntax_score(tokens.sentence_count, len(suggestions)), suggestions
+
+    @staticmethod
+    def _syntax_score(sentence_count: int, issues_found: int) -> int:
+        """Puntuación sintáctica: complejidad menos penalización por problemas."""
         complexity_score = min(100, sentence_count * 10)  # Más oraciones = más complejo
         issue_penalty = issues_found * 10
-        score = max(0, complexity_score - issue_penalty)
-        
-        return score, suggestions
+        return max(0, complexity_score - issue_penalty)
 
-    def _analyze_vocabulary(self, text: str, language: str) -> int:
-        """Analiza riqueza del vocabulario."""
-        words = text.lower().split()
-        unique_words = set(words)
+    def _analyze_vocabulary(self, text: str, language: str,
+                            tokens: Optional[TokenStream] = None,
+                            terms: Optional[List[str]] = None) -> int:
+        """
+        Analiza riqueza del vocabulario. `terms` sustituye a las palabras del
+        texto en el índice de niveles (el modo profundo pasa los lemas).
+        """
+        if tokens is None:
+            tokens = TokenStream(text)
+        words = tokens.words
+        unique_words = tokens.unique_words
         
-        # Calcular ratio de palabras únicas
         if len(words) == 0:
             return 0
         
-        uniqueness_ratio = len(unique_words) / len(words)
+        level_terms = tokens.terms if terms is None else terms
+        return self._vocabulary_score(
+            len(words), len(unique_words), sum(len(word) for word in unique_words),
+            self.vocabulary_indexes[language].weighted_hits(level_terms))
+
+    @staticmethod
+    def _vocabulary_score(word_count: int, unique_count: int, unique_length: int,
+                          weighted_hits: int) -> int:
+        """Puntuación de vocabulario a partir de los contadores del texto."""
+        if word_count == 0:
+            return 0
+        
+        # Calcular ratio de palabras únicas
+        uniqueness_ratio = unique_count / word_count
         vocabulary_score = int(uniqueness_ratio * 100)
         
         # Bonus por longitud de palabras (vocabulario más avanzado)
-        avg_word_length = sum(len(word) for word in unique_words) / len(unique_words)
+        avg_word_length = unique_length / unique_count
         length_bonus = min(20, int((avg_word_length - 3) * 5))
         
-        return min(100, vocabulary_score + length_bonus)
+        # Bonus por palabras y expresiones de nivel intermedio/avanzado
+        level_bonus = VocabularyIndex.level_bonus(weighted_hits, word_count)
+        
+        return min(100, vocabulary_score + length_bonus + level_bonus)
+
+    def apply_pronunciation(self, analysis: Dict, score: int) -> Dict:
+        """
+        Sustituye la pronunciación estimada por la medida en una grabación
+        (ver `speech_analysis`) y recalcula la puntuación general.
+        """
+        analysis['scores']['pronunciation'] = score
+        analysis['overall_score'] = self._calculate_overall_score(analysis['scores'])
+        return analysis
 
     def _calculate_overall_score(self, scores: Dict[str, int]) -> int:
         """Calcula puntuación general ponderada."""
@@ -190,31 +573,29 @@ class LanguageScoringSystem:
         
         return advice
 
-    def export_progress_report(self, user_analyses: List[Dict]) -> Dict:
-        """Exporta reporte de progreso del estudiante."""
-        if not user_analyses:
-            return {}
-        
-        # Calcular promedios y tendencias
-        avg_scores = {}
-        for skill in ['grammar', 'syntax', 'vocabulary', 'pronunciation']:
-            scores = [a['scores'].get(skill, 0) for a in user_analyses if skill in a['scores']]
-            avg_scores[skill] = sum(scores) / len(scores) if scores else 0
+    def export_progress_report(self, user_analyses: List[Union[Dict, AnalysisResult]]) -> Dict:
+        """
+        Exporta reporte de progreso del estudiante. Acepta diccionarios de
+        `analyze_text` o resultados de `analyze`.
+        """
+        accumulator = ProgressAccumulator()
+        for analysis in user_analyses:
+            accumulator.update(analysis)
         
-        # Tendencia (comparar primeros vs últimos análisis)
-        recent_analyses = user_analyses[-5:]  # Últimos 5
-        old_analyses = user_analyses[:5]      # Primeros 5
+        return self.progress_report(accumulator)
+
+    def progress_report(self, accumulator: ProgressAccumulator) -> Dict:
+        """Genera el reporte de progreso a partir de un acumulador incremental."""
+        if not accumulator.total_sessions:
+            return {}
         
-        trends = {}
-        for skill in avg_scores.keys():
-            recent_avg = sum(a['scores'].get(skill, 0) for a in recent_analyses) / len(recent_analyses)
-            old_avg = sum(a['scores'].get(skill, 0) for a in old_analyses) / len(old_analyses)
-            trends[skill] = recent_avg - old_avg
+        # Promedios y tendencia (primeros vs últimos 5 análisis)
+        avg_scores = accumulator.average_scores()
         
         return {
-            'total_sessions': len(user_analyses),
+            'total_sessions': accumulator.total_sessions,
             'average_scores': avg_scores,
-            'trends': trends,
+            'trends': accumulator.trends(),
             'current_level': self._determine_level(avg_scores),
             'generated_at': datetime.utcnow().isoformat()
         }
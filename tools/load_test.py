@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga de la API de Idiomas - Tutorium
+Arranca la API con 1/2/4/8 procesos de puntuación y mide el throughput de
+/api/analyze-language con clientes concurrentes.
+
+Uso:
+  python tools/load_test.py
+  python tools/load_test.py --workers 1 4 --concurrency 32 --duration 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks import synthetic_text
+
+API_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'language_api.py')
+
+
+def wait_until_healthy(base_url: str, timeout: float = 30) -> bool:
+    """Espera a que /api/health responda."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=1).status_code == 200:
+                return True
+        except requests.exceptions.ConnectionError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_clients(base_url: str, concurrency: int, duration: float, length: int) -> Dict:
+    """Lanza clientes concurrentes durante `duration` segundos."""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+    deadline = time.time() + duration
+
+    def client(client_id: int):
+        session = requests.Session()
+        request_number = 0
+        while time.time() < deadline:
+            # Textos distintos para no medir aciertos de caché
+            text = synthetic_text(length, seed=client_id * 100003 + request_number)
+            request_number += 1
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{base_url}/api/analyze-language",
+                                        json={'text': text, 'language': 'en'}, timeout=30)
+                status = response.status_code
+            except requests.exceptions.RequestException:
+                status = 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    return {
+        'ok': statuses.get(200, 0),
+        'busy': statuses.get(503, 0),
+        'errors': sum(count for status, count in statuses.items() if status not in (200, 503)),
+        'throughput': statuses.get(200, 0) / wall,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    """Función principal."""
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de puntuación")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--length', type=int, default=2000, help='Caracteres por texto')
+    parser.add_argument('--queue-size', type=int, default=32)
+    parser.add_argument('--port', type=int, default=5055)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{'workers':>8} {'req/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'503':>6} {'errores':>8}")
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, API_SCRIPT, '--workers', str(workers),
+             '--queue-size', str(args.queue_size), '--port', str(args.port)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            if not wait_until_healthy(base_url):
+                print(f"{workers:>8} la API no arrancó")
+                continue
+            result = run_clients(base_url, args.concurrency, args.duration, args.length)
+            print(f"{workers:>8} {result['throughput']:>9.1f} {result['p50_ms']:>9.1f} "
+                  f"{result['p95_ms']:>9.1f} {result['busy']:>6} {result['errors']:>8}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
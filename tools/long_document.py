@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Análisis de documentos largos por fragmentos - Tutorium
+Para textos que superan `MAX_TEXT_LENGTH` (tesis, ensayos completos): el
+texto se corta en fragmentos de oraciones completas de hasta
+`LONG_DOCUMENT_SHARD_CHARS` caracteres, cada fragmento se analiza por
+separado (en paralelo en los procesos del pool) y los resultados se combinan
+en el proceso que atiende la petición.
+
+Cada fragmento retorna sólo lo necesario para combinar (`ShardSummary`): sus
+coincidencias en una `MatchTable` con posiciones relativas al fragmento, sus
+palabras distintas y sus contadores. Las posiciones se desplazan al offset
+del fragmento y las puntuaciones de documento salen de los contadores
+sumados, igual que en el análisis incremental (ver `incremental_analysis`):
+el resultado es idéntico al de `LanguageScoringSystem.analyze_text` sobre el
+texto completo.
+
+La memoria no crece con el documento: los fragmentos se generan a medida que
+se envían, hay como mucho `window` fragmentos en curso y de cada fragmento
+ya combinado sólo quedan sus coincidencias (que forman parte de la
+respuesta) y sus palabras distintas en el conjunto del documento.
+
+Si alguna regla o frase del idioma puede atravesar un separador de oración
+(`RuleEngine.sentence_local` es False) el documento es un único fragmento.
+"""
+
+from array import array
+from collections import deque
+from typing import Callable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from analysis_result import MATCH_KINDS, AnalysisResult, MatchTable
+from config import SystemConfig
+from incremental_analysis import SEGMENT_END
+from rule_engine import RuleEngine
+from tokenizer import TokenStream
+from vocabulary_index import LevelStream
+
+_PHRASE_CODE = MATCH_KINDS.index(RuleEngine.PHRASE_KIND)
+
+
+class ShardSummary(NamedTuple):
+    """Lo que un fragmento aporta al documento (posiciones relativas a él)."""
+    matches: MatchTable
+    word_count: int
+    unique_words: List[str]
+    boundaries: int          # separadores de oración dentro del fragmento
+    weighted_hits: int       # aciertos de nivel contados sólo en el fragmento
+    head_terms: List[str]    # primeras palabras (para frases entre fragmentos)
+    tail_terms: List[str]    # últimas palabras
+
+
+def iter_shards(text: str, max_chars: int) -> Iterator[Tuple[int, str]]:
+    """
+    (offset, texto) de fragmentos de oraciones consecutivas de hasta
+    `max_chars` caracteres; concatenados reproducen `text`. Una oración más
+    larga que `max_chars` forma un fragmento por sí sola.
+    """
+    start = 0
+    end = 0
+    for match in SEGMENT_END.finditer(text):
+        if match.end() - start > max_chars and end > start:
+            yield start, text[start:end]
+            start = end
+        end = match.end()
+    if len(text) - start > max_chars and end > start:
+        yield start, text[start:end]
+        start = end
+    yield start, text[start:]
+
+
+def analyze_shard(scorer, language: str, text: str) -> ShardSummary:
+    """Escanea y tokeniza un fragmento suelto."""
+    tokens = TokenStream(text)
+    index = scorer.vocabulary_indexes[language]
+    terms = tokens.terms
+    reach = index.max_phrase_words - 1
+    return ShardSummary(
+        MatchTable.from_matches(scorer._scan_rules(text, language, tokens)),
+        tokens.word_count, list(tokens.unique_words), len(tokens.sentence_boundaries),
+        index.weighted_hits(terms),
+        terms[:reach] if reach else [], terms[-reach:] if reach else []
+    )
+
+
+class DocumentMerger:
+    """
+    Combina los fragmentos en orden. Guarda los contadores del documento,
+    las palabras distintas y las coincidencias ya desplazadas.
+    """
+
+    def __init__(self, scorer, language: str):
+        self.scorer = scorer
+        self.language = language
+        self.index = scorer.vocabulary_indexes[language]
+        self.shards = 0
+        self.word_total = 0
+        self.boundaries = 0
+        self.weighted_hits = 0
+        self.unique_words: Set[str] = set()
+        self.unique_length = 0
+        # Alguna frase del índice cruza de un fragmento a otro
+        self.crossed = False
+        self._tail: List[str] = []
+        self._rule_rows: List[Tuple[int, int, int, int]] = []
+        self._phrase_rows = array('q')
+
+    def add(self, offset: int, shard: ShardSummary) -> None:
+        self.shards += 1
+        self.word_total += shard.word_count
+        self.boundaries += shard.boundaries
+        self.weighted_hits += shard.weighted_hits
+        unique_words = self.unique_words
+        for word in shard.unique_words:
+            if word not in unique_words:
+                unique_words.add(word)
+                self.unique_length += len(word)
+
+        reach = self.index.max_phrase_words - 1
+        if shard.head_terms:
+            if self._tail and self.index.crosses(self._tail, shard.head_terms):
+                self.crossed = True
+            if len(shard.head_terms) < reach:
+                self._tail = (self._tail + shard.head_terms)[-reach:]
+            else:
+                self._tail = shard.tail_terms
+
+        rows = shard.matches.rows
+        for position in range(0, len(rows), 4):
+            kind, rule_index = rows[position], rows[position + 1]
+            start, end = rows[position + 2] + offset, rows[position + 3] + offset
+            if kind == _PHRASE_CODE:
+                self._phrase_rows.extend((kind, rule_index, start, end))
+            else:
+                self._rule_rows.append((kind, rule_index, start, end))
+
+    def document_weighted_hits(self, text: str, shard_chars: int) -> int:
+        """
+        Aciertos de nivel del documento: la suma por fragmento salvo que una
+        expresión cruce entre fragmentos, caso en el que se recuentan las
+        palabras del texto fragmento a fragmento con `LevelStream`.
+        """
+        if not self.crossed:
+            return self.weighted_hits
+        stream = LevelStream(self.index)
+        for _, piece in iter_shards(text, shard_chars):
+            stream.feed(TokenStream(piece).terms)
+        return stream.weighted_hits()
+
+    def result(self, text: str, shard_chars: int) -> AnalysisResult:
+        """El análisis del documento completo."""
+        # Mismo orden que `RuleEngine.scan`: categoría, regla y posición; las
+        # frases van después, en orden de aparición
+        rows = array('q')
+        for row in sorted(self._rule_rows):
+            rows.extend(row)
+        rows.extend(self._phrase_rows)
+        matches = MatchTable(rows)
+
+        scorer = self.scorer
+        errors_found, issues_found = matches.counts()
+        word_total = self.word_total
+        if word_total:
+            vocabulary = scorer._vocabulary_score(
+                word_total, len(self.unique_words), self.unique_length,
+                self.document_weighted_hits(text, shard_chars))
+        else:
+            vocabulary = 0
+        scores = {
+            'grammar': scorer._grammar_score(errors_found, word_total),
+            'syntax': scorer._syntax_score(self.boundaries + 1, issues_found),
+            'vocabulary': vocabulary,
+            'pronunciation': 85  # Placeholder para audio
+        }
+        return AnalysisResult(
+            self.language, word_total, scores['grammar'], scores['syntax'],
+            scores['vocabulary'], scores['pronunciation'],
+            scorer._calculate_overall_score(scores),
+            matches=matches, text=text, engine=scorer.rule_engines.get(self.language))
+
+
+class _Done:
+    """Resultado ya calculado con la interfaz de `AsyncResult.get`."""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self, timeout: Optional[float] = None):
+        return self.value
+
+
+def shard_size(scorer, language: str, text: str, shard_chars: Optional[int] = None) -> int:
+    """Tamaño de fragmento para el idioma: todo el texto si no hay reglas locales."""
+    engine = scorer.rule_engines.get(language)
+    if engine is None or not engine.sentence_local:
+        return max(len(text), 1)
+    return shard_chars or SystemConfig.LONG_DOCUMENT_SHARD_CHARS
+
+
+def analyze_document(scorer, text: str, language: str = 'en',
+                     submit: Optional[Callable[[str], object]] = None,
+                     window: int = 1, shard_chars: Optional[int] = None,
+                     timeout: Optional[float] = None) -> Tuple[AnalysisResult, int]:
+    """
+    Analiza un documento largo; retorna (resultado, número de fragmentos).
+
+    `submit(texto)` lanza el análisis de un fragmento y retorna un objeto con
+    `get(timeout)` (p. ej. `AsyncResult` del pool); sin él los fragmentos se
+    analizan en este proceso. Se mantienen como mucho `window` fragmentos en
+    curso y se combinan en orden.
+    """
+    if language not in scorer.supported_languages:
+        raise ValueError(f"Language {language} not supported")
+    if submit is None:
+        submit = lambda piece: _Done(analyze_shard(scorer, language, piece))
+
+    size = shard_size(scorer, language, text, shard_chars)
+    merger = DocumentMerger(scorer, language)
+    pending: deque = deque()
+    for offset, piece in iter_shards(text, size):
+        if len(pending) >= max(window, 1):
+            done_offset, task = pending.popleft()
+            merger.add(done_offset, task.get(timeout))
+        pending.append((offset, submit(piece)))
+    while pending:
+        done_offset, task = pending.popleft()
+        merger.add(done_offset, task.get(timeout))
+    return merger.result(text, size), merger.shards
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Métricas de latencia del Sistema de Puntuación de Idiomas - Tutorium
+Histogramas en memoria por etapa del análisis (idioma y tamaño de texto) y
+por ruta HTTP, exportados en formato de texto de Prometheus.
+
+Cada proceso tiene su propio registro (`REGISTRY`). Los procesos del pool de
+puntuación devuelven con cada resultado las observaciones acumuladas desde la
+última llamada (`drain`) y el proceso HTTP las suma a su registro (`merge`),
+de modo que `/api/metrics` refleja el trabajo de todos los procesos.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import SystemConfig
+
+# Límites superiores de los buckets en segundos (+Inf implícito)
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Tamaños de texto (caracteres) para la etiqueta `length`
+LENGTH_BUCKETS = (200, 1000, 5000)
+
+STAGE_METRIC = 'tutorium_stage_duration_seconds'
+REQUEST_METRIC = 'tutorium_request_duration_seconds'
+
+HELP = {
+    STAGE_METRIC: 'Duración de cada etapa del análisis de texto',
+    REQUEST_METRIC: 'Duración de cada petición HTTP de la API',
+}
+
+LABELS = {
+    STAGE_METRIC: ('stage', 'language', 'length'),
+    REQUEST_METRIC: ('route', 'method', 'status'),
+}
+
+# Serie: (métrica, valores de etiquetas) -> [conteos por bucket..., suma, total]
+Snapshot = Dict[Tuple[str, Tuple[str, ...]], List[float]]
+
+
+def length_bucket(length: int) -> str:
+    """Etiqueta del bucket de tamaño para un texto de `length` caracteres."""
+    for limit in LENGTH_BUCKETS:
+        if length <= limit:
+            return f'<={limit}'
+    return f'>{LENGTH_BUCKETS[-1]}'
+
+
+class MetricsRegistry:
+    """
+    Histogramas de duración sin dependencias externas.
+
+    `observe` sólo toma un lock e incrementa contadores, por lo que puede
+    llamarse en cada etapa de cada petición.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._series: Snapshot = {}
+        self._lock = threading.Lock()
+
+    def observe(self, metric: str, labels: Tuple[str, ...], seconds: float) -> None:
+        """Registra una duración en la serie indicada."""
+        if not self.enabled:
+            return
+        index = len(DURATION_BUCKETS)
+        for i, limit in enumerate(DURATION_BUCKETS):
+            if seconds <= limit:
+                index = i
+                break
+        key = (metric, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(DURATION_BUCKETS) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def observe_stage(self, stage: str, language: str, length: int, seconds: float) -> None:
+        """Atajo para la duración de una etapa del análisis."""
+        self.observe(STAGE_METRIC, (stage, language, length_bucket(length)), seconds)
+
+    def stage_timer(self, language: str, length: int) -> 'StageTimer':
+        """Cronómetro de etapas consecutivas de un mismo análisis."""
+        return StageTimer(self, language, length_bucket(length))
+
+    def snapshot(self) -> Snapshot:
+        """Copia de todas las series."""
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    def drain(self) -> Snapshot:
+        """Retorna las series acumuladas y las reinicia (para enviar a otro proceso)."""
+        with self._lock:
+            series, self._series = self._series, {}
+        return series
+
+    def merge(self, snapshot: Optional[Snapshot]) -> None:
+        """Suma a este registro las series de otro proceso."""
+        if not snapshot:
+            return
+        with self._lock:
+            for key, values in snapshot.items():
+                series = self._series.get(key)
+                if series is None:
+                    self._series[key] = list(values)
+                    continue
+                for i, value in enumerate(values):
+                    series[i] += value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> str:
+        """Exporta las series en formato de texto de Prometheus."""
+        snapshot = self.snapshot()
+        lines: List[str] = []
+        for metric in (STAGE_METRIC, REQUEST_METRIC):
+            lines.append(f'# HELP {metric} {HELP[metric]}')
+            lines.append(f'# TYPE {metric} histogram')
+            names = LABELS[metric]
+            for (name, labels), series in sorted(snapshot.items()):
+                if name != metric:
+                    continue
+                base = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(names, labels))
+                cumulative = 0
+                for limit, count in zip(DURATION_BUCKETS + (float('inf'),), series):
+                    cumulative += count
+                    bound = '+Inf' if limit == float('inf') else repr(limit)
+                    lines.append(f'{metric}_bucket{{{base},le="{bound}"}} {int(cumulative)}')
+                lines.append(f'{metric}_sum{{{base}}} {series[-2]!r}')
+                lines.append(f'{metric}_count{{{base}}} {int(series[-1])}')
+        return '\n'.join(lines) + '\n'
+
+
+class StageTimer:
+    """Mide etapas consecutivas: cada `mark` registra el tiempo desde la anterior."""
+
+    __slots__ = ('registry', 'language', 'length', 'started', 'last')
+
+    def __init__(self, registry: MetricsRegistry, language: str, length: str):
+        self.registry = registry
+        self.language = language
+        self.length = length
+        self.started = self.last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        """Registra la etapa que acaba de terminar."""
+        now = time.perf_counter()
+        self.registry.observe(STAGE_METRIC, (stage, self.language, self.length), now - self.last)
+        self.last = now
+
+    def total(self, stage: str = 'total') -> None:
+        """Registra la duración completa desde que se creó el cronómetro."""
+        self.registry.observe(STAGE_METRIC, (stage, self.language, self.length),
+                              time.perf_counter() - self.started)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Registro del proceso actual
+REGISTRY = MetricsRegistry(enabled=SystemConfig.METRICS_ENABLED)
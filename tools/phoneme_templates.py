@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Índice de plantillas de pronunciación - Tutorium
+Paso offline que convierte grabaciones (o rasgos ya calculados) de
+referencia en un índice compacto en disco: un array `.npy` float32 por
+fonema o palabra con las tramas log-mel de todas sus grabaciones una tras
+otra, y un `manifest.json` con los rangos de cada grabación.
+
+Los workers de la API abren el índice con `np.load(mmap_mode='r')`: los
+arrays se proyectan en memoria sin copiarlos ni decodificar audio, y las
+páginas las comparte el sistema operativo entre todos los procesos que
+mapean el mismo archivo.
+
+Estructura de las referencias (`build`):
+    <origen>/<idioma>/<unidad>/<grabación>.wav|.flac|.npy
+    <origen>/<idioma>/<unidad>.wav|.flac|.npy
+Las unidades que coinciden con `pronunciation_phonemes` (sin las barras,
+p. ej. `θ` para `/θ/`) son fonemas; el resto, palabras.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import SystemConfig
+from speech_analysis import spectral_features
+
+MANIFEST_NAME = 'manifest.json'
+INDEX_FORMAT_VERSION = 1
+
+AUDIO_EXTENSIONS = ('.wav', '.flac')
+FEATURE_EXTENSION = '.npy'
+
+
+class TemplateIndexError(ValueError):
+    """El índice no existe, está incompleto o se construyó con otros rasgos."""
+
+
+class TemplateEntry(NamedTuple):
+    """Una unidad del índice: archivo y rangos de tramas de cada grabación."""
+    language: str
+    unit: str                       # fonema con barras ('/θ/') o palabra
+    kind: str                       # 'phoneme' | 'word'
+    file: str                       # relativo al directorio del índice
+    ranges: List[Tuple[int, int]]   # [inicio, fin) de cada grabación
+
+
+def feature_spec(frame_ms: Optional[int] = None, bands: Optional[int] = None) -> Dict:
+    """Parámetros de los rasgos; el índice sólo sirve con los mismos."""
+    return {
+        'kind': 'log_mel',
+        'frame_ms': frame_ms or SystemConfig.SPEECH_FRAME_MS,
+        'bands': bands or SystemConfig.SPEECH_FEATURE_BANDS,
+    }
+
+
+def _reference_files(language_dir: str) -> Iterator[Tuple[str, List[str]]]:
+    """(unidad, archivos) de cada unidad del directorio de un idioma."""
+    extensions = AUDIO_EXTENSIONS + (FEATURE_EXTENSION,)
+    for name in sorted(os.listdir(language_dir)):
+        path = os.path.join(language_dir, name)
+        if os.path.isdir(path):
+            files = [os.path.join(path, child) for child in sorted(os.listdir(path))
+                     if child.lower().endswith(extensions)]
+            if files:
+                yield name, files
+        elif name.lower().endswith(extensions):
+            yield os.path.splitext(name)[0], [path]
+
+
+def _load_reference(path: str, spec: Dict) -> np.ndarray:
+    """Tramas de una referencia: se extraen del audio o se leen del `.npy`."""
+    if path.lower().endswith(FEATURE_EXTENSION):
+        features = np.load(path)
+        if features.ndim != 2 or features.shape[1] != spec['bands']:
+            raise TemplateIndexError(
+                f"{path}: expected (frames, {spec['bands']}) features, got {features.shape}")
+        return features.astype(np.float32)
+    with open(path, 'rb') as handle:
+        return spectral_features(handle, spec['frame_ms'], spec['bands'])
+
+
+def build_index(source: str, output: str, frame_ms: Optional[int] = None,
+                bands: Optional[int] = None) -> Dict:
+    """
+    Construye el índice de `source` en `output` y retorna el manifiesto. El
+    manifiesto se escribe el último, así que un índice a medio construir
+    nunca se abre.
+
+    Los arrays de cada construcción van a un subdirectorio nuevo
+    (`build-*`) y nunca se sobrescriben: un worker que aún usa el manifiesto
+    anterior (los arrays se mapean al pedirlos) sigue leyendo los archivos
+    de su construcción. Los directorios de construcciones anteriores se
+    pueden borrar cuando ningún worker los use.
+    """
+    spec = feature_spec(frame_ms, bands)
+    languages = sorted(name for name in os.listdir(source)
+                       if name in SystemConfig.LANGUAGES
+                       and os.path.isdir(os.path.join(source, name)))
+    os.makedirs(output, exist_ok=True)
+    build = os.path.basename(tempfile.mkdtemp(dir=output, prefix='build-'))
+
+    entries = []
+    missing = {}
+    for language in languages:
+        os.makedirs(os.path.join(output, build, language))
+        phonemes = SystemConfig.get_language_config(language).pronunciation_phonemes
+        covered = set()
+        for number, (name, files) in enumerate(_reference_files(os.path.join(source, language))):
+            unit = f'/{name}/'
+            kind = 'phoneme' if unit in phonemes else 'word'
+            if kind == 'word':
+                unit = name
+            covered.add(unit)
+
+            arrays = [features for features in (_load_reference(path, spec) for path in files)
+                      if len(features)]
+            if not arrays:
+                continue
+            bounds = np.cumsum([0] + [len(features) for features in arrays])
+            relative = f'{build}/{language}/{number:05d}.npy'
+            frames = np.concatenate(arrays).astype(np.float32, copy=False)
+            np.save(os.path.join(output, relative), frames)
+            entries.append({
+                'language': language,
+                'unit': unit,
+                'kind': kind,
+                'file': relative,
+                'ranges': [[int(start), int(end)] for start, end in zip(bounds[:-1], bounds[1:])],
+            })
+        missing[language] = [phoneme for phoneme in phonemes if phoneme not in covered]
+
+    manifest = {
+        'version': INDEX_FORMAT_VERSION,
+        'build': build,
+        'features': spec,
+        'templates': entries,
+        'missing_phonemes': missing,
+    }
+    handle, temporary = tempfile.mkstemp(dir=output, suffix='.tmp')
+    with os.fdopen(handle, 'w', encoding='utf-8') as manifest_file:
+        json.dump(manifest, manifest_file, ensure_ascii=False, indent=2)
+    os.replace(temporary, os.path.join(output, MANIFEST_NAME))
+    return manifest
+
+
+class TemplateIndex:
+    """
+    Índice abierto en modo sólo lectura. Cada array se mapea la primera vez
+    que se pide y el mapeo se reutiliza; `templates()` retorna vistas sobre
+    él, sin copias.
+    """
+
+    def __init__(self, path: str, frame_ms: Optional[int] = None,
+                 bands: Optional[int] = None):
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        try:
+            with open(manifest_path, encoding='utf-8') as handle:
+                manifest = json.load(handle)
+        except FileNotFoundError as e:
+            raise TemplateIndexError(f'No template index at {path}') from e
+        if manifest.get('version') != INDEX_FORMAT_VERSION:
+            raise TemplateIndexError(f"Unsupported template index version: {manifest.get('version')}")
+        if manifest['features'] != feature_spec(frame_ms, bands):
+            raise TemplateIndexError(
+                f"Template index features {manifest['features']} do not match the configuration")
+
+        self.path = path
+        self.build = manifest.get('build')
+        self.features = manifest['features']
+        self.missing_phonemes: Dict[str, List[str]] = manifest.get('missing_phonemes', {})
+        self.entries: Dict[Tuple[str, str], TemplateEntry] = {
+            (item['language'], item['unit']): TemplateEntry(
+                item['language'], item['unit'], item['kind'], item['file'],
+                [tuple(bounds) for bounds in item['ranges']])
+            for item in manifest['templates']
+        }
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def units(self, language: str, kind: Optional[str] = None) -> List[str]:
+        """Unidades del idioma (opcionalmente sólo 'phoneme' o 'word')."""
+        return [entry.unit for (entry_language, _), entry in self.entries.items()
+                if entry_language == language and (kind is None or entry.kind == kind)]
+
+    def array(self, language: str, unit: str) -> np.ndarray:
+        """Array mapeado con todas las tramas de la unidad (frames x bands)."""
+        entry = self.entries.get((language, unit))
+        if entry is None:
+            raise KeyError((language, unit))
+        array = self._arrays.get(entry.file)
+        if array is None:
+            with self._lock:
+                array = self._arrays.get(entry.file)
+                if array is None:
+                    array = np.load(os.path.join(self.path, entry.file), mmap_mode='r')
+                    self._arrays[entry.file] = array
+        return array
+
+    def map_all(self) -> 'TemplateIndex':
+        """
+        Mapea ya todos los arrays (sin leerlos). Antes de crear los procesos
+        hijos, éstos heredan los mapeos en lugar de abrir cada archivo.
+        """
+        for language, unit in self.entries:
+            self.array(language, unit)
+        return self
+
+    def templates(self, language: str, unit: str) -> List[np.ndarray]:
+        """Una vista (frames x bands) por grabación de referencia de la unidad."""
+        array = self.array(language, unit)
+        return [array[start:end] for start, end in self.entries[(language, unit)].ranges]
+
+    def stats(self) -> Dict:
+        return {
+            'path': self.path,
+            'build': self.build,
+            'features': self.features,
+            'units': len(self.entries),
+            'templates': sum(len(entry.ranges) for entry in self.entries.values()),
+            'mapped_files': len(self._arrays),
+            'mapped_bytes': sum(array.nbytes for array in self._arrays.values()),
+            'missing_phonemes': self.missing_phonemes,
+        }
+
+
+_index: Optional[TemplateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_template_index() -> Optional[TemplateIndex]:
+    """
+    Índice compartido del proceso (`SystemConfig.PHONEME_TEMPLATE_INDEX`), o
+    None si no se ha construido. Si se abre antes de crear los workers, los
+    procesos hijos heredan el mapeo.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = TemplateIndex(SystemConfig.PHONEME_TEMPLATE_INDEX)
+                except TemplateIndexError:
+                    return None
+    return _index
+
+
+def main() -> int:
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Índice de plantillas de pronunciación")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Construir el índice desde las referencias')
+    build.add_argument('source', help='Directorio <idioma>/<unidad>/... con las referencias')
+    build.add_argument('--output', default=SystemConfig.PHONEME_TEMPLATE_INDEX)
+    info = subparsers.add_parser('info', help='Resumen de un índice construido')
+    info.add_argument('--path', default=SystemConfig.PHONEME_TEMPLATE_INDEX)
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'build':
+            manifest = build_index(args.source, args.output)
+            print(f"Índice guardado en {args.output}: {len(manifest['templates'])} unidades")
+            for language, phonemes in manifest['missing_phonemes'].items():
+                if phonemes:
+                    print(f"  {language}: sin referencias para {' '.join(phonemes)}")
+        else:
+            index = TemplateIndex(args.path)
+            for language in sorted({language for language, _ in index.entries}):
+                phonemes = index.units(language, 'phoneme')
+                words = index.units(language, 'word')
+                print(f"{language}: {len(phonemes)} fonemas, {len(words)} palabras")
+            print(json.dumps(index.stats()['features']))
+    except TemplateIndexError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
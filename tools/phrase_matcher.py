@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Buscador de frases literales (Aho–Corasick) - Tutorium
+Construye una sola vez un autómata con todas las frases de error de un
+idioma (`SystemConfig.common_errors`) y encuentra todas sus apariciones en
+una única pasada sobre el texto, O(n + coincidencias).
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterator, List, Tuple
+
+_WORD_CHAR = re.compile(r'\w')
+
+
+class PhraseMatcher:
+    """
+    Autómata Aho–Corasick sobre frases en minúsculas.
+
+    `search` recibe el texto ya en minúsculas (con los mismos offsets que el
+    original) y genera (inicio, fin, índice de frase) para cada aparición
+    delimitada por fronteras de palabra, en orden de fin.
+    """
+
+    def __init__(self, phrases: List[str]):
+        self.phrases = [phrase.lower() for phrase in phrases]
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[Tuple[int, ...]] = [()]
+
+        for index, phrase in enumerate(self.phrases):
+            if not phrase:
+                continue
+            state = 0
+            for char in phrase:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._outputs.append(())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._outputs[state] += (index,)
+
+        # Enlaces de fallo por anchura; cada estado hereda las salidas de su fallo
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] += self._outputs[self._fail[next_state]]
+
+        # Las fronteras sólo se exigen en los extremos que son letra/dígito
+        self._bounded = [
+            (bool(phrase) and bool(_WORD_CHAR.match(phrase[0])),
+             bool(phrase) and bool(_WORD_CHAR.match(phrase[-1])))
+            for phrase in self.phrases
+        ]
+
+    def __len__(self) -> int:
+        return len(self.phrases)
+
+    @property
+    def states(self) -> int:
+        """Número de estados del autómata."""
+        return len(self._goto)
+
+    def search(self, lower: str) -> Iterator[Tuple[int, int, int]]:
+        """Genera (inicio, fin, frase) para cada aparición en `lower`."""
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        phrases = self.phrases
+        bounded = self._bounded
+        size = len(lower)
+        state = 0
+        for position, char in enumerate(lower):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not outputs[state]:
+                continue
+            end = position + 1
+            for index in outputs[state]:
+                start = end - len(phrases[index])
+                check_start, check_end = bounded[index]
+                if check_start and start > 0 and _WORD_CHAR.match(lower[start - 1]):
+                    continue
+                if check_end and end < size and _WORD_CHAR.match(lower[end]):
+                    continue
+                yield start, end, index
+
+    def find_all(self, lower: str) -> List[Tuple[int, int, int]]:
+        """
+        Apariciones sin solapamiento: de izquierda a derecha y, en la misma
+        posición, la frase más larga.
+        """
+        hits = sorted(self.search(lower), key=lambda hit: (hit[0], -hit[1]))
+        selected = []
+        last_end = 0
+        for start, end, index in hits:
+            if start >= last_end:
+                selected.append((start, end, index))
+                last_end = end
+        return selected
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Acumulador incremental de progreso para el Sistema de Puntuación - Tutorium
+Mantiene los agregados del reporte de progreso (promedios por habilidad y
+ventanas de primeros/últimos análisis) sin guardar el historial completo.
+"""
+
+from typing import Dict, List, Optional
+
+SKILLS = ('grammar', 'syntax', 'vocabulary', 'pronunciation')
+WINDOW_SIZE = 5  # primeros/últimos análisis usados para la tendencia
+
+
+class ProgressAccumulator:
+    """
+    Agregados de progreso de un estudiante.
+
+    Se actualiza con un análisis cada vez (en orden cronológico), se
+    serializa con `to_dict`/`from_dict` y se combina con `merge` cuando el
+    historial está repartido en fragmentos consecutivos. Las ventanas guardan
+    una lista de puntuaciones por análisis en el orden de `SKILLS`, con None
+    para las habilidades ausentes.
+    """
+
+    __slots__ = ('total_sessions', 'sums', 'counts', 'first_window', 'last_window')
+
+    def __init__(self):
+        self.total_sessions = 0
+        self.sums: List[float] = [0] * len(SKILLS)
+        self.counts: List[int] = [0] * len(SKILLS)
+        self.first_window: List[List[Optional[float]]] = []
+        self.last_window: List[List[Optional[float]]] = []
+
+    def update(self, analysis) -> 'ProgressAccumulator':
+        """
+        Añade un análisis: un diccionario con `scores` o un `AnalysisResult`,
+        cuyas puntuaciones se leen directamente de sus atributos.
+        """
+        if isinstance(analysis, dict):
+            return self.update_scores(analysis['scores'])
+        return self.update_row(analysis.score_row())
+
+    def update_scores(self, scores: Dict[str, float]) -> 'ProgressAccumulator':
+        """Añade las puntuaciones de un análisis."""
+        return self.update_row([scores.get(skill) for skill in SKILLS])
+
+    def update_row(self, row: List[Optional[float]]) -> 'ProgressAccumulator':
+        """Añade una fila de puntuaciones en el orden de `SKILLS` (None si falta)."""
+        for i, score in enumerate(row):
+            if score is not None:
+                self.sums[i] += score
+                self.counts[i] += 1
+        self.total_sessions += 1
+        if len(self.first_window) < WINDOW_SIZE:
+            self.first_window.append(row)
+        self.last_window.append(row)
+        if len(self.last_window) > WINDOW_SIZE:
+            del self.last_window[0]
+        return self
+
+    def merge(self, other: 'ProgressAccumulator') -> 'ProgressAccumulator':
+        """
+        Combina con el acumulador del fragmento siguiente del historial.
+        Con puntuaciones enteras el resultado es exacto; con decimales las
+        sumas pueden diferir en el último bit del cálculo secuencial.
+        """
+        for i in range(len(SKILLS)):
+            self.sums[i] += other.sums[i]
+            self.counts[i] += other.counts[i]
+        self.total_sessions += other.total_sessions
+        self.first_window = (self.first_window + other.first_window)[:WINDOW_SIZE]
+        self.last_window = (self.last_window + other.last_window)[-WINDOW_SIZE:]
+        return self
+
+    def average_scores(self) -> Dict[str, float]:
+        """Promedio por habilidad sobre los análisis que la incluyen."""
+        return {
+            skill: self.sums[i] / self.counts[i] if self.counts[i] else 0
+            for i, skill in enumerate(SKILLS)
+        }
+
+    def trends(self) -> Dict[str, float]:
+        """Diferencia entre el promedio de los últimos y los primeros análisis."""
+        trends = {}
+        for i, skill in enumerate(SKILLS):
+            recent = sum(row[i] or 0 for row in self.last_window) / len(self.last_window)
+            old = sum(row[i] or 0 for row in self.first_window) / len(self.first_window)
+            trends[skill] = recent - old
+        return trends
+
+    def to_dict(self) -> Dict:
+        """Estado serializable en JSON."""
+        return {
+            'total_sessions': self.total_sessions,
+            'sums': list(self.sums),
+            'counts': list(self.counts),
+            'first_window': [list(row) for row in self.first_window],
+            'last_window': [list(row) for row in self.last_window],
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'ProgressAccumulator':
+        """Reconstruye un acumulador serializado con `to_dict`."""
+        accumulator = cls()
+        accumulator.total_sessions = state['total_sessions']
+        accumulator.sums = list(state['sums'])
+        accumulator.counts = list(state['counts'])
+        accumulator.first_window = [list(row) for row in state['first_window']]
+        accumulator.last_window = [list(row) for row in state['last_window']]
+        return accumulator
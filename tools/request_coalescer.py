@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Agrupación de peticiones idénticas en vuelo - Tutorium
+Cuando varias peticiones con la misma clave llegan mientras la primera aún
+se está procesando, todas esperan el resultado de una única ejecución.
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Optional
+
+
+class RequestCoalescer:
+    """
+    Ejecuta `func(*args)` en un executor una sola vez por clave en vuelo.
+
+    La primera petición de una clave lanza la ejecución como tarea propia;
+    las que llegan mientras tanto esperan la misma tarea y cuentan como
+    agrupadas. Los errores se propagan a todas las peticiones que esperaban.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None):
+        self.executor = executor
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.requests = 0
+        self.executions = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, func: Callable[..., Any], *args) -> Any:
+        """Retorna el resultado de `func(*args)`, compartido por clave."""
+        self.requests += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(self._execute(key, func, args))
+            self._in_flight[key] = task
+        else:
+            self.coalesced += 1
+        # shield: si una petición se cancela, la ejecución sigue para las demás
+        return await asyncio.shield(task)
+
+    async def _execute(self, key: str, func: Callable[..., Any], args: tuple) -> Any:
+        """Ejecuta la función en el executor y libera la clave al terminar."""
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de peticiones, ejecuciones reales y agrupadas."""
+        return {
+            'requests': self.requests,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._in_flight),
+        }
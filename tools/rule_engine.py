@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Motor de reglas compilado para el Sistema de Puntuación de Idiomas - Tutorium
+Compila todas las reglas regex de un idioma una sola vez y recorre el texto
+en un único escaneo que emite coincidencias etiquetadas (gramática/sintaxis).
+Las frases de error literales se buscan con un autómata Aho–Corasick.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from phrase_matcher import PhraseMatcher
+from tokenizer import WORD_PATTERN, TokenStream
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Límite de palabras iniciales que se expanden por regla antes de desistir
+MAX_TRIGGER_WORDS = 64
+
+_WORD_CHAR = re.compile(r'\w')
+
+# Separadores de oración que una coincidencia no debe poder atravesar
+_SENTENCE_CHARS = frozenset(ord(char) for char in '.!?')
+
+# Equivalencias de `re.IGNORECASE` que no salen de `upper()`/`lower()` de un
+# carácter (sus mayúsculas son de varios caracteres o, en `İ`, lo es su
+# minúscula). Con escapes: las parejas griegas son canónicamente equivalentes
+# y un editor que normalice a NFC las convertiría en el mismo carácter
+_FOLD_EXCEPTIONS = {
+    '\u0130': 'i',  # İ
+    '\u1fd3': '\u0390',  # ΐ (oxia) -> ΐ (tonos)
+    '\u1fe3': '\u03b0',  # ΰ (oxia) -> ΰ (tonos)
+    '\ufb05': '\ufb06',  # ﬅ -> ﬆ
+}
+
+
+@lru_cache(maxsize=None)
+def _fold_char(char: str) -> str:
+    """Representante de la clase de `char` bajo `re.IGNORECASE`."""
+    folded = _FOLD_EXCEPTIONS.get(char)
+    if folded is not None:
+        return folded
+    # Los caracteres con la misma mayúscula son equivalentes (`ı`, `ſ`, `ς`...)
+    upper = char.upper()
+    if len(upper) == 1 and len(upper.lower()) == 1:
+        return upper.lower()
+    lower = char.lower()
+    return lower if len(lower) == 1 else char
+
+
+def fold_case(word: str) -> str:
+    """
+    Clave de una palabra con el mismo plegado de mayúsculas que
+    `re.IGNORECASE`: `İ` y `ı` pasan a `i`, `ſ` a `s`, `ς` y `σ` se
+    igualan. En ASCII equivale a `lower()`. Las reglas candidatas se
+    verifican siempre con el patrón compilado.
+    """
+    if word.isascii():
+        return word.lower()
+    return ''.join(map(_fold_char, word))
+
+
+class RuleMatch(NamedTuple):
+    """Coincidencia de una regla sobre el texto."""
+    kind: str        # 'grammar' | 'syntax' | 'phrase'
+    rule_index: int  # índice de la regla (o frase) dentro de su categoría
+    start: int
+    end: int
+    text: str
+
+
+class Rule(NamedTuple):
+    """Regla individual ya normalizada."""
+    kind: str
+    index: int
+    pattern: str
+    message: str
+
+
+def _trigger_words(items: list, prefix: str = '') -> Optional[Set[str]]:
+    """
+    Retorna el conjunto de palabras completas con las que puede empezar la
+    secuencia `items` (ya sin el `\\b` inicial), o None si no se puede
+    determinar de forma exacta.
+    """
+    for i, (op, av) in enumerate(items):
+        if op is sre_parse.LITERAL:
+            char = chr(av)
+            if _WORD_CHAR.match(char):
+                prefix += char
+                continue
+            return {fold_case(prefix)} if prefix else None
+        if op is sre_parse.AT and av is sre_parse.AT_BOUNDARY:
+            return {fold_case(prefix)} if prefix else None
+        if op is sre_parse.SUBPATTERN:
+            _group, add_flags, del_flags, sub = av
+            if add_flags or del_flags:
+                return None
+            return _trigger_words(list(sub) + items[i + 1:], prefix)
+        if op is sre_parse.BRANCH or op is sre_parse.IN:
+            if op is sre_parse.BRANCH:
+                alternatives = [list(alt) for alt in av[1]]
+            elif all(item_op is sre_parse.LITERAL for item_op, _ in av):
+                alternatives = [[item] for item in av]
+            else:
+                return None
+            words: Set[str] = set()
+            for alternative in alternatives:
+                found = _trigger_words(alternative + items[i + 1:], prefix)
+                if found is None:
+                    return None
+                words |= found
+                if len(words) > MAX_TRIGGER_WORDS:
+                    return None
+            return words
+        return None
+    # La palabra no termina dentro del patrón: podría ser prefijo de otra
+    return None
+
+
+def _sentence_local(items) -> bool:
+    """
+    True si la secuencia nunca consume un separador de oración (`.`, `!`,
+    `?`) ni mira fuera de la coincidencia. Sólo se aceptan literales, clases
+    de palabra/dígito/espacio, `\\b`, grupos, alternativas y repeticiones.
+    """
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            if av in _SENTENCE_CHARS:
+                return False
+        elif op is sre_parse.AT:
+            if av not in (sre_parse.AT_BOUNDARY, sre_parse.AT_NON_BOUNDARY):
+                return False
+        elif op is sre_parse.IN:
+            for item_op, item_av in av:
+                if item_op is sre_parse.LITERAL:
+                    if item_av in _SENTENCE_CHARS:
+                        return False
+                elif item_op is sre_parse.RANGE:
+                    low, high = item_av
+                    if any(low <= char <= high for char in _SENTENCE_CHARS):
+                        return False
+                elif item_op is sre_parse.CATEGORY:
+                    if item_av not in (sre_parse.CATEGORY_WORD, sre_parse.CATEGORY_DIGIT,
+                                       sre_parse.CATEGORY_SPACE):
+                        return False
+                else:  # NEGATE y demás
+                    return False
+        elif op is sre_parse.SUBPATTERN:
+            if not _sentence_local(av[-1]):
+                return False
+        elif op is sre_parse.BRANCH:
+            if not all(_sentence_local(alternative) for alternative in av[1]):
+                return False
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT):
+            if not _sentence_local(av[-1]):
+                return False
+        else:
+            return False
+    return True
+
+
+def sentence_local(pattern: str, flags: int = re.IGNORECASE) -> bool:
+    """
+    True si ninguna coincidencia de `pattern` puede contener un separador de
+    oración: escanear cada oración por separado da las mismas coincidencias
+    que escanear el texto completo.
+    """
+    try:
+        return _sentence_local(sre_parse.parse(pattern, flags))
+    except re.error:
+        return False
+
+
+def rule_triggers(pattern: str, flags: int = re.IGNORECASE) -> Optional[Set[str]]:
+    """
+    Palabras (plegadas con `fold_case`) que deben aparecer completas en la
+    posición donde empieza cualquier coincidencia de `pattern`. Sólo se
+    indexan patrones que empiezan por `\\b` seguido de una palabra literal;
+    para el resto retorna None.
+    """
+    try:
+        items = list(sre_parse.parse(pattern, flags))
+    except re.error:
+        return None
+    if not items or items[0] != (sre_parse.AT, sre_parse.AT_BOUNDARY):
+        return None
+    words = _trigger_words(items[1:])
+    if not words or '' in words:
+        return None
+    return words
+
+
+class RuleEngine:
+    """
+    Motor de reglas de un idioma.
+
+    Las reglas que empiezan por una palabra literal (`\\bhe are\\b`,
+    `\\b(very|really) ...`) se indexan por esa palabra: el texto se tokeniza una
+    sola vez y en cada inicio de palabra sólo se prueban las reglas asociadas.
+    Las reglas restantes se unen en un lookahead combinado
+    (`(?=(?:(?P<r0>...)|(?P<r1>...)))`) que también recorre el texto una vez.
+    Los solapamientos se filtran por regla para reproducir exactamente la
+    semántica de `re.finditer` aplicada regla a regla.
+
+    `phrases` son pares literales (error, corrección); sus apariciones se
+    emiten como coincidencias `'phrase'` tras las de las reglas, sin
+    solaparse entre sí ni con una coincidencia gramatical de las reglas.
+    """
+
+    KINDS = ('grammar', 'syntax')
+    PHRASE_KIND = 'phrase'
+
+    def __init__(self, rules: Dict[str, List[Dict]], flags: int = re.IGNORECASE,
+                 phrases: Optional[List[Tuple[str, str]]] = None):
+        self.flags = flags
+        self.rules: List[Rule] = []
+        for kind in self.KINDS:
+            for index, rule in enumerate(rules.get(kind, [])):
+                message = rule.get('correction') if kind == 'grammar' else \
+                    rule.get('suggestion', rule.get('correction'))
+                self.rules.append(Rule(kind, index, rule['pattern'], message))
+
+        self.messages: Dict[str, List[str]] = {kind: [] for kind in self.KINDS}
+        for rule in self.rules:
+            self.messages[rule.kind].append(rule.message)
+
+        phrases = phrases or []
+        self.messages[self.PHRASE_KIND] = [correction for _, correction in phrases]
+        self.phrase_matcher = PhraseMatcher([error for error, _ in phrases])
+
+        self._compiled = [re.compile(rule.pattern, flags) for rule in self.rules]
+
+        # Índice palabra inicial -> reglas candidatas (en orden de regla)
+        self.triggers: Dict[str, List[int]] = {}
+        self._fallback: List[int] = []
+        for i, rule in enumerate(self.rules):
+            words = rule_triggers(rule.pattern, flags)
+            if words is None:
+                self._fallback.append(i)
+                continue
+            for word in words:
+                self.triggers.setdefault(word, []).append(i)
+
+        self._combined = self._compile_combined()
+
+        # Si ninguna regla ni frase cruza separadores de oración, el texto se
+        # puede escanear oración a oración (ver `incremental_analysis`)
+        self.sentence_local = (
+            all(sentence_local(rule.pattern, flags) for rule in self.rules)
+            and not any(_SENTENCE_CHARS & set(map(ord, error)) for error, _ in phrases)
+        )
+
+    def _compile_combined(self) -> Optional['re.Pattern']:
+        """Compila el lookahead de las reglas no indexables; None si no hay."""
+        if not self._fallback:
+            return None
+        alternatives = '|'.join(
+            f'(?P<r{i}>{self.rules[i].pattern})' for i in self._fallback
+        )
+        return re.compile(f'(?=(?:{alternatives}))', self.flags)
+
+    def __len__(self) -> int:
+        return len(self.rules) + len(self.phrase_matcher)
+
+    def _candidates(self, tokens: TokenStream):
+        """Genera (posición, reglas a probar) en orden creciente de posición."""
+        triggers = self.triggers
+        if tokens.aligned and tokens.lower.isascii():
+            # Camino rápido: en ASCII las palabras en minúsculas ya son la clave
+            for match in WORD_PATTERN.finditer(tokens.lower):
+                rule_ids = triggers.get(match.group())
+                if rule_ids:
+                    yield match.start(), rule_ids
+            return
+        # Fuera de ASCII `lower()` no pliega como `re.IGNORECASE` (`İ`, `ſ`)
+        source = tokens.lower if tokens.aligned else tokens.text
+        for match in WORD_PATTERN.finditer(source):
+            rule_ids = triggers.get(fold_case(match.group()))
+            if rule_ids:
+                yield match.start(), rule_ids
+
+    def _fallback_candidates(self, text: str):
+        """Posiciones del lookahead combinado con las reglas pendientes."""
+        fallback = self._fallback
+        for hit in self._combined.finditer(text):
+            first = fallback.index(int(hit.lastgroup[1:]))
+            yield hit.start(), fallback[first:]
+
+    def scan(self, text: str, tokens: Optional[TokenStream] = None) -> List[RuleMatch]:
+        """
+        Recorre el texto una vez y retorna las coincidencias ordenadas por
+        categoría, índice de regla y posición (el mismo orden que producía el
+        bucle de `re.finditer` por regla). `tokens` permite reutilizar la
+        tokenización ya hecha por el analizador.
+        """
+        if not self.rules and not len(self.phrase_matcher):
+            return []
+        if tokens is None:
+            tokens = TokenStream(text)
+
+        last_end = [-1] * len(self.rules)
+        last_start = [-1] * len(self.rules)
+        found: List[RuleMatch] = []
+
+        sources = [self._candidates(tokens)]
+        if self._combined is not None:
+            sources.append(self._fallback_candidates(text))
+
+        for source in sources:
+            for position, rule_ids in source:
+                for i in rule_ids:
+                    match = self._compiled[i].match(text, position)
+                    if match is None:
+                        continue
+                    end = match.end()
+                    # Semántica de finditer: sin solapamientos dentro de una regla
+                    if position < last_end[i]:
+                        continue
+                    if end == position and position == last_start[i]:
+                        continue
+                    last_start[i] = position
+                    last_end[i] = end
+                    rule = self.rules[i]
+                    found.append(RuleMatch(rule.kind, rule.index, position, end,
+                                           text[position:end]))
+
+        kind_order = {kind: n for n, kind in enumerate(self.KINDS)}
+        found.sort(key=lambda m: (kind_order[m.kind], m.rule_index, m.start))
+        if len(self.phrase_matcher):
+            found.extend(self._scan_phrases(text, tokens, found))
+        return found
+
+    def _scan_phrases(self, text: str, tokens: TokenStream,
+                      rule_matches: List[RuleMatch]) -> List[RuleMatch]:
+        """Frases literales que no solapan una coincidencia gramatical."""
+        # Minúsculas carácter a carácter si `lower()` cambió los offsets
+        lower = tokens.lower if tokens.aligned else ''.join(char.lower()[0] for char in text)
+        grammar_spans = [(m.start, m.end) for m in rule_matches if m.kind == 'grammar']
+        phrases = []
+        for start, end, index in self.phrase_matcher.find_all(lower):
+            if any(start < span_end and span_start < end
+                   for span_start, span_end in grammar_spans):
+                continue
+            phrases.append(RuleMatch(self.PHRASE_KIND, index, start, end, text[start:end]))
+        return phrases
+
+    def message_for(self, match: RuleMatch) -> str:
+        """Retorna la corrección/sugerencia asociada a una coincidencia."""
+        return self.messages[match.kind][match.rule_index]
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Instantáneas precompiladas de reglas - Tutorium
+Paso de construcción que guarda en un archivo versionado todo lo que
+`LanguageScoringSystem` compila al arrancar: por idioma, las reglas y frases
+de error, el `RuleEngine` (índice de palabras iniciales, reglas combinadas,
+autómata Aho–Corasick de frases) y el `VocabularyIndex`, más los pesos de
+puntuación. Los workers leen el archivo con `mmap` y construyen el sistema
+sin volver a analizar los patrones ni los niveles de vocabulario; sólo las
+expresiones regulares se recompilan (`re` no permite serializarlas
+compiladas).
+
+`RuleSetManager` mantiene el sistema activo de la API: carga la instantánea,
+la calienta y la instala cambiando una sola referencia, de modo que las
+peticiones en curso terminan con las reglas con las que empezaron. Una
+recarga desde el endpoint de administración repite el proceso con el
+archivo que haya en `RULE_SNAPSHOT` en ese momento; si falla, se siguen
+sirviendo las reglas anteriores.
+
+Formato del archivo:
+    MAGIC (8 bytes) | formato (uint32) | longitud de la cabecera (uint32)
+    | cabecera JSON | reglas (pickle)
+La cabecera (versión, fecha, idiomas, tamaños) se lee sin deserializar las
+reglas. El contenido se deserializa con pickle: sólo deben cargarse
+instantáneas construidas con `build`. La cabecera guarda además la versión
+del código de las clases serializadas (`code_version`) y la de Python; si no
+coinciden con las del proceso que carga, la instantánea se rechaza y hay
+que reconstruirla.
+
+Uso:
+  python tools/rule_snapshot.py build -o data/rules.snapshot
+  python tools/rule_snapshot.py build --rules reglas.json -o data/rules.snapshot
+  python tools/rule_snapshot.py info data/rules.snapshot
+
+`--rules` sustituye partes de las reglas del código:
+    {"scoring_weights": {...},
+     "languages": {"en": {"grammar": [...], "syntax": [...],
+                          "phrases": [["error", "corrección"]],
+                          "vocabulary_levels": {"beginner": [...]}}}}
+"""
+
+import argparse
+import functools
+import hashlib
+import hmac
+import importlib
+import json
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from config import SystemConfig
+from language_scoring_system import LanguageScoringSystem
+from tokenizer import TokenStream
+from vocabulary_index import VocabularyIndex
+
+MAGIC = b'TUTRULES'
+SNAPSHOT_FORMAT_VERSION = 2
+_PREAMBLE = struct.Struct('<8sII')
+
+# Módulos de las clases que contiene el pickle (ver `rule_set()`)
+_SERIALIZED_MODULES = ('language_scoring_system', 'rule_engine', 'phrase_matcher',
+                       'vocabulary_index', 'tokenizer')
+
+
+class SnapshotError(ValueError):
+    """El archivo no es una instantánea válida de este formato."""
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """Hash del código fuente de los módulos cuyas clases se serializan."""
+    digest = hashlib.sha256()
+    for name in _SERIALIZED_MODULES:
+        with open(importlib.import_module(name).__file__, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()[:16]
+
+
+def python_version() -> str:
+    return '.'.join(map(str, sys.version_info[:2]))
+
+
+def check_compatible(header: Dict) -> None:
+    """Lanza SnapshotError si la instantánea es de otro código o de otro Python."""
+    if header.get('code_version') != code_version():
+        raise SnapshotError('Rule snapshot was built by different rule code; rebuild it')
+    if header.get('python') != python_version():
+        raise SnapshotError(f"Rule snapshot was built with Python {header.get('python')}, "
+                            f"this is Python {python_version()}; rebuild it")
+
+
+def apply_overrides(scorer: LanguageScoringSystem, overrides: Dict) -> None:
+    """Sustituye las partes de las reglas indicadas en `overrides` (ver arriba)."""
+    if 'scoring_weights' in overrides:
+        scorer.scoring_weights = dict(overrides['scoring_weights'])
+    for language, changes in overrides.get('languages', {}).items():
+        if language not in scorer.supported_languages:
+            raise SnapshotError(f'Language {language} not supported')
+        rules = scorer.common_errors.setdefault(language, {})
+        for kind in ('grammar', 'syntax'):
+            if kind in changes:
+                rules[kind] = list(changes[kind])
+        if 'phrases' in changes:
+            scorer.common_phrases[language] = [
+                (error, correction) for error, correction in changes['phrases']
+                if error.lower() != correction.lower()
+            ]
+        if 'vocabulary_levels' in changes:
+            scorer.vocabulary_indexes[language] = VocabularyIndex(changes['vocabulary_levels'])
+    scorer.rebuild_rules()
+
+
+def snapshot_version(scorer: LanguageScoringSystem) -> str:
+    """Versión de la instantánea: cambia si cambian reglas, pesos o vocabulario."""
+    return hashlib.sha256(scorer._cache_version().encode('utf-8')).hexdigest()[:16]
+
+
+def build_snapshot(output: str, overrides: Optional[Dict] = None) -> Dict:
+    """
+    Compila las reglas (con `overrides` si se dan) y escribe la instantánea
+    en `output`. El archivo se escribe en un temporal y se renombra: quien
+    lo esté leyendo sigue viendo el anterior completo. Retorna la cabecera.
+    """
+    scorer = LanguageScoringSystem()
+    if overrides:
+        apply_overrides(scorer, overrides)
+    payload = pickle.dumps(scorer.rule_set(), protocol=pickle.HIGHEST_PROTOCOL)
+    header = {
+        'version': snapshot_version(scorer),
+        'rules_version': scorer.rules_version,
+        'created_at': datetime.utcnow().isoformat(),
+        'code_version': code_version(),
+        'python': python_version(),
+        'languages': {
+            language: {'rules': len(engine),
+                       'vocabulary': len(scorer.vocabulary_indexes[language])}
+            for language, engine in scorer.rule_engines.items()
+        },
+        'payload_bytes': len(payload),
+        'payload_sha256': hashlib.sha256(payload).hexdigest(),
+    }
+    encoded = json.dumps(header, sort_keys=True).encode('utf-8')
+
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as snapshot:
+            snapshot.write(_PREAMBLE.pack(MAGIC, SNAPSHOT_FORMAT_VERSION, len(encoded)))
+            snapshot.write(encoded)
+            snapshot.write(payload)
+        os.replace(temporary, output)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+        raise
+    return header
+
+
+def _parse_header(data) -> Tuple[Dict, int]:
+    """(cabecera, posición de las reglas) a partir del principio del archivo."""
+    if len(data) < _PREAMBLE.size:
+        raise SnapshotError('Rule snapshot is truncated')
+    magic, fmt, length = _PREAMBLE.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise SnapshotError('Not a rule snapshot')
+    if fmt != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f'Unsupported rule snapshot format: {fmt}')
+    end = _PREAMBLE.size + length
+    if len(data) < end:
+        raise SnapshotError('Rule snapshot is truncated')
+    return json.loads(bytes(data[_PREAMBLE.size:end])), end
+
+
+def read_header(path: str) -> Dict:
+    """Cabecera de la instantánea, sin leer las reglas."""
+    with open(path, 'rb') as handle:
+        preamble = handle.read(_PREAMBLE.size)
+        if len(preamble) == _PREAMBLE.size:
+            preamble += handle.read(_PREAMBLE.unpack(preamble)[2])
+        return _parse_header(preamble)[0]
+
+
+def load_snapshot(path: str) -> Tuple[Dict, Dict]:
+    """
+    (cabecera, reglas) de la instantánea. Las reglas se deserializan
+    directamente del archivo mapeado, sin copiarlo antes a memoria. Cualquier
+    fallo al leer o deserializar se lanza como SnapshotError.
+    """
+    with open(path, 'rb') as handle:
+        try:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # archivo vacío
+            raise SnapshotError('Rule snapshot is empty') from e
+    with mapped:
+        try:
+            header, start = _parse_header(mapped)
+            check_compatible(header)
+            payload = memoryview(mapped)[start:]
+            try:
+                if len(payload) != header['payload_bytes'] or \
+                        hashlib.sha256(payload).hexdigest() != header['payload_sha256']:
+                    raise SnapshotError('Rule snapshot is corrupt or truncated')
+                rule_set = pickle.loads(payload)
+            finally:
+                payload.release()
+        except SnapshotError:
+            raise
+        except Exception as e:
+            # pickle puede lanzar casi cualquier excepción (AttributeError,
+            # ImportError, EOFError...) con un archivo ajeno o de otro código
+            raise SnapshotError(f'Rule snapshot could not be loaded: {e!r}') from e
+    return header, rule_set
+
+
+def warm_up(scorer: LanguageScoringSystem) -> None:
+    """
+    Recorre una vez el escaneo de reglas, el autómata de frases y el índice
+    de vocabulario de cada idioma, sin pasar por la caché ni las métricas.
+    """
+    for language, engine in scorer.rule_engines.items():
+        config = SystemConfig.get_language_config(language)
+        text = '. '.join([error for error, _ in config.common_errors]
+                         + [' '.join(words[:5]) for words in config.vocabulary_levels.values()])
+        tokens = TokenStream(text)
+        engine.scan(text, tokens)
+        scorer.vocabulary_indexes[language].weighted_hits(tokens.terms)
+
+
+class RuleSetManager:
+    """
+    Sistema de puntuación activo y su recarga. `path` vacío usa las reglas
+    del código (no hay instantánea que cargar). `on_swap(scorer)` se llama
+    tras instalar cada sistema nuevo, para que la API actualice sus
+    referencias.
+    """
+
+    def __init__(self, path: str, cache=None, scorer: Optional[LanguageScoringSystem] = None,
+                 on_swap: Optional[Callable[[LanguageScoringSystem], None]] = None):
+        self.path = path
+        self.cache = cache
+        self.scorer = scorer
+        self.on_swap = on_swap
+        self.version: Optional[str] = None
+        self.ready = False
+        self.error: Optional[str] = None
+        self.loaded_at: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self.reloads = 0
+        self._lock = threading.Lock()
+
+    def load(self) -> Dict:
+        """
+        Carga y calienta las reglas y las instala. Una recarga a la vez; si
+        falla se conservan las anteriores y se relanza la excepción.
+        """
+        with self._lock:
+            started = time.perf_counter()
+            try:
+                if self.path:
+                    header, rule_set = load_snapshot(self.path)
+                    scorer = LanguageScoringSystem(cache=self.cache, rule_set=rule_set)
+                    version = header['version']
+                else:
+                    scorer = LanguageScoringSystem(cache=self.cache)
+                    version = snapshot_version(scorer)
+                loaded = time.perf_counter()
+                warm_up(scorer)
+            except Exception as e:
+                self.error = str(e) or type(e).__name__
+                raise
+            warmed = time.perf_counter()
+
+            # Un único cambio de referencia: cada petición usa el sistema
+            # que leyó al empezar
+            if self.version is not None:
+                self.reloads += 1
+            self.scorer = scorer
+            self.version = version
+            self.loaded_at = datetime.utcnow().isoformat()
+            self.timings = {'load_ms': round((loaded - started) * 1000, 2),
+                            'warm_ms': round((warmed - loaded) * 1000, 2)}
+            self.error = None
+            if self.on_swap is not None:
+                self.on_swap(scorer)
+            self.ready = True
+            return self.status()
+
+    def start(self) -> threading.Thread:
+        """Carga inicial en segundo plano; `ready` pasa a True al terminar."""
+        def run():
+            try:
+                self.load()
+            except Exception:
+                pass  # queda en `error`; /api/ready responde 503
+
+        thread = threading.Thread(target=run, name='rule-snapshot-load', daemon=True)
+        thread.start()
+        return thread
+
+    def worker_snapshot(self) -> Optional[Tuple[str, str]]:
+        """(ruta, versión) que los procesos de puntuación deben tener cargada."""
+        if not self.path or self.version is None:
+            return None
+        return self.path, self.version
+
+    def status(self) -> Dict:
+        return {
+            'ready': self.ready,
+            'source': self.path or 'built-in',
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+            'reloads': self.reloads,
+            'error': self.error,
+            **self.timings,
+        }
+
+
+def admin_error(token: Optional[str]) -> Optional[Tuple[str, int]]:
+    """
+    (mensaje, estado HTTP) si `token` no autoriza los endpoints de
+    administración; None si los autoriza. Sin `ADMIN_TOKEN` están desactivados.
+    """
+    if not SystemConfig.ADMIN_TOKEN:
+        return 'Admin endpoints are disabled', 403
+    if not token or not hmac.compare_digest(token.encode('utf-8'),
+                                            SystemConfig.ADMIN_TOKEN.encode('utf-8')):
+        return 'Invalid admin token', 401
+    return None
+
+
+def main() -> int:
+    """Función principal"""
+    parser = argparse.ArgumentParser(description="Instantáneas precompiladas de reglas")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Compilar las reglas en una instantánea')
+    build.add_argument('-o', '--output', default=SystemConfig.RULE_SNAPSHOT or None,
+                       required=not SystemConfig.RULE_SNAPSHOT)
+    build.add_argument('--rules', help='JSON con reglas que sustituyen a las del código')
+    info = subparsers.add_parser('info', help='Cabecera de una instantánea')
+    info.add_argument('path', nargs='?', default=SystemConfig.RULE_SNAPSHOT)
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'build':
+            overrides = None
+            if args.rules:
+                with open(args.rules, encoding='utf-8') as handle:
+                    overrides = json.load(handle)
+            header = build_snapshot(args.output, overrides)
+            print(f"Instantánea {header['version']} guardada en {args.output} "
+                  f"({header['payload_bytes']} bytes)")
+        else:
+            print(json.dumps(read_header(args.path), indent=2, ensure_ascii=False))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
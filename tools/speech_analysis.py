@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Análisis de voz para la puntuación de pronunciación - Tutorium
+Lee grabaciones WAV/FLAC por bloques (nunca el archivo completo en memoria),
+las divide en tramas de tamaño fijo y calcula la energía de cada trama y la
+saturación con NumPy. Con esas series se detecta la voz (VAD por
+energía con umbral adaptativo al ruido de fondo), se recortan los silencios
+de los extremos y se extraen rasgos de fluidez y claridad con los que se
+calcula la puntuación de pronunciación. `spectral_features` da además las
+energías log-mel por trama con las que se comparan las grabaciones con las
+plantillas de referencia (ver `phoneme_templates`).
+
+WAV PCM se lee con el módulo `wave` de la biblioteca estándar; FLAC necesita
+`soundfile` (backend opcional, ver `backends`).
+"""
+
+import wave
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backends import BACKENDS
+from config import SystemConfig
+
+# Nivel mínimo (dBFS) para considerar voz aunque el ruido de fondo sea muy bajo
+MIN_SPEECH_DB = -55.0
+
+# Huecos más cortos que esto dentro de la voz no cuentan como silencio (ms)
+VAD_HANGOVER_MS = 100
+
+# Separación mínima entre núcleos silábicos (ms)
+MIN_SYLLABLE_GAP_MS = 100
+
+# Valor absoluto de muestra a partir del cual se considera saturada
+CLIP_LEVEL = 0.999
+
+# Rango de frecuencias de los filtros mel de `spectral_features` (Hz)
+FEATURE_MIN_HZ = 60.0
+FEATURE_MAX_HZ = 8000.0
+
+
+class AudioFormatError(ValueError):
+    """El archivo no es un WAV PCM o FLAC legible."""
+
+
+class AudioInfo(NamedTuple):
+    format: str        # 'wav' | 'flac'
+    sample_rate: int
+    channels: int
+
+
+class SpeechFeatures(NamedTuple):
+    """Rasgos de la grabación tras recortar los silencios de los extremos."""
+    duration: float          # segundos de la grabación completa
+    speech_duration: float   # segundos de voz detectada
+    speech_ratio: float      # voz / duración recortada
+    pause_count: int         # pausas de al menos SPEECH_MIN_PAUSE_MS
+    pause_seconds: float
+    syllable_rate: float     # núcleos silábicos por segundo de voz
+    snr_db: float            # nivel medio de la voz sobre el ruido de fondo
+    clipping_ratio: float    # fracción de muestras saturadas
+
+    def to_dict(self) -> Dict:
+        return {field: round(value, 3) if isinstance(value, float) else value
+                for field, value in self._asdict().items()}
+
+
+# Lector de bloques: número de muestras por bloque -> bloques mono float32
+BlockReader = Callable[[int], Iterator[np.ndarray]]
+
+
+def open_audio(stream: BinaryIO) -> Tuple[AudioInfo, BlockReader]:
+    """
+    Detecta el formato por la cabecera y retorna la información del audio y
+    la función que lee el contenido por bloques.
+    """
+    header = stream.read(12)
+    stream.seek(0)
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return _open_wav(stream)
+    if header[:4] == b'fLaC':
+        return _open_flac(stream)
+    raise AudioFormatError('Audio must be WAV (PCM) or FLAC')
+
+
+def _open_wav(stream: BinaryIO) -> Tuple[AudioInfo, BlockReader]:
+    try:
+        reader = wave.open(stream, 'rb')
+    except (wave.Error, EOFError) as e:
+        raise AudioFormatError(f'Invalid WAV file: {e}') from e
+    channels = reader.getnchannels()
+    width = reader.getsampwidth()
+    if width not in (1, 2, 3, 4):
+        raise AudioFormatError(f'Unsupported WAV sample width: {width * 8} bits')
+    info = AudioInfo('wav', reader.getframerate(), channels)
+    frame_bytes = width * channels
+
+    def blocks(block_samples: int):
+        with reader:
+            while True:
+                data = reader.readframes(block_samples)
+                # Un archivo cortado (subida incompleta) puede acabar a mitad
+                # de una trama: se descarta la trama incompleta
+                data = data[:len(data) - len(data) % frame_bytes]
+                if not data:
+                    return
+                samples = _pcm_to_float(data, width)
+                yield samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+    return info, blocks
+
+
+def _pcm_to_float(data: bytes, width: int) -> np.ndarray:
+    """PCM little-endian de 8/16/24/32 bits a float32 en [-1, 1)."""
+    if width == 1:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    if width == 2:
+        return np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768
+    if width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        values = np.where(values & 0x800000, values - 0x1000000, values)
+        return values.astype(np.float32) / 8388608
+    return np.frombuffer(data, dtype='<i4').astype(np.float32) / 2147483648
+
+
+def _open_flac(stream: BinaryIO) -> Tuple[AudioInfo, BlockReader]:
+    soundfile = BACKENDS.get('soundfile')  # BackendUnavailableError si no está
+    try:
+        reader = soundfile.SoundFile(stream)
+    except RuntimeError as e:  # soundfile.LibsndfileError
+        raise AudioFormatError(f'Invalid FLAC file: {e}') from e
+    info = AudioInfo('flac', reader.samplerate, reader.channels)
+
+    def blocks(block_samples: int):
+        with reader:
+            for block in reader.blocks(blocksize=block_samples, dtype='float32', always_2d=True):
+                yield block.mean(axis=1, dtype=np.float32)
+
+    return info, blocks
+
+
+class FrameAnalyzer:
+    """
+    Rasgos por trama calculados a medida que llegan los bloques. Sólo se
+    guardan unos pocos valores por trama; las muestras se descartan.
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: int):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_length = max(1, sample_rate * frame_ms // 1000)
+        self.samples = 0
+        self.clipped = 0
+        self._energy_db: List[np.ndarray] = []
+        self._remainder = np.empty(0, dtype=np.float32)
+
+    def add(self, samples: np.ndarray) -> None:
+        """Procesa las tramas completas del bloque; el resto espera al siguiente."""
+        self.samples += len(samples)
+        self.clipped += int(np.count_nonzero(np.abs(samples) >= CLIP_LEVEL))
+        if len(self._remainder):
+            samples = np.concatenate([self._remainder, samples])
+        count = len(samples) // self.frame_length
+        frames = samples[:count * self.frame_length].reshape(count, self.frame_length)
+        self._remainder = samples[count * self.frame_length:].copy()
+        if count:
+            rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+            self._energy_db.append(20 * np.log10(np.maximum(rms, 1e-10)))
+
+    def energy_db(self) -> np.ndarray:
+        """Energía de cada trama en dBFS."""
+        return np.concatenate(self._energy_db) if self._energy_db else np.empty(0)
+
+    def features(self, margin_db: float, min_pause_ms: int) -> SpeechFeatures:
+        """VAD, recorte de silencios y rasgos de la grabación completa."""
+        duration = self.samples / self.sample_rate if self.sample_rate else 0.0
+        clipping = self.clipped / self.samples if self.samples else 0.0
+        energy = self.energy_db()
+        voiced, noise_db = voice_activity(energy, margin_db, self._frames(VAD_HANGOVER_MS))
+        if not voiced.any():
+            return SpeechFeatures(duration, 0.0, 0.0, 0, 0.0, 0.0, 0.0, clipping)
+
+        # Recortar el silencio inicial y final
+        first = int(np.argmax(voiced))
+        last = len(voiced) - int(np.argmax(voiced[::-1]))
+        voiced = voiced[first:last]
+        energy = energy[first:last]
+
+        frame_seconds = self.frame_length / self.sample_rate
+        speech_frames = int(voiced.sum())
+        pauses = [length for value, length in _runs(voiced)
+                  if not value and length >= self._frames(min_pause_ms)]
+        syllables = syllable_nuclei(energy, voiced, self._frames(MIN_SYLLABLE_GAP_MS))
+        speech_duration = speech_frames * frame_seconds
+        return SpeechFeatures(
+            duration=duration,
+            speech_duration=speech_duration,
+            speech_ratio=speech_frames / len(voiced),
+            pause_count=len(pauses),
+            pause_seconds=sum(pauses) * frame_seconds,
+            syllable_rate=syllables / speech_duration,
+            snr_db=float(np.median(energy[voiced]) - noise_db),
+            clipping_ratio=clipping,
+        )
+
+    def _frames(self, milliseconds: int) -> int:
+        return max(1, milliseconds // self.frame_ms)
+
+
+def voice_activity(energy_db: np.ndarray, margin_db: float,
+                   hangover_frames: int) -> Tuple[np.ndarray, float]:
+    """
+    Tramas con voz: energía por encima del ruido de fondo (percentil 10) más
+    `margin_db`. Los huecos de hasta `hangover_frames` entre tramas con voz
+    se rellenan. Retorna (máscara, nivel de ruido en dB).
+    """
+    if not len(energy_db):
+        return np.zeros(0, dtype=bool), 0.0
+    noise_db = float(np.percentile(energy_db, 10))
+    threshold = max(noise_db + margin_db, MIN_SPEECH_DB)
+    voiced = energy_db > threshold
+    position = 0
+    for value, length in _runs(voiced):
+        inside = 0 < position and position + length < len(voiced)
+        if not value and inside and length <= hangover_frames:
+            voiced[position:position + length] = True
+        position += length
+    return voiced, noise_db
+
+
+def syllable_nuclei(energy_db: np.ndarray, voiced: np.ndarray, min_gap: int) -> int:
+    """Máximos locales de la envolvente de energía en tramas con voz."""
+    if len(energy_db) < 3:
+        return int(voiced.any())
+    envelope = np.convolve(energy_db, np.ones(3) / 3, mode='same')
+    peaks = np.flatnonzero(
+        (envelope[1:-1] > envelope[:-2]) & (envelope[1:-1] >= envelope[2:]) & voiced[1:-1]
+    ) + 1
+    count = 0
+    last = -min_gap
+    for peak in peaks:
+        if peak - last >= min_gap:
+            count += 1
+            last = peak
+    return count
+
+
+def _runs(mask: np.ndarray) -> Iterator[Tuple[bool, int]]:
+    """(valor, longitud) de cada racha de la máscara."""
+    if not len(mask):
+        return
+    changes = np.flatnonzero(mask[1:] != mask[:-1]) + 1
+    starts = np.concatenate([[0], changes])
+    ends = np.concatenate([changes, [len(mask)]])
+    for start, end in zip(starts, ends):
+        yield bool(mask[start]), int(end - start)
+
+
+def pronunciation_score(features: SpeechFeatures) -> int:
+    """
+    Puntuación 0-100 a partir de claridad (relación señal/ruido, saturación)
+    y fluidez (proporción de voz, pausas largas y ritmo silábico).
+    """
+    if features.speech_duration < 0.3:
+        return 0
+    score = 100.0
+    # Claridad
+    if features.snr_db < 25:
+        score -= min(30.0, (25 - features.snr_db) * 1.5)
+    if features.clipping_ratio > 0.001:
+        score -= min(15.0, features.clipping_ratio * 1000)
+    # Fluidez: demasiado silencio dentro del discurso
+    silence = 1 - features.speech_ratio
+    if silence > 0.25:
+        score -= min(25.0, (silence - 0.25) * 100)
+    minutes = max(features.speech_duration / 60, 1 / 60)
+    score -= min(15.0, features.pause_count / minutes * 0.5)
+    # Ritmo: núcleos silábicos por segundo fuera de 2.5-6.5
+    if features.syllable_rate < 2.5:
+        score -= min(20.0, (2.5 - features.syllable_rate) * 10)
+    elif features.syllable_rate > 6.5:
+        score -= min(20.0, (features.syllable_rate - 6.5) * 10)
+    return int(max(0.0, min(100.0, score)))
+
+
+def mel_filterbank(sample_rate: int, n_fft: int, bands: int) -> np.ndarray:
+    """Filtros triangulares en escala mel (bands x n_fft // 2 + 1) hasta FEATURE_MAX_HZ."""
+    top = min(FEATURE_MAX_HZ, sample_rate / 2)
+    mel = lambda hz: 2595 * np.log10(1 + hz / 700)
+    edges_hz = 700 * (10 ** (np.linspace(mel(FEATURE_MIN_HZ), mel(top), bands + 2) / 2595) - 1)
+    bins = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+    lower, center, upper = edges_hz[:-2, None], edges_hz[1:-1, None], edges_hz[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0, np.minimum(rising, falling)).astype(np.float32)
+
+
+def spectral_features(stream: BinaryIO, frame_ms: Optional[int] = None,
+                      bands: Optional[int] = None) -> np.ndarray:
+    """
+    Energías log-mel por trama (frames x bands, float32) de la voz de una
+    grabación, sin los silencios de los extremos y con la media de cada
+    banda restada (normaliza el canal). Es la representación con la que se
+    comparan las grabaciones con las plantillas de referencia.
+    """
+    frame_ms = frame_ms or SystemConfig.SPEECH_FRAME_MS
+    bands = bands or SystemConfig.SPEECH_FEATURE_BANDS
+    info, read_blocks = open_audio(stream)
+    if info.sample_rate <= 0:
+        raise AudioFormatError('Invalid sample rate')
+    frame_length = max(1, info.sample_rate * frame_ms // 1000)
+    n_fft = 1 << (frame_length - 1).bit_length()
+    filters = mel_filterbank(info.sample_rate, n_fft, bands)
+    window = np.hanning(frame_length).astype(np.float32)
+
+    chunks: List[np.ndarray] = []
+    energy: List[np.ndarray] = []
+    remainder = np.empty(0, dtype=np.float32)
+    for block in read_blocks(frame_length * SystemConfig.SPEECH_BLOCK_FRAMES):
+        samples = np.concatenate([remainder, block]) if len(remainder) else block
+        count = len(samples) // frame_length
+        frames = samples[:count * frame_length].reshape(count, frame_length)
+        remainder = samples[count * frame_length:].copy()
+        if count:
+            spectrum = np.abs(np.fft.rfft(frames * window, n=n_fft)) ** 2
+            chunks.append(np.log(spectrum @ filters.T + 1e-10))
+            rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+            energy.append(20 * np.log10(np.maximum(rms, 1e-10)))
+    if not chunks:
+        return np.empty((0, bands), dtype=np.float32)
+
+    features = np.concatenate(chunks)
+    voiced, _ = voice_activity(np.concatenate(energy), SystemConfig.SPEECH_VAD_MARGIN_DB,
+                               max(1, VAD_HANGOVER_MS // frame_ms))
+    if not voiced.any():
+        return np.empty((0, bands), dtype=np.float32)
+    first = int(np.argmax(voiced))
+    last = len(voiced) - int(np.argmax(voiced[::-1]))
+    features = features[first:last]
+    return (features - features.mean(axis=0)).astype(np.float32)
+
+
+class SpeechResult(NamedTuple):
+    info: AudioInfo
+    features: SpeechFeatures
+    score: int
+
+
+def analyze_audio(stream: BinaryIO, frame_ms: Optional[int] = None,
+                  block_frames: Optional[int] = None) -> SpeechResult:
+    """Analiza una grabación leyéndola por bloques de `block_frames` tramas."""
+    frame_ms = frame_ms or SystemConfig.SPEECH_FRAME_MS
+    block_frames = block_frames or SystemConfig.SPEECH_BLOCK_FRAMES
+    info, read_blocks = open_audio(stream)
+    if info.sample_rate <= 0:
+        raise AudioFormatError('Invalid sample rate')
+
+    analyzer = FrameAnalyzer(info.sample_rate, frame_ms)
+    for block in read_blocks(analyzer.frame_length * block_frames):
+        analyzer.add(block)
+    features = analyzer.features(SystemConfig.SPEECH_VAD_MARGIN_DB,
+                                 SystemConfig.SPEECH_MIN_PAUSE_MS)
+    return SpeechResult(info, features, pronunciation_score(features))
@@ -117,27 +117,89 @@ def run_tests():
     
     return success
 
-def start_api_server():
-    """Inicia el servidor de API."""
+def start_api_server(workers=0, queue_size=None, asgi=False):
+    """Inicia el servidor de API (con pool de procesos si workers > 0)."""
     print_header("Iniciando Servidor de API")
     
+    if asgi:
+        start_asgi_server()
+        return
+    
     print_colored("🚀 Iniciando API en http://127.0.0.1:5000", Colors.GREEN)
+    if workers:
+        print_colored(f"⚙️  Modo producción: {workers} procesos de puntuación", Colors.CYAN)
     print_colored("📋 Endpoints disponibles:", Colors.CYAN)
     print("   - POST /api/analyze-language")
+    print("   - POST /api/analyze-language/batch")
+    print("   - POST /api/analyze-language/incremental")
+    print("   - POST /api/analyze-language/document")
+    print("   - POST /api/analyze-speech")
     print("   - GET  /api/student-progress/<id>")
     print("   - POST /api/save-analysis")
     print("   - GET  /api/health")
+    print("   - GET  /api/ready")
+    print("   - POST /api/admin/reload-rules")
+    print("   - GET  /api/cache/stats")
+    print("   - GET  /api/pool/stats")
+    print("   - GET  /api/metrics")
     print("   - GET  /api/supported-languages")
     print()
     print_colored("🛑 Presiona Ctrl+C para detener el servidor", Colors.YELLOW)
     
+    command = ["python", "tools/language_api.py"]
+    if workers:
+        command += ["--workers", str(workers)]
+    if queue_size is not None:
+        command += ["--queue-size", str(queue_size)]
+    
+    try:
+        subprocess.run(command, check=True)
+    except KeyboardInterrupt:
+        print_colored("\n👋 Servidor detenido", Colors.YELLOW)
+    except Exception as e:
+        print_colored(f"❌ Error iniciando servidor: {e}", Colors.RED)
+
+def start_asgi_server():
+    """Inicia la variante ASGI de la API con agrupación de peticiones."""
+    from config import SystemConfig
+    
+    print_colored(f"🚀 Iniciando API ASGI en http://127.0.0.1:{SystemConfig.ASGI_PORT}", Colors.GREEN)
+    print_colored(f"⚙️  Executor: {SystemConfig.ASGI_EXECUTOR}", Colors.CYAN)
+    print_colored("📋 Endpoints disponibles:", Colors.CYAN)
+    print("   - POST /api/analyze-language")
+    print("   - WS   /ws/analyze-stream")
+    print("   - GET  /api/coalescing/stats")
+    print("   - GET  /api/health")
+    print("   - GET  /api/ready")
+    print("   - POST /api/admin/reload-rules")
+    print()
+    print_colored("🛑 Presiona Ctrl+C para detener el servidor", Colors.YELLOW)
+    
     try:
-        subprocess.run(["python", "tools/language_api.py"], check=True)
+        subprocess.run(["python", "tools/language_asgi.py"], check=True)
     except KeyboardInterrupt:
         print_colored("\n👋 Servidor detenido", Colors.YELLOW)
     except Exception as e:
         print_colored(f"❌ Error iniciando servidor: {e}", Colors.RED)
 
+def run_benchmarks(update_baseline=False):
+    """Ejecuta la suite de benchmarks y compara con la baseline guardada."""
+    print_header("Benchmarks del Sistema")
+    
+    command = ["python", "tools/bench_suite.py"]
+    if update_baseline:
+        command.append("--update-baseline")
+    
+    print_colored(f"💻 Ejecutando: {' '.join(command)}", Colors.BLUE)
+    result = subprocess.run(command)
+    
+    if result.returncode == 0:
+        print_colored("✅ Rendimiento dentro del umbral", Colors.GREEN)
+    else:
+        print_colored("❌ Regresión de rendimiento frente a la baseline", Colors.RED)
+    
+    return result.returncode == 0
+
 def run_development_mode():
     """Ejecuta modo de desarrollo completo."""
     print_header("Modo de Desarrollo")
@@ -216,6 +278,72 @@ def show_system_info():
             print_colored(f"   ✅ {file_path} ({size} bytes)", Colors.GREEN)
         else:
             print_colored(f"   ❌ {file_path} (no encontrado)", Colors.RED)
+    
+    show_startup_report()
+
+# Dependencias pesadas que no deben importarse al arrancar la API
+HEAVY_MODULES = ('spacy', 'stanza', 'nltk', 'librosa', 'sklearn', 'pandas', 'torch')
+
+def import_time_breakdown(module='language_api'):
+    """
+    Importa `module` en un proceso nuevo con `-X importtime` y retorna
+    (tiempo total en ms, [(paquete, self ms, acumulado ms, profundidad)]) de
+    las importaciones que dispara el módulo.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd="tools", capture_output=True, text=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000, depth))
+    # Salida en post-orden: el subárbol del módulo son las líneas anteriores
+    # a la suya hasta la anterior de profundidad 0
+    end = next((i for i, entry in enumerate(entries) if entry[0] == module and not entry[3]), None)
+    if end is None:
+        return 0.0, []
+    start = end
+    while start > 0 and entries[start - 1][3] > 0:
+        start -= 1
+    return entries[end][2], entries[start:end]
+
+def show_startup_report(module='language_api', top=10):
+    """Desglose del arranque en frío de la API frente al presupuesto."""
+    from config import SystemConfig
+    from backends import BACKENDS
+    
+    print_colored(f"\n⏱️  Arranque en frío ({module}, -X importtime):", Colors.CYAN)
+    total, entries = import_time_breakdown(module)
+    if not entries:
+        print_colored("   ❌ No se pudo medir el arranque", Colors.RED)
+        return
+    
+    # Importaciones directas del módulo, ordenadas por tiempo acumulado
+    direct = sorted((entry for entry in entries if entry[3] == 1),
+                    key=lambda entry: entry[2], reverse=True)
+    for name, self_ms, cumulative_ms, _ in direct[:top]:
+        print(f"   {name:<32} {cumulative_ms:>9.1f} ms  (propio {self_ms:.1f} ms)")
+    
+    budget = SystemConfig.STARTUP_BUDGET_MS
+    color = Colors.GREEN if total <= budget else Colors.RED
+    print_colored(f"   Total: {total:.1f} ms (presupuesto {budget} ms)", color)
+    
+    heavy = sorted({name.split('.')[0] for name, *_ in entries
+                    if name.split('.')[0] in HEAVY_MODULES})
+    if heavy:
+        print_colored(f"   ⚠️  Dependencias pesadas importadas al arrancar: {', '.join(heavy)}",
+                      Colors.YELLOW)
+    
+    print_colored("\n🧩 Backends de NLP (carga diferida):", Colors.CYAN)
+    preload = set(SystemConfig.NLP_PRELOAD)
+    for name, status in BACKENDS.status().items():
+        mark = "✅" if status['installed'] else "➖"
+        note = " [precarga]" if name in preload else ""
+        print(f"   {mark} {name:<10} {status['description']}{note}")
 
 def main():
     """Función principal."""
@@ -227,18 +355,48 @@ Ejemplos de uso:
   python start.py setup           # Configurar entorno
   python start.py test            # Ejecutar tests
   python start.py serve           # Iniciar servidor API
+  python start.py serve --workers 4 --queue-size 64  # API con pool de procesos
+  python start.py serve --asgi    # API ASGI con agrupación de peticiones
   python start.py dev             # Modo desarrollo completo
   python start.py check           # Verificar para producción
+  python start.py bench           # Benchmarks (falla si hay regresiones)
+  python start.py bench --update-baseline  # Guardar nueva baseline
   python start.py info            # Mostrar información del sistema
         """
     )
     
     parser.add_argument(
         'command',
-        choices=['setup', 'test', 'serve', 'dev', 'check', 'info'],
+        choices=['setup', 'test', 'serve', 'dev', 'check', 'info', 'bench'],
         help='Comando a ejecutar'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=0,
+        help='serve: procesos de puntuación (0 = servidor de desarrollo)'
+    )
+    
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=None,
+        help='serve: peticiones en espera antes de responder 503'
+    )
+    
+    parser.add_argument(
+        '--asgi',
+        action='store_true',
+        help='serve: usar la API ASGI (FastAPI + uvicorn) con agrupación de peticiones'
+    )
+    
+    parser.add_argument(
+        '--update-baseline',
+        action='store_true',
+        help='bench: guardar el resultado como nueva baseline'
+    )
+    
     args = parser.parse_args()
     
     # Banner de bienvenida
@@ -253,13 +411,16 @@ Ejemplos de uso:
         elif args.command == 'test':
             run_tests()
         elif args.command == 'serve':
-            start_api_server()
+            start_api_server(args.workers, args.queue_size, args.asgi)
         elif args.command == 'dev':
             run_development_mode()
         elif args.command == 'check':
             run_production_check()
         elif args.command == 'info':
             show_system_info()
+        elif args.command == 'bench':
+            if not run_benchmarks(args.update_baseline):
+                sys.exit(1)
         
     except KeyboardInterrupt:
         print_colored("\n👋 Operación cancelada por el usuario", Colors.YELLOW)
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Análisis en streaming - Tutorium
+Sesión de análisis para el canal WebSocket de la API ASGI: el cliente envía
+el texto por partes mientras el estudiante escribe o dicta y cada oración
+completa se analiza en cuanto llega, sin esperar al envío final.
+
+La sesión no guarda el texto ni los hallazgos ya emitidos: sólo la oración
+en curso (acotada por `STREAM_MAX_PENDING_CHARS`) y los contadores de
+documento, con los que las puntuaciones en curso coinciden con las de
+`analyze_text` sobre todo el texto recibido.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional
+
+from config import SystemConfig
+from incremental_analysis import SEGMENT_END, Segment, analyze_segment
+from vocabulary_index import LevelStream
+
+
+class StreamLimitError(ValueError):
+    """El texto de la conexión supera el límite configurado."""
+
+
+def _open_word(text: str) -> str:
+    """Palabra sin terminar al final de `text` ('' si acaba en espacio)."""
+    if not text or text[-1].isspace():
+        return ''
+    return text.rsplit(None, 1)[-1]
+
+
+class StreamSession:
+    """
+    Estado de una conexión de streaming.
+
+    `feed(chunk)` retorna un evento `sentence` por cada oración que el
+    fragmento completa; `finish()` cierra la oración pendiente y `scores()`
+    calcula las puntuaciones del texto recibido hasta ahora.
+    """
+
+    def __init__(self, scorer, language: str = 'en', max_chars: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        if language not in scorer.supported_languages:
+            raise ValueError(f"Language {language} not supported")
+        self.scorer = scorer
+        self.language = language
+        self.max_chars = max_chars or SystemConfig.STREAM_MAX_CHARS
+        self.max_pending = max_pending or SystemConfig.STREAM_MAX_PENDING_CHARS
+        self.received = 0
+        self.pending = ''
+        self.offset = 0  # posición de `pending` dentro del texto completo
+        self.sentences = 0
+        self._word_counts: Counter = Counter()
+        self._word_total = 0
+        self._unique_length = 0
+        self._boundaries = 0
+        self._errors = 0
+        self._issues = 0
+        self._levels = LevelStream(scorer.vocabulary_indexes[language])
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """
+        Añade texto y retorna los eventos de las oraciones completadas. Una
+        palabra de más de `max_pending` caracteres se rechaza con
+        `StreamLimitError` sin modificar la sesión.
+        """
+        if self.received + len(chunk) > self.max_chars:
+            raise StreamLimitError(f'Stream exceeds {self.max_chars} characters')
+        if max(map(len, (_open_word(self.pending) + chunk).split()), default=0) > self.max_pending:
+            raise StreamLimitError(f'Stream words cannot exceed {self.max_pending} characters')
+        self.received += len(chunk)
+        self.pending += chunk
+
+        events = []
+        start = 0
+        for match in SEGMENT_END.finditer(self.pending):
+            events.append(self._complete(self.pending[start:match.end()]))
+            start = match.end()
+        rest = self.pending[start:]
+
+        # Oración demasiado larga sin puntuación: se cierra tras el último
+        # espacio y la palabra sin terminar queda pendiente, de modo que
+        # ninguna palabra se parte entre dos oraciones
+        if len(rest) > self.max_pending:
+            word = _open_word(rest)
+            events.append(self._complete(rest[:len(rest) - len(word)]))
+            rest = word
+
+        self.pending = rest
+        return events
+
+    def finish(self) -> List[Dict]:
+        """Cierra la oración pendiente (fin del texto)."""
+        if not self.pending:
+            return []
+        piece, self.pending = self.pending, ''
+        return [self._complete(piece)]
+
+    def _complete(self, piece: str) -> Dict:
+        """Analiza una oración, la suma a los contadores y retorna su evento."""
+        segment = analyze_segment(self.scorer, self.language, piece)
+        offset = self.offset
+        self.offset += len(piece)
+
+        self._word_total += len(segment.words)
+        self._boundaries += segment.boundaries
+        for word in segment.words:
+            if word not in self._word_counts:
+                self._unique_length += len(word)
+            self._word_counts[word] += 1
+        self._levels.feed(segment.terms)
+
+        corrections, suggestions = self._findings(segment, offset)
+        self._errors += len(corrections)
+        self._issues += len(suggestions)
+
+        event = {
+            'type': 'sentence',
+            'index': self.sentences,
+            'position': (offset, offset + len(piece)),
+            'corrections': corrections,
+            'suggestions': suggestions,
+        }
+        self.sentences += 1
+        return event
+
+    def _findings(self, segment: Segment, offset: int):
+        """Correcciones y sugerencias de la oración con posiciones absolutas."""
+        matches = [match._replace(start=match.start + offset, end=match.end + offset)
+                   for match in segment.matches]
+        return (self.scorer._grammar_corrections(matches, self.language),
+                self.scorer._syntax_suggestions(matches, self.language))
+
+    def scores(self) -> Dict:
+        """Puntuaciones de todo el texto recibido, incluida la oración en curso."""
+        word_total = self._word_total
+        unique_count = len(self._word_counts)
+        unique_length = self._unique_length
+        boundaries = self._boundaries
+        errors, issues = self._errors, self._issues
+        extra_terms = None
+        if self.pending:
+            segment = analyze_segment(self.scorer, self.language, self.pending)
+            word_total += len(segment.words)
+            new_words = set(segment.words).difference(self._word_counts)
+            unique_count += len(new_words)
+            unique_length += sum(len(word) for word in new_words)
+            boundaries += segment.boundaries
+            corrections, suggestions = self._findings(segment, self.offset)
+            errors += len(corrections)
+            issues += len(suggestions)
+            extra_terms = segment.terms
+
+        scorer = self.scorer
+        scores = {
+            'grammar': scorer._grammar_score(errors, word_total),
+            'syntax': scorer._syntax_score(boundaries + 1, issues),
+            'vocabulary': scorer._vocabulary_score(
+                word_total, unique_count, unique_length,
+                self._levels.weighted_hits(extra_terms)),
+            'pronunciation': 85,  # Placeholder para audio
+        }
+        return {
+            'type': 'scores',
+            'language': self.language,
+            'text_length': word_total,
+            'sentences': self.sentences,
+            'scores': scores,
+            'overall_score': scorer._calculate_overall_score(scores),
+        }
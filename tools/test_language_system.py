@@ -4,16 +4,56 @@ Tests para el Sistema de Puntuación de Idiomas - Tutorium
 Pruebas unitarias para validar funcionalidad del backend.
 """
 
+import asyncio
+import csv
+import hashlib
+import time
 import unittest
 import sys
 import os
+import io
 import json
+import pickle
+import random
+import re
+import tempfile
+import wave
+
+import numpy as np
 
 # Agregar el directorio tools al path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tools'))
 
 from language_scoring_system import LanguageScoringSystem
+from analysis_cache import AnalysisCache
+from analysis_result import AnalysisResult
+from analysis_store import AnalysisStore
+from backends import BACKENDS, BackendRegistry, BackendUnavailableError
+from deep_analyzer import LemmaCache
+from language_detector import LanguageDetector, detect_language
+from incremental_analysis import IncrementalAnalyzer, split_segments
+from long_document import analyze_document, iter_shards
+from streaming_analysis import StreamLimitError, StreamSession
+from speech_analysis import AudioFormatError, analyze_audio, spectral_features
+from phoneme_templates import TemplateIndex, TemplateIndexError, build_index
+from dtw_alignment import align, align_batch, band_width, best_alignment
+from benchmarks import naive_dtw, synthetic_utterances
+from wire_format import (COMPACT_JSON, COMPACT_MSGPACK, JSON, compact, compact_result, expand,
+                         negotiate)
+from bench_suite import compare, synthetic_corpus
+from bulk_scoring import BulkScoringError, read_corpus, score_corpus
+from metrics import REGISTRY, REQUEST_METRIC, STAGE_METRIC, MetricsRegistry, length_bucket
+from phrase_matcher import PhraseMatcher
+from progress_accumulator import ProgressAccumulator
+from tokenizer import TokenStream
+from request_coalescer import RequestCoalescer
+import rule_snapshot
+from rule_snapshot import (RuleSetManager, SnapshotError, build_snapshot, load_snapshot,
+                           read_header)
+from vocabulary_index import VocabularyIndex
+from worker_pool import PoolBusyError, ScoringPool
 from config import SystemConfig
+from rule_engine import RuleEngine, fold_case, rule_triggers
 
 
 class TestLanguageScoringSystem(unittest.TestCase):
@@ -133,6 +173,21 @@ class TestLanguageScoringSystem(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.scorer.analyze_text("Hello world", 'fr')
     
+    def test_batch_matches_single_analysis(self):
+        """Test que analyze_batch coincide con analyze_text texto a texto."""
+        texts = [
+            "He are very good in english. I wants to learning more.",
+            "",
+            "The unprecedented infrastructure development",
+            "a a a a apple!!! Really nice? yes",
+        ]
+        batch = self.scorer.analyze_batch(texts, 'en')
+        self.assertEqual(len(batch), len(texts))
+        for text, result in zip(texts, batch):
+            expected = self.scorer.analyze_text(text, 'en')
+            del expected['timestamp'], result['timestamp']
+            self.assertEqual(result, expected)
+
     def test_score_ranges(self):
         """Test que las puntuaciones estén en rangos válidos."""
         text = "This is a well-written sentence with good grammar."
@@ -144,6 +199,1542 @@ class TestLanguageScoringSystem(unittest.TestCase):
             self.assertLessEqual(score, 100, f"{score_type} score above 100")
 
 
+class TestRuleEngine(unittest.TestCase):
+    """Tests para el motor de reglas compilado."""
+
+    RULES = {
+        'grammar': [
+            {'pattern': r'\bhe are\b', 'correction': 'he is'},
+            {'pattern': r'e a', 'correction': 'no indexable'},
+            {'pattern': r'\b(?:a|the) ', 'correction': 'artículo'},
+        ],
+        'syntax': [
+            {'pattern': r'\b(very|really) (good|nice)\b', 'suggestion': 'adjetivo'},
+        ]
+    }
+
+    def legacy_scan(self, rules, text):
+        """Bucle original de `re.finditer` por regla."""
+        found = []
+        for kind in RuleEngine.KINDS:
+            for index, rule in enumerate(rules.get(kind, [])):
+                for match in re.finditer(rule['pattern'], text, re.IGNORECASE):
+                    found.append((kind, index, match.start(), match.end()))
+        return found
+
+    def test_scan_matches_per_rule_finditer(self):
+        """Test equivalencia con el bucle por regla."""
+        engine = RuleEngine(self.RULES)
+        text = "He are very good. The apple was really nice, he are here a a"
+        found = [(m.kind, m.rule_index, m.start, m.end) for m in engine.scan(text)]
+        self.assertEqual(found, self.legacy_scan(self.RULES, text))
+
+    def test_trigger_case_folding(self):
+        """Test plegado de mayúsculas igual al de re.IGNORECASE (İ, ı, ſ, ς)."""
+        rules = {'grammar': [
+            {'pattern': r'\bi is\b', 'correction': 'I am'},
+            {'pattern': r'\bis\b', 'correction': 'is'},
+            {'pattern': r'\bσοφός\b', 'correction': 'σοφός'},
+        ]}
+        engine = RuleEngine(rules)
+        for text in ["İ is", "ı IS here", "Iſ it? İstanbul is", "ΣΟΦΌΣ, σοφόσ", "i is"]:
+            found = [(m.kind, m.rule_index, m.start, m.end) for m in engine.scan(text)]
+            self.assertEqual(found, self.legacy_scan(rules, text), text)
+
+    def test_fold_case_matches_ignorecase(self):
+        """Test todo carácter que re.IGNORECASE iguala tiene la misma clave."""
+        cased = ''.join(chr(code) for code in range(0x10000)
+                        if chr(code).lower() != chr(code) or chr(code).upper() != chr(code)
+                        or chr(code) == 'İ')
+        for char in cased:
+            for other in re.findall(re.escape(char), cased, re.IGNORECASE):
+                self.assertEqual(fold_case(char), fold_case(other), (char, other))
+
+    def test_trigger_index(self):
+        """Test indexación por palabra inicial."""
+        engine = RuleEngine(self.RULES)
+        self.assertEqual(set(engine.triggers), {'he', 'a', 'the', 'very', 'really'})
+        self.assertIsNone(rule_triggers(r'\bhe\w*'))
+
+    def test_analysis_output_unchanged(self):
+        """Test que correcciones y sugerencias conservan el formato."""
+        scorer = LanguageScoringSystem()
+        text = "He are very good. She were really nice"
+        result = scorer.analyze_text(text, 'en')
+        self.assertEqual(
+            [(c['error'], c['position']) for c in result['corrections']],
+            [('He are', (0, 6)), ('She were', (18, 26))]
+        )
+        self.assertEqual(result['suggestions'][0]['issue'], 'very good')
+
+
+class TestTokenStream(unittest.TestCase):
+    """Tests para la tokenización compartida."""
+
+    def test_matches_independent_passes(self):
+        """Test equivalencia con split, lower().split() y re.split."""
+        for text in ["He are good. Really?! yes", "", "  a\tb\nc...d ",
+                     "İstanbul is big. HE ARE here"]:
+            tokens = TokenStream(text)
+            self.assertEqual(tokens.word_count, len(text.split()))
+            self.assertEqual(tokens.unique_words, set(text.lower().split()))
+            self.assertEqual(tokens.sentence_count, len(re.split(r'[.!?]+', text)))
+            self.assertEqual(
+                [text[start:end] for start, end in tokens.sentence_spans()],
+                re.split(r'[.!?]+', text)
+            )
+
+    def test_offsets_when_lower_changes_length(self):
+        """Test offsets correctos cuando lower() cambia la longitud."""
+        text = "İstanbul: he are here"
+        tokens = TokenStream(text)
+        self.assertFalse(tokens.aligned)
+        starts = dict((word, start) for start, word in tokens.word_starts())
+        self.assertEqual(text[starts['he']:starts['he'] + 2], 'he')
+        result = LanguageScoringSystem().analyze_text(text, 'en')
+        self.assertEqual(result['corrections'][0]['position'], (10, 16))
+
+
+class TestAnalysisCache(unittest.TestCase):
+    """Tests para la caché de resultados."""
+
+    def test_cache_hit_matches_fresh_analysis(self):
+        """Test que un acierto reproduce el análisis con timestamp nuevo."""
+        cache = AnalysisCache(max_entries=8, ttl=60)
+        scorer = LanguageScoringSystem(cache=cache)
+        text = "He are very good. She were really nice"
+        first = scorer.analyze_text(text, 'en')
+        second = scorer.analyze_text(text, 'en')
+
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        fresh = LanguageScoringSystem().analyze_text(text, 'en')
+        for result in (first, second, fresh):
+            del result['timestamp']
+        self.assertEqual(second, fresh)
+
+    def test_lru_eviction_and_ttl(self):
+        """Test expulsión LRU y caducidad."""
+        cache = AnalysisCache(max_entries=2, ttl=60)
+        cache.set('a', '1')
+        cache.set('b', '2')
+        cache.get('a')
+        cache.set('c', '3')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), '1')
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        expired = AnalysisCache(ttl=-1)
+        expired.set('a', '1')
+        self.assertIsNone(expired.get('a'))
+        self.assertEqual(expired.stats()['expirations'], 1)
+
+    def test_invalidated_when_rules_or_weights_change(self):
+        """Test invalidación al cambiar reglas o pesos."""
+        scorer = LanguageScoringSystem(cache=AnalysisCache())
+        text = "The apple is really nice"
+        scorer.analyze_text(text, 'en')
+
+        scorer.scoring_weights['grammar'] = 0.5
+        scorer.analyze_text(text, 'en')
+        scorer.common_errors['en']['grammar'].append(
+            {'pattern': r'\bthe apple\b', 'correction': 'an apple'})
+        scorer.rebuild_rules()
+        result = scorer.analyze_text(text, 'en')
+
+        self.assertEqual(scorer.cache.stats()['hits'], 0)
+        self.assertEqual(len(result['corrections']), 1)
+
+    def test_shared_sqlite_tier(self):
+        """Test que dos procesos comparten aciertos vía SQLite."""
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'cache.db')
+            writer = AnalysisCache(db_path=db_path)
+            reader = AnalysisCache(db_path=db_path)
+            writer.set('key', '{"ok": true}')
+            self.assertEqual(reader.get('key'), '{"ok": true}')
+            self.assertEqual(reader.stats()['disk_hits'], 1)
+
+
+class TestAnalysisStore(unittest.TestCase):
+    """Tests para la persistencia de análisis."""
+
+    def setUp(self):
+        """Base de datos temporal para cada test."""
+        self.tmp = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmp.name, 'store.db')
+        self.store = AnalysisStore(f'sqlite:///{db_path}')
+        self.scorer = LanguageScoringSystem()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_progress_matches_export_report(self):
+        """Test que los agregados reproducen export_progress_report."""
+        texts = ["He are good", "I am a student", "The apple is really nice",
+                 "They was here. We is there.", "Hello world", "I like cats",
+                 "Although I like cats, I prefer dogs"]
+        analyses = [self.scorer.analyze_text(text, 'en') for text in texts]
+        del analyses[2]['scores']['syntax']
+
+        self.store.save_analysis('s1', analyses[0])
+        self.store.save_analyses(('s1', a, None) for a in analyses[1:])
+
+        expected = self.scorer.export_progress_report(analyses)
+        report = self.scorer.progress_report(self.store.get_progress('s1'))
+        for key in ('total_sessions', 'average_scores', 'trends', 'current_level'):
+            self.assertEqual(report[key], expected[key])
+        self.assertEqual(len(self.store.recent_analyses('s1')), 5)
+
+    def test_recent_in_write_order(self):
+        """Test el timestamp del cliente no altera el orden de los recientes."""
+        timestamps = ['2030-01-01T00:00:00', None, 5, 'garbage']
+        for number, timestamp in enumerate(timestamps):
+            analysis = {'scores': {'grammar': number}, 'timestamp': timestamp}
+            self.store.save_analysis('s1', analysis)
+        recent = self.store.recent_analyses('s1')
+        self.assertEqual([a['scores']['grammar'] for a in recent], [3, 2, 1, 0])
+        self.assertEqual([a['timestamp'] for a in recent], timestamps[::-1])
+
+    def test_unknown_student(self):
+        """Test estudiante sin análisis."""
+        self.assertIsNone(self.store.get_progress('nadie'))
+
+
+class TestProgressAccumulator(unittest.TestCase):
+    """Tests de propiedad para el acumulador incremental de progreso."""
+
+    def setUp(self):
+        self.scorer = LanguageScoringSystem()
+
+    def full_history_report(self, user_analyses):
+        """Cálculo original sobre el historial completo."""
+        avg_scores = {}
+        for skill in ['grammar', 'syntax', 'vocabulary', 'pronunciation']:
+            scores = [a['scores'].get(skill, 0) for a in user_analyses if skill in a['scores']]
+            avg_scores[skill] = sum(scores) / len(scores) if scores else 0
+        recent_analyses = user_analyses[-5:]
+        old_analyses = user_analyses[:5]
+        trends = {}
+        for skill in avg_scores.keys():
+            recent_avg = sum(a['scores'].get(skill, 0) for a in recent_analyses) / len(recent_analyses)
+            old_avg = sum(a['scores'].get(skill, 0) for a in old_analyses) / len(old_analyses)
+            trends[skill] = recent_avg - old_avg
+        return {
+            'total_sessions': len(user_analyses),
+            'average_scores': avg_scores,
+            'trends': trends,
+            'current_level': self.scorer._determine_level(avg_scores),
+        }
+
+    def random_history(self, rng):
+        """Historial aleatorio con habilidades ausentes de vez en cuando."""
+        history = []
+        for _ in range(rng.randint(1, 40)):
+            scores = {}
+            for skill in ('grammar', 'syntax', 'vocabulary', 'pronunciation'):
+                if rng.random() > 0.15:
+                    scores[skill] = rng.randint(0, 100)
+            history.append({'scores': scores})
+        return history
+
+    def test_equivalent_to_full_history(self):
+        """Propiedad: incremental, serializado y fusionado == historial completo."""
+        rng = random.Random(2024)
+        for _ in range(300):
+            history = self.random_history(rng)
+            expected = self.full_history_report(history)
+
+            report = self.scorer.export_progress_report(history)
+            del report['generated_at']
+            self.assertEqual(report, expected)
+
+            # Fragmentos consecutivos serializados y fusionados
+            cut = rng.randint(0, len(history))
+            left, right = ProgressAccumulator(), ProgressAccumulator()
+            for analysis in history[:cut]:
+                left.update(analysis)
+            for analysis in history[cut:]:
+                right.update(analysis)
+            restored = ProgressAccumulator.from_dict(
+                json.loads(json.dumps(left.to_dict())))
+            merged = self.scorer.progress_report(restored.merge(right))
+            del merged['generated_at']
+            self.assertEqual(merged, expected)
+
+    def test_empty_history(self):
+        """Test historial vacío."""
+        self.assertEqual(self.scorer.export_progress_report([]), {})
+
+
+class TestScoringPool(unittest.TestCase):
+    """Tests para el pool de procesos de puntuación."""
+
+    def setUp(self):
+        self.pool = ScoringPool(workers=1, queue_size=0)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_pool_analysis_matches_local(self):
+        """Test que el pool produce el mismo análisis."""
+        text = "He are very good"
+        result = self.pool.analyze_text(text, 'en')
+        expected = LanguageScoringSystem().analyze_text(text, 'en')
+        del result['timestamp'], expected['timestamp']
+        self.assertEqual(result, expected)
+
+    def test_backpressure_when_queue_full(self):
+        """Test rechazo inmediato cuando no quedan huecos."""
+        self.pool.acquire()
+        with self.assertRaises(PoolBusyError):
+            self.pool.acquire()
+        self.pool.release()
+        self.pool.acquire()
+        self.pool.release()
+        self.assertEqual(self.pool.stats()['rejected'], 1)
+
+    def test_worker_metrics_reach_parent(self):
+        """Test que las métricas de los procesos se suman al registro local."""
+        REGISTRY.clear()
+        self.pool.analyze_text("He are very good", 'en')
+        self.pool.analyze_batch(["One text", "Another text"], 'es')
+        series = REGISTRY.snapshot()
+        self.assertEqual(series[(STAGE_METRIC, ('total', 'en', '<=200'))][-1], 1)
+        self.assertEqual(series[(STAGE_METRIC, ('batch_scan', 'es', '<=200'))][-1], 2)
+
+
+class TestPhraseMatcher(unittest.TestCase):
+    """Tests para el buscador de frases Aho–Corasick."""
+
+    def test_search_matches_per_phrase_regex(self):
+        """Test equivalencia con una búsqueda regex por frase."""
+        rng = random.Random(5)
+        vocabulary = ['he', 'are', 'a', 'apple', 'much', 'people', 'i', 'am']
+        phrases = sorted({' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 3)))
+                          for _ in range(40)})
+        text = ' '.join(rng.choice(vocabulary + ['ahe', 'apples']) for _ in range(300))
+        matcher = PhraseMatcher(phrases)
+        expected = sorted(
+            (m.start(), m.start() + len(phrase), i)
+            for i, phrase in enumerate(phrases)
+            for m in re.finditer(rf'(?=\b{re.escape(phrase)}\b)', text)
+        )
+        self.assertEqual(sorted(matcher.search(text)), expected)
+
+    def test_find_all_prefers_longest(self):
+        """Test selección sin solapamientos, la frase más larga primero."""
+        matcher = PhraseMatcher(['i am', 'i am agree', 'agree with'])
+        self.assertEqual(matcher.find_all('so i am agree with you'), [(3, 13, 1)])
+
+    def test_common_errors_feed_corrections(self):
+        """Test que las frases de la configuración generan correcciones."""
+        scorer = LanguageScoringSystem()
+        result = scorer.analyze_text("Much people say I am agree", 'en')
+        self.assertEqual(
+            [(c['error'], c['correction'], c['position']) for c in result['corrections']],
+            [('Much people', 'many people', (0, 11)), ('I am agree', 'I agree', (16, 26))]
+        )
+        # Una frase ya cubierta por una regla no se duplica
+        result = scorer.analyze_text("He are here", 'en')
+        self.assertEqual(len(result['corrections']), 1)
+
+
+class TestVocabularyIndex(unittest.TestCase):
+    """Tests para el índice de niveles de vocabulario."""
+
+    def setUp(self):
+        self.index = VocabularyIndex(SystemConfig.get_language_config('es').vocabulary_levels)
+
+    def test_words_and_phrases_by_level(self):
+        """Test palabras sueltas y expresiones en una sola pasada."""
+        tokens = TokenStream("Hola, sin embargo el medio ambiente. No obstante, gracias")
+        # principiante: hola, gracias; intermedio: sin embargo, medio ambiente;
+        # avanzado: no obstante ("no" no se cuenta aparte)
+        self.assertEqual(self.index.count(tokens.terms), [2, 2, 1])
+
+    def test_longest_phrase_wins(self):
+        """Test que una expresión incompleta cae en la palabra suelta."""
+        index = VocabularyIndex({'a': ['no', 'por favor'], 'b': ['no obstante', 'por']})
+        self.assertEqual(index.count(['no', 'obstante', 'no', 'por', 'favor', 'por']), [2, 2])
+
+    def test_level_bonus_raises_vocabulary(self):
+        """Test que el vocabulario avanzado suma al puntaje."""
+        scorer = LanguageScoringSystem()
+        words = "no obstante en consecuencia".split()
+        index = scorer.vocabulary_indexes['es']
+        self.assertGreater(index.level_bonus(index.weighted_hits(words), len(words)), 0)
+        self.assertEqual(VocabularyIndex.level_bonus(0, 0), 0)
+        self.assertEqual(scorer._vocabulary_score(4, 4, 24, index.weighted_hits(words)),
+                         scorer._analyze_vocabulary(' '.join(words), 'es'))
+
+    def test_crosses_detects_split_phrases(self):
+        """Test expresiones que empiezan en una parte y terminan en otra."""
+        self.assertTrue(self.index.crosses(['hola', 'sin'], ['embargo', 'hola']))
+        self.assertFalse(self.index.crosses(['sin', 'embargo'], ['hola']))
+        self.assertFalse(VocabularyIndex({'a': ['hola']}).crosses(['hola'], ['hola']))
+
+
+class TestRequestCoalescer(unittest.TestCase):
+    """Tests para la agrupación de peticiones en vuelo."""
+
+    def test_identical_requests_share_one_execution(self):
+        """Test que peticiones concurrentes con la misma clave se agrupan."""
+        coalescer = RequestCoalescer()
+        calls = []
+
+        def slow_square(value):
+            calls.append(value)
+            time.sleep(0.05)
+            return value * value
+
+        async def run_all():
+            return await asyncio.gather(
+                *[coalescer.run('same', slow_square, 3) for _ in range(5)],
+                coalescer.run('other', slow_square, 4)
+            )
+
+        results = asyncio.run(run_all())
+        self.assertEqual(results, [9, 9, 9, 9, 9, 16])
+        self.assertEqual(sorted(calls), [3, 4])
+        self.assertEqual(coalescer.stats(), {
+            'requests': 6, 'executions': 2, 'coalesced': 4, 'in_flight': 0
+        })
+
+    def test_errors_reach_every_waiter(self):
+        """Test que un error se propaga a todas las peticiones agrupadas."""
+        coalescer = RequestCoalescer()
+
+        def failing():
+            time.sleep(0.02)
+            raise ValueError('boom')
+
+        async def run_all():
+            return await asyncio.gather(
+                *[coalescer.run('key', failing) for _ in range(3)],
+                return_exceptions=True
+            )
+
+        results = asyncio.run(run_all())
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(coalescer.stats()['executions'], 1)
+        self.assertEqual(coalescer.stats()['in_flight'], 0)
+
+
+class TestDeepAnalysis(unittest.TestCase):
+    """Tests para el modo profundo con spaCy."""
+
+    def test_lemma_cache_is_bounded_lru(self):
+        """Test que la caché de lemas descarta la entrada menos usada."""
+        cache = LemmaCache(max_entries=2)
+        cache.set(('en', 'books', 'NOUN', 'Number=Plur'), 'book')
+        cache.set(('en', 'ran', 'VERB', ''), 'run')
+        self.assertEqual(cache.get(('en', 'books', 'NOUN', 'Number=Plur')), 'book')
+        cache.set(('en', 'went', 'VERB', ''), 'go')
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(('en', 'ran', 'VERB', '')))
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    @unittest.skipIf(BACKENDS.is_available('spacy_en'), "spaCy instalado")
+    def test_deep_mode_requires_spacy(self):
+        """Test error explícito si spaCy no está instalado."""
+        scorer = LanguageScoringSystem()
+        with self.assertRaises(BackendUnavailableError):
+            scorer.analyze_text("The students reads a books", 'en', deep=True)
+
+    @unittest.skipUnless(BACKENDS.is_available('spacy_en'), "spaCy no instalado")
+    def test_deep_mode_adds_agreement_errors(self):
+        """Test que el modo profundo añade errores que las reglas no ven."""
+        scorer = LanguageScoringSystem()
+        text = "The students reads a books every day"
+        try:
+            regex = scorer.analyze_text(text, 'en')
+            deep = scorer.analyze_text(text, 'en', deep=True)
+        except BackendUnavailableError as e:
+            self.skipTest(str(e))
+        self.assertGreater(len(deep['corrections']), len(regex['corrections']))
+        self.assertLessEqual(deep['scores']['grammar'], regex['scores']['grammar'])
+        self.assertEqual(scorer.analyze_batch([text], 'en', deep=True)[0]['corrections'],
+                         deep['corrections'])
+
+
+class TestBackendRegistry(unittest.TestCase):
+    """Tests para la carga diferida de backends de NLP."""
+
+    def test_loads_once_on_first_use(self):
+        """Test que el loader sólo se ejecuta en el primer `get`."""
+        calls = []
+        registry = BackendRegistry()
+        registry.register('fake', ['json'], lambda: calls.append(1) or 'model')
+        self.assertFalse(registry.is_loaded('fake'))
+        self.assertEqual(calls, [])
+        self.assertEqual(registry.get('fake'), 'model')
+        self.assertEqual(registry.get('fake'), 'model')
+        self.assertEqual(calls, [1])
+        self.assertTrue(registry.status()['fake']['loaded'])
+
+    def test_missing_dependency(self):
+        """Test backend no instalado: error propio y precarga tolerante."""
+        registry = BackendRegistry()
+        registry.register('missing', ['tutorium_missing_module'],
+                          lambda: __import__('tutorium_missing_module'))
+        self.assertFalse(registry.is_available('missing'))
+        with self.assertRaises(BackendUnavailableError):
+            registry.get('missing')
+        errors = registry.preload(['missing', 'unknown'])
+        self.assertIsNotNone(errors['missing'])
+        self.assertIsNotNone(errors['unknown'])
+
+
+class TestMetrics(unittest.TestCase):
+    """Tests para los histogramas de latencia."""
+
+    def test_render_cumulative_buckets(self):
+        """Test formato Prometheus con buckets acumulados."""
+        registry = MetricsRegistry()
+        registry.observe_stage('grammar', 'en', 150, 0.0002)
+        registry.observe_stage('grammar', 'en', 150, 0.003)
+        registry.observe_stage('grammar', 'en', 150, 10.0)
+        lines = registry.render().splitlines()
+        prefix = 'tutorium_stage_duration_seconds'
+        labels = 'stage="grammar",language="en",length="<=200"'
+        self.assertIn(f'{prefix}_bucket{{{labels},le="0.0005"}} 1', lines)
+        self.assertIn(f'{prefix}_bucket{{{labels},le="0.005"}} 2', lines)
+        self.assertIn(f'{prefix}_bucket{{{labels},le="+Inf"}} 3', lines)
+        self.assertIn(f'{prefix}_count{{{labels}}} 3', lines)
+        self.assertEqual(length_bucket(5001), '>5000')
+
+    def test_drain_and_merge_aggregate(self):
+        """Test que drenar y sumar entre registros conserva los totales."""
+        worker, parent = MetricsRegistry(), MetricsRegistry()
+        for seconds in (0.001, 0.02):
+            worker.observe_stage('rules', 'es', 800, seconds)
+        parent.observe_stage('rules', 'es', 800, 0.001)
+        parent.merge(worker.drain())
+        series = parent.snapshot()[(STAGE_METRIC, ('rules', 'es', '<=1000'))]
+        self.assertEqual(series[-1], 3)
+        self.assertAlmostEqual(series[-2], 0.022)
+        self.assertEqual(worker.snapshot(), {})
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        registry.stage_timer('en', 10).mark('grammar')
+        self.assertEqual(registry.snapshot(), {})
+
+
+class TestBenchSuite(unittest.TestCase):
+    """Tests para el corpus sintético y la comparación con la baseline."""
+
+    def test_synthetic_corpus(self):
+        """Test corpus determinista, acotado y con errores según densidad."""
+        corpus = synthetic_corpus('es', 5, 300, error_density=0.2)
+        self.assertEqual(corpus, synthetic_corpus('es', 5, 300, error_density=0.2))
+        self.assertTrue(all(0 < len(text) <= 300 for text in corpus))
+
+        scorer = LanguageScoringSystem()
+        clean = synthetic_corpus('en', 5, 300, error_density=0.0)
+        noisy = synthetic_corpus('en', 5, 300, error_density=0.3)
+        count = lambda texts: sum(len(scorer.analyze_text(t, 'en')['corrections']) for t in texts)
+        self.assertGreater(count(noisy), count(clean))
+
+    def test_compare_detects_regressions(self):
+        """Test umbral relativo, sentido de cada métrica y ruido absoluto."""
+        baseline = {'stage': {'p95_ms': 10.0, 'throughput': 100.0, 'peak_kb': 64.0},
+                    'tiny': {'p95_ms': 0.01, 'throughput': 1000.0, 'peak_kb': 1.0}}
+        current = {'stage': {'p95_ms': 11.0, 'throughput': 60.0, 'peak_kb': 128.0},
+                   'tiny': {'p95_ms': 0.03, 'throughput': 1000.0, 'peak_kb': 4.0},
+                   'new': {'p95_ms': 1.0, 'throughput': 1.0, 'peak_kb': 1.0}}
+        regressions = compare(current, baseline, threshold=0.25)
+        self.assertEqual([r.split(':')[0] for r in regressions],
+                         ['stage throughput', 'stage peak_kb'])
+
+
+class TestIncrementalAnalysis(unittest.TestCase):
+    """Tests para el análisis incremental por oraciones."""
+
+    def setUp(self):
+        self.scorer = LanguageScoringSystem()
+
+    def assertSameAnalysis(self, incremental, full):
+        incremental, full = dict(incremental), dict(full)
+        incremental.pop('timestamp')
+        full.pop('timestamp')
+        self.assertEqual(incremental, full)
+
+    def test_split_segments_roundtrip(self):
+        text = "He are here.  They was happy!? Version 2.0 is out. End"
+        segments = split_segments(text)
+        self.assertEqual(''.join(piece for _, piece in segments), text)
+        self.assertEqual([offset for offset, _ in segments], [0, 12, 30, 50])
+
+    def test_only_changed_sentences_are_reanalyzed(self):
+        """Test que una oración insertada desplaza las posiciones siguientes."""
+        analyzer = IncrementalAnalyzer(self.scorer, 'en')
+        analyzer.analyze("He are my friend. They was very good.")
+        text = "He are my friend. I is here. They was very good."
+        result = analyzer.analyze(text)
+        self.assertEqual(analyzer.last_stats, {'segments': 3, 'reanalyzed': 1})
+        self.assertSameAnalysis(result, self.scorer.analyze_text(text, 'en'))
+        start = text.index('They was')
+        self.assertIn((start, start + 8), [c['position'] for c in result['corrections']])
+
+    def test_random_edits_match_full_analysis(self):
+        """Test ediciones aleatorias (incluidas expresiones entre oraciones)."""
+        rng = random.Random(3)
+        for language in ('en', 'es'):
+            analyzer = IncrementalAnalyzer(self.scorer, language)
+            pool = synthetic_corpus(language, 1, 400, error_density=0.3)[0].split()
+            pool += ['sin', 'embargo', 'in', 'order', 'to', '.', '!', 'a.b', '\n']
+            words = synthetic_corpus(language, 1, 300, error_density=0.2)[0].split(' ')
+            for _ in range(200):
+                position = rng.randrange(len(words) + 1)
+                if rng.random() < 0.6 or len(words) < 5:
+                    words.insert(position, rng.choice(pool) + rng.choice(['', '.', '?']))
+                else:
+                    del words[min(position, len(words) - 1)]
+                text = ' '.join(words)
+                self.assertSameAnalysis(analyzer.analyze(text),
+                                        self.scorer.analyze_text(text, language))
+
+    def test_rules_crossing_sentences_fall_back(self):
+        """Test reglas que atraviesan separadores: se analiza el texto completo."""
+        self.scorer.common_errors['en']['grammar'].append(
+            {'pattern': r'\bend\. so\b', 'correction': 'end, so'})
+        self.scorer.rebuild_rules()
+        self.assertFalse(self.scorer.rule_engines['en'].sentence_local)
+        analyzer = IncrementalAnalyzer(self.scorer, 'en')
+        text = "That is the end. So we go home."
+        self.assertSameAnalysis(analyzer.analyze(text), self.scorer.analyze_text(text, 'en'))
+        self.assertTrue(self.scorer.rule_engines['es'].sentence_local)
+
+
+class TestStreamingAnalysis(unittest.TestCase):
+    """Tests para el análisis en streaming por oraciones."""
+
+    def setUp(self):
+        self.scorer = LanguageScoringSystem()
+
+    def test_chunks_match_full_analysis(self):
+        """Test fragmentos aleatorios: hallazgos y puntuaciones como `analyze_text`."""
+        rng = random.Random(5)
+        for language in ('en', 'es'):
+            text = synthetic_corpus(language, 1, 1500, error_density=0.3)[0]
+            session = StreamSession(self.scorer, language)
+            found = []
+            position = 0
+            while position < len(text):
+                size = rng.randint(1, 30)
+                for event in session.feed(text[position:position + size]):
+                    found += event['corrections'] + event['suggestions']
+                position += size
+                partial = self.scorer.analyze_text(text[:position], language)
+                self.assertEqual(session.scores()['scores'], partial['scores'])
+            for event in session.finish():
+                found += event['corrections'] + event['suggestions']
+            full = self.scorer.analyze_text(text, language)
+            key = lambda item: (item['position'], item['type'])
+            self.assertEqual(sorted(found, key=key),
+                             sorted(full['corrections'] + full['suggestions'], key=key))
+            self.assertEqual(session.scores()['overall_score'], full['overall_score'])
+            self.assertEqual(session.pending, '')
+
+    def test_memory_bounds(self):
+        """Test oración pendiente acotada y límite de texto por conexión."""
+        session = StreamSession(self.scorer, 'en', max_chars=500, max_pending=40)
+        events = session.feed('word ' * 30)
+        self.assertTrue(events)
+        self.assertLessEqual(len(session.pending), 40)
+        with self.assertRaises(StreamLimitError):
+            session.feed('x' * 400)
+
+    def test_forced_cut_keeps_words_whole(self):
+        """Test corte por longitud sin partir palabras y rechazo de palabras largas."""
+        text = "abcdefgh ijklmnopq rst uvw"
+        session = StreamSession(self.scorer, 'en', max_pending=10)
+        events = session.feed(text[:22]) + session.feed(text[22:]) + session.finish()
+        self.assertEqual([text[start:end] for start, end in
+                          (event['position'] for event in events)],
+                         ["abcdefgh ijklmnopq ", "rst uvw"])
+        self.assertEqual(session.scores()['scores'],
+                         self.scorer.analyze_text(text, 'en')['scores'])
+
+        session = StreamSession(self.scorer, 'en', max_pending=10)
+        session.feed('hello abcde')
+        with self.assertRaises(StreamLimitError):
+            session.feed('fghijk')
+        self.assertEqual((session.pending, session.received), ('abcde', 11))
+
+    def test_websocket_channel(self):
+        """Test eventos por oración y puntuación final por WebSocket."""
+        try:
+            from starlette.testclient import TestClient
+            import language_asgi
+        except ImportError as e:
+            self.skipTest(str(e))
+        client = TestClient(language_asgi.asgi_app)
+        with client.websocket_connect('/ws/analyze-stream?language=en') as ws:
+            self.assertEqual(ws.receive_json()['type'], 'ready')
+            for chunk in ('He are my fri', 'end. They was ', 'happy'):
+                ws.send_json({'type': 'chunk', 'text': chunk})
+            ws.send_json({'type': 'end'})
+            messages = []
+            while not messages or messages[-1]['type'] != 'final':
+                messages.append(ws.receive_json())
+        sentences = [m for m in messages if m['type'] == 'sentence']
+        self.assertEqual([m['position'] for m in sentences], [[0, 17], [17, 32]])
+        full = self.scorer.analyze_text('He are my friend. They was happy', 'en')
+        self.assertEqual(messages[-1]['scores'], full['scores'])
+
+
+class TestSpeechAnalysis(unittest.TestCase):
+    """Tests para el análisis de grabaciones (pronunciación)."""
+
+    def _wav(self, speech=True, width=2, seconds=3.0, rate=16000):
+        """WAV sintético: tono modulado (sílabas) con pausas y ruido de fondo."""
+        t = np.arange(int(rate * seconds)) / rate
+        signal = np.random.default_rng(0).normal(0, 0.002, len(t))
+        if speech:
+            envelope = np.sin(2 * np.pi * 2 * t) ** 2 * ((t > 0.3) & (t < seconds - 0.3))
+            signal += 0.3 * envelope * np.sin(2 * np.pi * 180 * t)
+        scale = 2 ** (8 * width - 1) - 1
+        samples = (signal * scale).astype(f'<i{width}')
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as output:
+            output.setnchannels(1)
+            output.setsampwidth(width)
+            output.setframerate(rate)
+            output.writeframes(samples.tobytes())
+        buffer.seek(0)
+        return buffer
+
+    def test_speech_features(self):
+        """Test rasgos y puntuación de una grabación con voz."""
+        result = analyze_audio(self._wav())
+        self.assertEqual(result.info.format, 'wav')
+        self.assertEqual(result.info.sample_rate, 16000)
+        self.assertAlmostEqual(result.features.duration, 3.0, places=2)
+        self.assertLess(result.features.speech_duration, result.features.duration)
+        self.assertGreater(result.features.syllable_rate, 0)
+        self.assertGreater(result.score, 50)
+        self.assertEqual(analyze_audio(self._wav(width=4)).score, result.score)
+
+    def test_silence_and_invalid_audio(self):
+        """Test silencio puntúa 0 y formatos no soportados se rechazan."""
+        silent = analyze_audio(self._wav(speech=False))
+        self.assertEqual(silent.score, 0)
+        self.assertEqual(silent.features.speech_duration, 0)
+        with self.assertRaises(AudioFormatError):
+            analyze_audio(io.BytesIO(b'ID3' + b'\x00' * 100))
+
+    def test_truncated_wav(self):
+        """Test WAV cortado a mitad de una muestra: se descarta la trama incompleta."""
+        for width in (2, 4):
+            data = self._wav(width=width).getvalue()
+            result = analyze_audio(io.BytesIO(data[:-1]))
+            self.assertAlmostEqual(result.features.duration, 3.0, places=2)
+            self.assertGreater(result.score, 50)
+
+    def test_pronunciation_feeds_overall_score(self):
+        """Test la pronunciación medida entra en la puntuación general."""
+        scorer = LanguageScoringSystem()
+        analysis = scorer.analyze_text("He are my friend", 'en')
+        before = analysis['overall_score']
+        scorer.apply_pronunciation(analysis, 0)
+        self.assertEqual(analysis['scores']['pronunciation'], 0)
+        self.assertLess(analysis['overall_score'], before)
+
+
+class TestPhonemeTemplates(unittest.TestCase):
+    """Tests para el índice de plantillas de pronunciación."""
+
+    def setUp(self):
+        self.source = tempfile.TemporaryDirectory()
+        self.output = tempfile.TemporaryDirectory()
+        self.addCleanup(self.source.cleanup)
+        self.addCleanup(self.output.cleanup)
+
+    def _write_wav(self, path, frequency, seconds=0.8, rate=16000):
+        t = np.arange(int(rate * seconds)) / rate
+        signal = np.random.default_rng(1).normal(0, 0.002, len(t))
+        signal += 0.3 * np.sin(2 * np.pi * frequency * t) * ((t > 0.2) & (t < seconds - 0.2))
+        with wave.open(path, 'wb') as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(rate)
+            output.writeframes((signal * 32767).astype('<i2').tobytes())
+
+    def test_build_and_map_index(self):
+        """Test construcción offline y apertura mapeada sin copias."""
+        phoneme_dir = os.path.join(self.source.name, 'en', 'θ')
+        os.makedirs(phoneme_dir)
+        self._write_wav(os.path.join(phoneme_dir, 'a.wav'), 300)
+        self._write_wav(os.path.join(phoneme_dir, 'b.wav'), 320, seconds=1.0)
+        os.makedirs(os.path.join(self.source.name, 'es'))
+        np.save(os.path.join(self.source.name, 'es', 'hola.npy'),
+                np.ones((7, SystemConfig.SPEECH_FEATURE_BANDS), dtype=np.float32))
+
+        manifest = build_index(self.source.name, self.output.name)
+        self.assertIn('/ð/', manifest['missing_phonemes']['en'])
+
+        index = TemplateIndex(self.output.name)
+        self.assertEqual(index.units('en', 'phoneme'), ['/θ/'])
+        self.assertEqual(index.units('es', 'word'), ['hola'])
+        templates = index.templates('en', '/θ/')
+        self.assertEqual(len(templates), 2)
+        self.assertIsInstance(index.array('en', '/θ/'), np.memmap)
+        self.assertFalse(index.array('en', '/θ/').flags.writeable)
+        with open(os.path.join(phoneme_dir, 'a.wav'), 'rb') as handle:
+            np.testing.assert_array_equal(templates[0], spectral_features(handle))
+
+    def test_rebuild_keeps_previous_arrays(self):
+        """Test un índice abierto sigue leyendo sus arrays tras reconstruir."""
+        language_dir = os.path.join(self.source.name, 'es')
+        os.makedirs(language_dir)
+        for number, name in enumerate(('casa', 'perro')):
+            np.save(os.path.join(language_dir, f'{name}.npy'),
+                    np.full((3, SystemConfig.SPEECH_FEATURE_BANDS), number, dtype=np.float32))
+        build_index(self.source.name, self.output.name)
+        old = TemplateIndex(self.output.name)
+
+        # La nueva unidad ocupa la primera posición al reconstruir
+        np.save(os.path.join(language_dir, 'arbol.npy'),
+                np.full((5, SystemConfig.SPEECH_FEATURE_BANDS), 9, dtype=np.float32))
+        build_index(self.source.name, self.output.name)
+        new = TemplateIndex(self.output.name)
+        self.assertNotEqual(old.build, new.build)
+
+        self.assertEqual(old.templates('es', 'perro')[0][0, 0], 1)
+        self.assertEqual(new.templates('es', 'perro')[0][0, 0], 1)
+        self.assertEqual(new.templates('es', 'arbol')[0].shape[0], 5)
+
+    def test_shared_index_stats(self):
+        """Test índice compartido del proceso y su estado en /api/cache/stats."""
+        try:
+            import language_api
+        except ImportError as e:
+            self.skipTest(str(e))
+        from unittest import mock
+        import phoneme_templates
+
+        os.makedirs(os.path.join(self.source.name, 'es'))
+        np.save(os.path.join(self.source.name, 'es', 'hola.npy'),
+                np.ones((7, SystemConfig.SPEECH_FEATURE_BANDS), dtype=np.float32))
+        build_index(self.source.name, self.output.name)
+        client = language_api.app.test_client()
+        with mock.patch.object(SystemConfig, 'PHONEME_TEMPLATE_INDEX', self.output.name), \
+                mock.patch.object(phoneme_templates, '_index', None):
+            index = phoneme_templates.get_template_index().map_all()
+            self.assertIs(phoneme_templates.get_template_index(), index)
+            stats = client.get('/api/cache/stats').get_json()['phoneme_templates']
+        self.assertEqual((stats['units'], stats['mapped_files']), (1, 1))
+        self.assertEqual(stats['build'], index.build)
+
+    def test_rejects_mismatched_features(self):
+        """Test el índice no se abre con otros parámetros de rasgos."""
+        with self.assertRaises(TemplateIndexError):
+            TemplateIndex(self.output.name)
+        build_index(self.source.name, self.output.name)
+        with self.assertRaises(TemplateIndexError):
+            TemplateIndex(self.output.name, bands=SystemConfig.SPEECH_FEATURE_BANDS + 1)
+
+
+class TestDTWAlignment(unittest.TestCase):
+    """Tests para el alineamiento DTW con banda de Sakoe–Chiba."""
+
+    def test_matches_cell_by_cell_dtw(self):
+        """Test mismo coste que el DTW celda a celda y camino válido."""
+        rng = np.random.default_rng(2)
+        for _ in range(60):
+            n, m = rng.integers(1, 30, size=2)
+            query, template = rng.normal(size=(n, 3)), rng.normal(size=(m, 3))
+            ratio = float(rng.choice([0.0, 0.1, 1.0]))
+            result = align(query, template, ratio, return_path=True)
+            expected = naive_dtw(query, template, band_width(n, m, ratio))
+            self.assertAlmostEqual(result.cost, expected, places=6)
+
+            path = result.path
+            self.assertEqual(tuple(path[0]), (0, 0))
+            self.assertEqual(tuple(path[-1]), (n - 1, m - 1))
+            steps = np.diff(path, axis=0)
+            self.assertTrue(((steps >= 0) & (steps <= 1)).all())
+            self.assertTrue((steps.sum(axis=1) > 0).all())
+            path_cost = np.linalg.norm(query[path[:, 0]] - template[path[:, 1]], axis=1).sum()
+            self.assertAlmostEqual(path_cost, result.cost, places=6)
+
+    def test_early_abandoning(self):
+        """Test abandono sólo cuando el coste supera el límite."""
+        rng = np.random.default_rng(4)
+        query, template = rng.normal(size=(80, 4)), rng.normal(size=(95, 4))
+        exact = align(query, template).cost
+        self.assertTrue(align(query, template, max_cost=exact * 0.9).abandoned)
+        self.assertEqual(align(query, template, max_cost=exact).cost, exact)
+
+    def test_batch_finds_best_template(self):
+        """Test el lote elige la misma plantilla que alinear todas."""
+        query, templates = synthetic_utterances(150, words=4, takes=3)
+        exact = min((align(query, template)._replace(index=index)
+                     for index, template in enumerate(templates)),
+                    key=lambda result: result.normalized_cost)
+        results = align_batch(query, templates)
+        self.assertEqual(len(results), len(templates))
+        self.assertTrue(any(result.abandoned for result in results))
+        best = best_alignment(query, templates, return_path=True)
+        self.assertEqual(best.index, exact.index)
+        self.assertAlmostEqual(best.cost, exact.cost)
+        self.assertIsNotNone(best.path)
+
+
+class TestWireFormat(unittest.TestCase):
+    """Tests para el formato compacto y la negociación de contenido."""
+
+    def setUp(self):
+        self.scorer = LanguageScoringSystem()
+        self.analysis = self.scorer.analyze_text(
+            "He are my friend. She are nice. They was here. Very very good.", 'en')
+        self.analysis.pop('timestamp')
+
+    def test_negotiation(self):
+        """Test elección del formato según Accept y q."""
+        self.assertIs(negotiate(None), JSON)
+        self.assertIs(negotiate('*/*'), JSON)
+        self.assertIs(negotiate('text/html'), JSON)
+        self.assertIs(negotiate('application/vnd.tutorium.compact+json'), COMPACT_JSON)
+        self.assertIs(negotiate('application/json;q=0.5, application/vnd.tutorium.compact+json'),
+                      COMPACT_JSON)
+        self.assertIs(negotiate('application/vnd.tutorium.compact+json;q=0, */*'), JSON)
+        msgpack_choice = negotiate('application/vnd.tutorium.compact+msgpack, '
+                                   'application/vnd.tutorium.compact+json;q=0.9')
+        self.assertIs(msgpack_choice,
+                      COMPACT_MSGPACK if COMPACT_MSGPACK.available() else COMPACT_JSON)
+
+    def test_compact_roundtrip(self):
+        """Test columnas, cadenas compartidas y reconstrucción exacta."""
+        payload = compact(self.analysis)
+        corrections = payload['corrections']
+        self.assertEqual(len(corrections['start_delta']), len(self.analysis['corrections']))
+        # Cada texto repetido se envía una sola vez
+        self.assertEqual(len(payload['strings']), len(set(payload['strings'])))
+        self.assertEqual(len(set(corrections['type'])), 1)
+        expected = json.loads(json.dumps(self.analysis))
+        self.assertEqual(expand(json.loads(COMPACT_JSON.encode(self.analysis))), expected)
+        self.assertLess(len(COMPACT_JSON.encode(self.analysis)), len(json.dumps(self.analysis)))
+        empty = dict(self.analysis, corrections=[], suggestions=[])
+        self.assertEqual(expand(compact(empty))['corrections'], [])
+
+    def test_compact_from_result(self):
+        """Test columnas desde la tabla de coincidencias (también binarias)."""
+        text = "He are my friend. She are nice. They was here. Very very good."
+        result = self.scorer.analyze(text, 'en')
+        extra = {'advice': ['Practice']}
+        expected = json.loads(json.dumps(dict(self.analysis, **extra)))
+        self.assertEqual(compact_result(result, extra), compact(dict(self.analysis, **extra)))
+        self.assertEqual(expand(json.loads(COMPACT_JSON.encode_result(result, extra))), expected)
+        binary = compact_result(result, extra, binary=True)
+        self.assertIsInstance(binary['corrections']['length'], bytes)
+        self.assertEqual(expand(binary), expected)
+        # Recibido de otro proceso: sin motor hasta `bind_engine`
+        received = pickle.loads(pickle.dumps(result))
+        received.bind_engine(self.scorer.rule_engines['en'])
+        self.assertEqual(compact_result(received, extra), compact_result(result, extra))
+        # Resultados ya materializados (caché) usan el camino de diccionarios
+        cached = AnalysisResult.from_dict(dict(self.analysis, timestamp='t'))
+        self.assertEqual(expand(compact_result(cached, extra)), expected)
+
+    def test_asgi_negotiation(self):
+        """Test el endpoint ASGI responde en el formato pedido."""
+        try:
+            from starlette.testclient import TestClient
+            import language_asgi
+        except ImportError as e:
+            self.skipTest(str(e))
+        client = TestClient(language_asgi.asgi_app)
+        body = {'text': 'He are my friend. She are nice.', 'language': 'en'}
+        verbose = client.post('/api/analyze-language', json=body)
+        compact_response = client.post('/api/analyze-language', json=body, headers={
+            'Accept': 'application/vnd.tutorium.compact+json'})
+        self.assertEqual(compact_response.headers['content-type'], COMPACT_JSON.media_type)
+        self.assertEqual(compact_response.headers['vary'], 'Accept')
+        self.assertEqual(expand(compact_response.json()), verbose.json())
+
+
+class TestAnalysisResult(unittest.TestCase):
+    """Tests para los resultados compactos con materialización diferida."""
+
+    TEXTS = [
+        "He are my friend. She are nice. They was here. Very very good.",
+        "I goed to school and it was really bad",
+        "",
+    ]
+
+    def setUp(self):
+        self.scorer = LanguageScoringSystem()
+
+    def test_to_dict_matches_analyze_text(self):
+        """Test que `to_dict` reproduce exactamente `analyze_text`."""
+        for language, text in [('en', text) for text in self.TEXTS] + [
+                ('es', "La problema esta bueno. Yo soy teniendo un gato.")]:
+            analysis = self.scorer.analyze_text(text, language)
+            materialized = self.scorer.analyze(text, language).to_dict()
+            self.assertEqual(list(materialized), list(analysis))
+            analysis.pop('timestamp'), materialized.pop('timestamp')
+            self.assertEqual(json.dumps(materialized), json.dumps(analysis))
+            self.assertEqual(materialized, analysis)
+
+    def test_compact_storage(self):
+        """Test que las coincidencias se guardan como enteros, sin diccionarios."""
+        result = self.scorer.analyze(self.TEXTS[0], 'en')
+        self.assertFalse(hasattr(result, '__dict__'))
+        self.assertEqual(result.matches.rows.typecode, 'q')
+        self.assertEqual(result.matches.counts(), (3, 1))
+        self.assertEqual(result.score_row(), [result.grammar, result.syntax,
+                                              result.vocabulary, result.pronunciation])
+
+    def test_cached_result(self):
+        """Test que un resultado de la caché materializa el análisis guardado."""
+        scorer = LanguageScoringSystem(cache=AnalysisCache(max_entries=10, ttl=60))
+        first = scorer.analyze(self.TEXTS[0], 'en').to_dict()
+        cached = scorer.analyze(self.TEXTS[0], 'en')
+        self.assertEqual(cached.overall_score, first['overall_score'])
+        materialized = cached.to_dict()
+        first.pop('timestamp'), materialized.pop('timestamp')
+        self.assertEqual(materialized, first)
+
+    def test_progress_report_from_results(self):
+        """Test que el reporte de progreso acepta resultados y diccionarios."""
+        results = [self.scorer.analyze(text, 'en') for text in self.TEXTS * 3]
+        from_results = self.scorer.export_progress_report(results)
+        from_dicts = self.scorer.export_progress_report(
+            [result.to_dict() for result in results])
+        from_results.pop('generated_at'), from_dicts.pop('generated_at')
+        self.assertEqual(from_results, from_dicts)
+
+
+class TestBulkScoring(unittest.TestCase):
+    """Tests para la puntuación masiva offline con reanudación."""
+
+    TEXTS = [
+        "He are my friend. She are nice.",
+        "They was here and it was really good.",
+        "La problema esta bueno.",
+        "We go to school every day with friends.",
+        "I is happy. Very good work.",
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.corpus = os.path.join(self.directory.name, 'corpus.jsonl')
+        with open(self.corpus, 'w', encoding='utf-8') as handle:
+            for number, text in enumerate(self.TEXTS * 4):
+                record = {'id': f'doc-{number}', 'text': text}
+                if 'problema' in text:
+                    record['language'] = 'es'
+                handle.write(json.dumps(record) + '\n')
+            handle.write('\n{"id": "bad", "text": ""}\nnot json\n')
+
+    def read_output(self, path):
+        with open(path, encoding='utf-8') as handle:
+            return [json.loads(line) for line in handle]
+
+    def test_scores_in_order(self):
+        """Test que la salida sigue el orden del corpus y coincide con analyze_text."""
+        output = os.path.join(self.directory.name, 'scores.jsonl')
+        summary = score_corpus(self.corpus, output, workers=1, chunk_size=3)
+        self.assertEqual(summary['records'], 22)
+        self.assertEqual(summary['errors'], 2)
+        results = self.read_output(output)
+        self.assertEqual([item['index'] for item in results], list(range(22)))
+        scorer = LanguageScoringSystem()
+        for item in results[:20]:
+            language = 'es' if 'problema' in self.TEXTS[item['index'] % 5] else 'en'
+            expected = scorer.analyze_text(self.TEXTS[item['index'] % 5], language)
+            expected.pop('timestamp')
+            self.assertEqual(item['id'], f"doc-{item['index']}")
+            self.assertEqual(item['analysis'], json.loads(json.dumps(expected)))
+        self.assertIn('error', results[20])
+        self.assertIn('Invalid JSON', results[21]['error'])
+
+    def test_resume_after_interruption(self):
+        """Test que una ejecución cortada continúa y descarta lo no confirmado."""
+        reference = os.path.join(self.directory.name, 'reference.jsonl')
+        score_corpus(self.corpus, reference, workers=1, chunk_size=4)
+
+        output = os.path.join(self.directory.name, 'scores.jsonl')
+        first = score_corpus(self.corpus, output, workers=1, chunk_size=4, limit=8)
+        self.assertEqual(first['total_records'], 8)
+        # Escritura a medias después del último punto de control
+        with open(output, 'a', encoding='utf-8') as handle:
+            handle.write('{"index": 8, "partial')
+        second = score_corpus(self.corpus, output, workers=1, chunk_size=4)
+        self.assertEqual(second['resumed_from'], 8)
+        self.assertEqual(second['records'], 14)
+        self.assertEqual(self.read_output(output), self.read_output(reference))
+        # Terminada: relanzar no repite nada
+        self.assertEqual(score_corpus(self.corpus, output, workers=1)['records'], 0)
+
+    def test_limit_stops_reading(self):
+        """Test que `limit` deja de leer la entrada al alcanzarse."""
+        from unittest import mock
+        import bulk_scoring
+
+        read = []
+
+        def counting_reader(*args, **kwargs):
+            for record in read_corpus(*args, **kwargs):
+                read.append(record.index)
+                yield record
+
+        output = os.path.join(self.directory.name, 'scores.jsonl')
+        with mock.patch.object(bulk_scoring, 'read_corpus', counting_reader):
+            score_corpus(self.corpus, output, workers=1, chunk_size=2, limit=5)
+            self.assertEqual(read, list(range(5)))
+            read.clear()
+            score_corpus(self.corpus, output, workers=1, chunk_size=2, limit=7)
+            self.assertEqual(read, [5, 6])
+        self.assertEqual(len(self.read_output(output)), 7)
+
+    def test_csv_and_process_pool(self):
+        """Test CSV con campos multilínea puntuado por un pool de procesos."""
+        corpus = os.path.join(self.directory.name, 'corpus.csv')
+        with open(corpus, 'w', encoding='utf-8', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(['id', 'text', 'language'])
+            for number, text in enumerate(self.TEXTS * 3):
+                writer.writerow([number, text.replace('. ', '.\n'), 'auto'])
+        records = list(read_corpus(corpus, 'csv'))
+        self.assertEqual(len(records), 15)
+        self.assertIn('\n', records[0].text)
+        # Reanudar en la posición de un registro lee a partir del siguiente
+        tail = list(read_corpus(corpus, 'csv', offset=records[9].end, index=10))
+        self.assertEqual(tail, records[10:])
+
+        output = os.path.join(self.directory.name, 'scores.jsonl')
+        summary = score_corpus(corpus, output, workers=2, chunk_size=2)
+        self.assertEqual(summary['records'], 15)
+        results = self.read_output(output)
+        self.assertEqual([item['id'] for item in results], [str(n) for n in range(15)])
+        self.assertEqual(results[2]['analysis']['language'], 'es')
+
+    def test_rules_change_requires_restart(self):
+        """Test que no se mezcla una salida puntuada con otras reglas."""
+        output = os.path.join(self.directory.name, 'scores.jsonl')
+        score_corpus(self.corpus, output, workers=1, limit=5)
+        checkpoint = output + '.checkpoint.json'
+        with open(checkpoint, encoding='utf-8') as handle:
+            state = json.load(handle)
+        state['rules_version'] = 'old'
+        with open(checkpoint, 'w', encoding='utf-8') as handle:
+            json.dump(state, handle)
+        with self.assertRaises(BulkScoringError):
+            score_corpus(self.corpus, output, workers=1)
+        self.assertEqual(score_corpus(self.corpus, output, workers=1, restart=True)['records'], 22)
+
+
+class TestRuleSnapshot(unittest.TestCase):
+    """Tests para las instantáneas de reglas y su recarga en caliente."""
+
+    TEXT = "He are my friend. La problema is a apple. Very good work."
+    EXTRA_RULE = {'languages': {'en': {'grammar': [
+        {'pattern': r'\bmy friend\b', 'correction': 'our friend'}]}}}
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'rules.snapshot')
+
+    def analysis(self, scorer):
+        analysis = scorer.analyze_text(self.TEXT, 'en')
+        analysis.pop('timestamp')
+        return analysis
+
+    def test_snapshot_roundtrip(self):
+        """Test que el sistema cargado de la instantánea puntúa igual."""
+        header = build_snapshot(self.path)
+        self.assertEqual(read_header(self.path), header)
+        loaded_header, rule_set = load_snapshot(self.path)
+        self.assertEqual(loaded_header['version'], header['version'])
+        scorer = LanguageScoringSystem()
+        loaded = LanguageScoringSystem(rule_set=rule_set)
+        self.assertEqual(loaded._cache_version(), scorer._cache_version())
+        self.assertEqual(self.analysis(loaded), self.analysis(scorer))
+        self.assertEqual(loaded.rule_engines['en'].triggers, scorer.rule_engines['en'].triggers)
+
+    def test_overrides_change_version(self):
+        """Test que las reglas de `--rules` entran en la instantánea."""
+        base = build_snapshot(self.path)['version']
+        header = build_snapshot(self.path, self.EXTRA_RULE)
+        self.assertNotEqual(header['version'], base)
+        loaded = LanguageScoringSystem(rule_set=load_snapshot(self.path)[1])
+        errors = [item['error'] for item in self.analysis(loaded)['corrections']]
+        self.assertIn('my friend', errors)
+
+    def test_corrupt_snapshot(self):
+        """Test que un archivo truncado o ajeno no se carga."""
+        build_snapshot(self.path)
+        with open(self.path, 'rb') as handle:
+            data = handle.read()
+        for broken in (data[:-10], b'not a snapshot at all', b''):
+            with open(self.path, 'wb') as handle:
+                handle.write(broken)
+            with self.assertRaises(SnapshotError):
+                load_snapshot(self.path)
+
+    def rewrite(self, change_header=None, payload=None):
+        """Reescribe la instantánea con la cabecera o el contenido cambiados."""
+        with open(self.path, 'rb') as handle:
+            data = handle.read()
+        header, start = rule_snapshot._parse_header(data)
+        payload = data[start:] if payload is None else payload
+        header.update(payload_bytes=len(payload),
+                      payload_sha256=hashlib.sha256(payload).hexdigest())
+        if change_header:
+            header.update(change_header)
+        encoded = json.dumps(header).encode('utf-8')
+        with open(self.path, 'wb') as handle:
+            handle.write(rule_snapshot._PREAMBLE.pack(
+                rule_snapshot.MAGIC, rule_snapshot.SNAPSHOT_FORMAT_VERSION, len(encoded)))
+            handle.write(encoded + payload)
+
+    def test_incompatible_snapshot(self):
+        """Test instantáneas de otro código, de otro Python o que no se deserializan."""
+        build_snapshot(self.path)
+        self.assertEqual(read_header(self.path)['code_version'], rule_snapshot.code_version())
+        cases = [({'code_version': 'older-code'}, None),
+                 ({'python': '2.7'}, None),
+                 # Clase que ya no existe en el módulo: AttributeError al deserializar
+                 (None, b'\x80\x04crule_engine\nMissingClass\n.'),
+                 (None, b'\x80\x04')]
+        for change_header, payload in cases:
+            build_snapshot(self.path)
+            self.rewrite(change_header, payload)
+            with self.assertRaises(SnapshotError):
+                load_snapshot(self.path)
+
+    def test_manager_records_load_errors(self):
+        """Test que cualquier fallo de la carga inicial queda en `status()`."""
+        build_snapshot(self.path)
+        self.rewrite(payload=b'\x80\x04crule_engine\nMissingClass\n.')
+        manager = RuleSetManager(self.path)
+        manager.start().join()
+        status = manager.status()
+        self.assertFalse(status['ready'])
+        self.assertIn('MissingClass', status['error'])
+
+    def test_manager_reload_keeps_in_flight_rules(self):
+        """Test recarga atómica: quien tenía el sistema anterior sigue con él."""
+        build_snapshot(self.path)
+        installed = []
+        manager = RuleSetManager(self.path, on_swap=installed.append)
+        self.assertFalse(manager.status()['ready'])
+        first = manager.load()
+        self.assertTrue(first['ready'])
+        in_flight = manager.scorer
+
+        build_snapshot(self.path, self.EXTRA_RULE)
+        second = manager.load()
+        self.assertNotEqual(second['version'], first['version'])
+        self.assertEqual(second['reloads'], 1)
+        self.assertEqual(installed, [in_flight, manager.scorer])
+        old = [item['error'] for item in self.analysis(in_flight)['corrections']]
+        new = [item['error'] for item in self.analysis(manager.scorer)['corrections']]
+        self.assertNotIn('my friend', old)
+        self.assertIn('my friend', new)
+
+        # Una instantánea rota no sustituye a la que está funcionando
+        with open(self.path, 'wb') as handle:
+            handle.write(b'broken')
+        with self.assertRaises(SnapshotError):
+            manager.load()
+        status = manager.status()
+        self.assertTrue(status['ready'])
+        self.assertEqual(status['version'], second['version'])
+        self.assertIsNotNone(status['error'])
+
+    def test_readiness_and_admin_reload(self):
+        """Test /api/ready y /api/admin/reload-rules en la API ASGI."""
+        try:
+            from starlette.testclient import TestClient
+            import language_asgi
+        except ImportError as e:
+            self.skipTest(str(e))
+        from unittest import mock
+
+        build_snapshot(self.path)
+        original = language_asgi.scorer
+        self.addCleanup(language_asgi.install_scorer, original)
+        manager = RuleSetManager(self.path, cache=original.cache,
+                                 scorer=original, on_swap=language_asgi.install_scorer)
+        client = TestClient(language_asgi.asgi_app)
+        with mock.patch.object(language_asgi, 'rule_sets', manager), \
+                mock.patch.object(SystemConfig, 'ADMIN_TOKEN', 'secret'):
+            self.assertEqual(client.get('/api/ready').status_code, 503)
+            manager.load()
+            ready = client.get('/api/ready')
+            self.assertEqual(ready.status_code, 200)
+            self.assertEqual(ready.json()['rules']['version'], manager.version)
+
+            build_snapshot(self.path, self.EXTRA_RULE)
+            self.assertEqual(client.post('/api/admin/reload-rules').status_code, 401)
+            response = client.post('/api/admin/reload-rules',
+                                   headers={'X-Admin-Token': 'secret'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['rules']['version'], manager.version)
+            analysis = client.post('/api/analyze-language',
+                                   json={'text': self.TEXT, 'language': 'en'}).json()
+            self.assertIn('my friend', [item['error'] for item in analysis['corrections']])
+
+            # Un contenido que falla al deserializar responde con el estado
+            self.rewrite(payload=b'\x80\x04crule_engine\nMissingClass\n.')
+            with self.assertLogs('language_asgi', 'ERROR') as logs:
+                failed = client.post('/api/admin/reload-rules',
+                                     headers={'X-Admin-Token': 'secret'})
+            self.assertIn('Error reloading rules', logs.output[0])
+            self.assertEqual(failed.status_code, 500)
+            self.assertIn('MissingClass', failed.json()['rules']['error'])
+            self.assertEqual(client.get('/api/ready').status_code, 200)
+
+
+class TestLongDocument(unittest.TestCase):
+    """Tests para el análisis de documentos largos por fragmentos."""
+
+    def setUp(self):
+        self.scorer = LanguageScoringSystem()
+
+    def assertSameAnalysis(self, result, full):
+        result, full = result.to_dict(), dict(full)
+        result.pop('timestamp')
+        full.pop('timestamp')
+        self.assertEqual(result, full)
+
+    def test_shards_cover_text_at_sentence_ends(self):
+        text = "He are here.  They was happy!? Version 2.0 is out. " * 40 + "End"
+        shards = list(iter_shards(text, 100))
+        self.assertEqual(''.join(piece for _, piece in shards), text)
+        self.assertTrue(all(len(piece) <= 100 for _, piece in shards))
+        self.assertTrue(all(text[offset - 1] in '.!?' for offset, _ in shards[1:]))
+        # Una oración más larga que el límite no se corta
+        self.assertEqual([piece for _, piece in iter_shards("a b c. d e", 3)], ["a b c.", " d e"])
+
+    def test_sharded_analysis_matches_full(self):
+        """Test documento mayor que MAX_TEXT_LENGTH con frases entre fragmentos."""
+        for language in ('en', 'es'):
+            text = synthetic_corpus(language, 1, 12000, error_density=0.3)[0]
+            text += " We did it in order. To win. Fue así. Sin embargo. No más."
+            self.assertGreater(len(text), SystemConfig.MAX_TEXT_LENGTH)
+            full = self.scorer.analyze_text(text, language)
+            for shard_chars in (50, 700, 5000):
+                result, shards = analyze_document(self.scorer, text, language,
+                                                  shard_chars=shard_chars, window=3)
+                self.assertGreater(shards, 1)
+                self.assertSameAnalysis(result, full)
+
+    def test_rules_crossing_sentences_use_one_shard(self):
+        """Test reglas que atraviesan separadores: un único fragmento."""
+        self.scorer.common_errors['en']['grammar'].append(
+            {'pattern': r'\bend\. so\b', 'correction': 'end, so'})
+        self.scorer.rebuild_rules()
+        text = "That is the end. So we go home. " * 10
+        result, shards = analyze_document(self.scorer, text, 'en', shard_chars=40)
+        self.assertEqual(shards, 1)
+        self.assertSameAnalysis(result, self.scorer.analyze_text(text, 'en'))
+
+    def test_pool_shards_match_local(self):
+        """Test que los fragmentos repartidos en el pool dan el mismo análisis."""
+        pool = ScoringPool(workers=1, queue_size=0)
+        self.addCleanup(pool.close)
+        text = synthetic_corpus('en', 1, 12000, error_density=0.3)[0]
+        result, shards = pool.analyze_document(self.scorer, text, 'en')
+        self.assertGreater(shards, 1)
+        self.assertSameAnalysis(result, self.scorer.analyze_text(text, 'en'))
+
+
+class TestFlaskAPI(unittest.TestCase):
+    """Tests de los endpoints de la API Flask con su cliente de pruebas."""
+
+    def setUp(self):
+        try:
+            import language_api
+        except ImportError as e:
+            self.skipTest(str(e))
+        from unittest import mock
+        self.api = language_api
+        self.client = language_api.app.test_client()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        store = AnalysisStore(f"sqlite:///{os.path.join(self.tmp.name, 'store.db')}")
+        patcher = mock.patch.object(language_api, 'analysis_store', store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def wav(self, seconds=1.0, rate=16000):
+        """WAV PCM de 16 bits con un tono."""
+        t = np.arange(int(rate * seconds)) / rate
+        samples = (0.3 * np.sin(2 * np.pi * 180 * t) * 32767).astype('<i2')
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as output:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(rate)
+            output.writeframes(samples.tobytes())
+        return buffer.getvalue()
+
+    def test_batch_errors_and_order(self):
+        """Test lote: un resultado por texto, en orden, con errores por elemento."""
+        from unittest import mock
+        texts = ["He are good", "", 5, "I am fine. She were here", "x" * 10]
+        with mock.patch.object(SystemConfig, 'BATCH_CHUNK_SIZE', 2), \
+                mock.patch.object(SystemConfig, 'MAX_TEXT_LENGTH', 30):
+            response = self.client.post('/api/analyze-language/batch', json={'texts': texts})
+            self.assertEqual(response.status_code, 200)
+            items = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([item['index'] for item in items], list(range(len(texts))))
+        self.assertEqual(items[1]['error'], 'Text is required')
+        self.assertEqual(items[2]['error'], 'Text is required')
+        self.assertNotIn('error', items[4])
+        expected = self.api.scorer.analyze_text(texts[3], 'en')
+        self.assertEqual(items[3]['analysis']['corrections'],
+                         json.loads(json.dumps(expected['corrections'])))
+        self.assertEqual(items[3]['analysis']['scores'], expected['scores'])
+
+        for body in ({}, {'texts': []}, {'texts': 'He are'},
+                     {'texts': ['a'], 'language': 'fr'}, {'texts': ['a'], 'mode': 'x'}):
+            response = self.client.post('/api/analyze-language/batch', json=body)
+            self.assertEqual(response.status_code, 400, body)
+
+    def test_save_analysis_rejects_invalid(self):
+        """Test save-analysis responde 400 a cuerpos y puntuaciones inválidas."""
+        invalid = [
+            {'analysis': {'scores': {'grammar': 80}}},
+            {'student_id': 's1'},
+            {'student_id': 's1', 'analysis': {'scores': 'high'}},
+            {'student_id': 's1', 'analyses': 'x'},
+            {'student_id': 's1', 'analysis': {'scores': {'grammar': 'high'}}},
+            {'student_id': 's1', 'analysis': {'scores': {'syntax': True}}},
+            {'student_id': 's1', 'analyses': [{'scores': {'grammar': 80}},
+                                              {'scores': {'vocabulary': [1]}}]},
+            {'student_id': 's1', 'analysis': {'scores': {'grammar': 80}, 'overall_score': {}}},
+        ]
+        for body in invalid:
+            response = self.client.post('/api/save-analysis', json=body)
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn('error', response.get_json())
+        self.assertEqual(self.client.post('/api/save-analysis', data='x').status_code, 400)
+        self.assertEqual(self.client.get('/api/student-progress/s1').status_code, 404)
+
+    def test_student_progress_round_trip(self):
+        """Test guardar análisis y leer el reporte de progreso."""
+        scorer = self.api.scorer
+        analyses = [scorer.analyze_text(text, 'en')
+                    for text in ("He are good", "I am a student", "She were really nice")]
+        response = self.client.post('/api/save-analysis',
+                                    json={'student_id': 's1', 'analysis': analyses[0]})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/api/save-analysis',
+                                    json={'student_id': 's1', 'analyses': analyses[1:]})
+        self.assertEqual(response.get_json()['saved'], 2)
+
+        report = self.client.get('/api/student-progress/s1').get_json()
+        expected = scorer.export_progress_report(analyses)
+        for key in ('total_sessions', 'average_scores', 'trends', 'current_level'):
+            self.assertEqual(report[key], expected[key])
+        self.assertEqual([session['timestamp'] for session in report['recent_sessions']],
+                         [analysis['timestamp'] for analysis in analyses[::-1]])
+
+    def test_speech_errors(self):
+        """Test analyze-speech: 400 por entrada inválida y 413 por tamaño."""
+        from unittest import mock
+        post = lambda data, **form: self.client.post(
+            '/api/analyze-speech', data=dict(form, audio=(io.BytesIO(data), 'a.wav')),
+            content_type='multipart/form-data')
+
+        self.assertEqual(self.client.post('/api/analyze-speech', data={}).status_code, 400)
+        self.assertEqual(post(b'ID3' + b'\x00' * 100).status_code, 400)
+        self.assertEqual(post(self.wav(), language='fr').status_code, 400)
+        with mock.patch.object(SystemConfig, 'MAX_FILE_SIZE', 1000):
+            self.assertEqual(post(self.wav()).status_code, 413)
+
+        truncated = post(self.wav()[:-1], text='He are my friend')
+        self.assertEqual(truncated.status_code, 200)
+        self.assertIn('speech', truncated.get_json())
+
+    def test_readiness_and_admin_reload(self):
+        """Test /api/ready pasa de 503 a 200 al cargar las reglas; recarga con token."""
+        from unittest import mock
+        path = os.path.join(self.tmp.name, 'rules.snapshot')
+        build_snapshot(path)
+        original = self.api.scorer
+        self.addCleanup(self.api.install_scorer, original)
+        manager = RuleSetManager(path, cache=original.cache, scorer=original,
+                                 on_swap=self.api.install_scorer)
+        with mock.patch.object(self.api, 'rule_sets', manager), \
+                mock.patch.object(SystemConfig, 'ADMIN_TOKEN', 'secret'):
+            self.assertEqual(self.client.get('/api/ready').status_code, 503)
+            manager.load()
+            ready = self.client.get('/api/ready')
+            self.assertEqual(ready.status_code, 200)
+            self.assertEqual(ready.get_json()['rules']['version'], manager.version)
+
+            self.assertEqual(self.client.post('/api/admin/reload-rules').status_code, 401)
+            reload = self.client.post('/api/admin/reload-rules',
+                                      headers={'X-Admin-Token': 'secret'})
+            self.assertEqual(reload.status_code, 200)
+            self.assertEqual(reload.get_json()['previous_version'], manager.version)
+
+    def test_incremental_document_and_metrics(self):
+        """Test análisis incremental, documentos largos y /api/metrics."""
+        text = "He are my friend. She were here. They is nice."
+        expected = self.api.scorer.analyze_text(text, 'en')
+        body = {'text': text, 'language': 'en', 'session_id': 'doc-1'}
+        first = self.client.post('/api/analyze-language/incremental', json=body).get_json()
+        body['text'] = text + " We is late."
+        second = self.client.post('/api/analyze-language/incremental', json=body).get_json()
+        self.assertEqual(first['scores'], expected['scores'])
+        self.assertEqual(second['incremental']['reanalyzed'], 1)
+        self.assertEqual(self.client.post('/api/analyze-language/incremental',
+                                          json={'text': text}).status_code, 400)
+
+        document = self.client.post('/api/analyze-language/document',
+                                    json={'text': text, 'language': 'en'}).get_json()
+        self.assertEqual(document['scores'], expected['scores'])
+        self.assertEqual(document['corrections'], json.loads(json.dumps(expected['corrections'])))
+        self.assertEqual(document['document']['characters'], len(text))
+
+        metrics = self.client.get('/api/metrics').get_data(as_text=True)
+        self.assertIn(f'{REQUEST_METRIC}_count', metrics)
+        self.assertIn('/api/analyze-language/document', metrics)
+
+
+class TestLanguageDetector(unittest.TestCase):
+    """Tests para la detección de idioma por trigramas."""
+
+    def test_detects_short_sentences(self):
+        """Test frases cortas de estudiantes, con errores incluidos."""
+        self.assertEqual(detect_language("He are my best friend").language, 'en')
+        self.assertEqual(detect_language("Yo soy estudiando español").language, 'es')
+        detection = detect_language("La casa es muy grande y bonita")
+        self.assertEqual(detection.language, 'es')
+        self.assertGreater(detection.confidence, 0)
+        self.assertGreater(detection.scores['es'], detection.scores['en'])
+
+    def test_accuracy_on_synthetic_corpus(self):
+        """Test acierto sobre el corpus de benchmarks."""
+        labelled = [(text, language) for language in ('en', 'es')
+                    for text in synthetic_corpus(language, 20, 100, seed=7)]
+        hits = sum(detect_language(text).language == language for text, language in labelled)
+        self.assertGreaterEqual(hits / len(labelled), 0.95)
+
+    def test_text_without_letters_uses_default(self):
+        detection = detect_language("12345 !!!", default='es')
+        self.assertEqual((detection.language, detection.confidence), ('es', 0.0))
+
+    def test_custom_profiles(self):
+        """Test perfiles construidos desde otro corpus."""
+        detector = LanguageDetector({'aa': 'aaa aaa aaa', 'bb': 'bbb bbb bbb'})
+        self.assertEqual(detector.languages, ['aa', 'bb'])
+        self.assertEqual(detector.profiles.shape[0], 2)
+        self.assertEqual(detector.detect('bbb').language, 'bb')
+
+
 class TestSystemConfig(unittest.TestCase):
     """Tests para la configuración del sistema."""
     
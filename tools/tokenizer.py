@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tokenizador compartido del Sistema de Puntuación de Idiomas - Tutorium
+Recorre el texto una sola vez por tipo de unidad (palabras, palabras
+alfanuméricas y fronteras de oración) y comparte el resultado entre los
+análisis de gramática, sintaxis y vocabulario.
+"""
+
+import re
+from typing import Iterator, List, Optional, Set, Tuple
+
+WORD_PATTERN = re.compile(r'\w+')
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+')
+
+
+class TokenStream:
+    """
+    Tokenización de un texto, calculada de forma perezosa y una sola vez.
+
+    - `words`: palabras separadas por espacios (misma semántica que
+      `text.split()`) ya en minúsculas.
+    - `terms`: secuencias `\\w+` en minúsculas, sin puntuación.
+    - `word_starts()`: (offset, palabra en minúsculas) de cada secuencia `\\w+`,
+      que usa el motor de reglas para buscar sus palabras iniciales.
+    - `sentence_boundaries`: spans de los separadores `[.!?]+`.
+
+    El texto se pasa a minúsculas una vez; si `lower()` conserva la longitud
+    (el caso habitual), los offsets del texto en minúsculas coinciden con los
+    del original y no hace falta otra copia por palabra.
+    """
+
+    __slots__ = ('text', 'lower', 'aligned', '_words', '_terms', '_unique_words',
+                 '_sentence_boundaries')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.aligned = len(self.lower) == len(text)
+        self._words: Optional[List[str]] = None
+        self._terms: Optional[List[str]] = None
+        self._unique_words: Optional[Set[str]] = None
+        self._sentence_boundaries: Optional[List[Tuple[int, int]]] = None
+
+    @property
+    def words(self) -> List[str]:
+        """Palabras en minúsculas separadas por espacios."""
+        if self._words is None:
+            self._words = self.lower.split()
+        return self._words
+
+    @property
+    def terms(self) -> List[str]:
+        """Secuencias `\\w+` del texto en minúsculas."""
+        if self._terms is None:
+            self._terms = WORD_PATTERN.findall(self.lower)
+        return self._terms
+
+    @property
+    def word_count(self) -> int:
+        """Número de palabras (igual a `len(text.split())`)."""
+        return len(self.words)
+
+    @property
+    def unique_words(self) -> Set[str]:
+        """Conjunto de palabras distintas en minúsculas."""
+        if self._unique_words is None:
+            self._unique_words = set(self.words)
+        return self._unique_words
+
+    @property
+    def sentence_boundaries(self) -> List[Tuple[int, int]]:
+        """Spans de los separadores de oración, en orden."""
+        if self._sentence_boundaries is None:
+            self._sentence_boundaries = [
+                match.span() for match in SENTENCE_BOUNDARY.finditer(self.text)
+            ]
+        return self._sentence_boundaries
+
+    @property
+    def sentence_count(self) -> int:
+        """Número de fragmentos (igual a `len(re.split(r'[.!?]+', text))`)."""
+        return len(self.sentence_boundaries) + 1
+
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        """Spans de cada fragmento entre separadores (incluye el final)."""
+        spans = []
+        start = 0
+        for boundary_start, boundary_end in self.sentence_boundaries:
+            spans.append((start, boundary_start))
+            start = boundary_end
+        spans.append((start, len(self.text)))
+        return spans
+
+    def word_starts(self) -> Iterator[Tuple[int, str]]:
+        """Genera (offset, palabra en minúsculas) para cada secuencia `\\w+`."""
+        if self.aligned:
+            for match in WORD_PATTERN.finditer(self.lower):
+                yield match.start(), match.group()
+        else:
+            for match in WORD_PATTERN.finditer(self.text):
+                yield match.start(), match.group().lower()
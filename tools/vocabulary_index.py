@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Índice de niveles de vocabulario (MCER) - Tutorium
+Precalcula a partir de `vocabulary_levels` un diccionario para palabras
+sueltas y un trie por palabras para expresiones ("sin embargo",
+"no obstante"), de modo que cada texto se clasifica en una sola pasada.
+"""
+
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+from tokenizer import WORD_PATTERN
+
+# Clave de fin de expresión dentro de un nodo del trie
+_LEVEL = ''
+
+# Bonus máximo que aporta el nivel del vocabulario a la puntuación
+MAX_LEVEL_BONUS = 15
+
+
+def _longest_phrase(node: Dict, terms: List[str], j: int) -> Tuple[int, Optional[int]]:
+    """
+    (fin, nivel) de la expresión más larga que recorre el trie desde `node`
+    (el nodo de la palabra anterior a `j`); nivel None si ninguna termina.
+    """
+    best_end, best_rank = 0, None
+    size = len(terms)
+    while True:
+        rank = node.get(_LEVEL)
+        if rank is not None:
+            best_end, best_rank = j, rank
+        if j == size:
+            return best_end, best_rank
+        node = node.get(terms[j])
+        if node is None:
+            return best_end, best_rank
+        j += 1
+
+
+class VocabularyIndex:
+    """
+    Índice de vocabulario por niveles de un idioma.
+
+    Los niveles se numeran en el orden de `vocabulary_levels` (0 =
+    principiante). Una entrada repetida conserva el nivel más bajo. En cada
+    posición del texto gana la expresión más larga; las palabras que forman
+    parte de una expresión reconocida no se cuentan por separado.
+    """
+
+    def __init__(self, levels: Dict[str, List[str]]):
+        self.levels: List[str] = list(levels)
+        self.words: Dict[str, int] = {}
+        self.phrases: Dict[str, Dict] = {}
+        self.entries = 0
+        # Palabras de la expresión más larga (1 si sólo hay palabras sueltas)
+        self.max_phrase_words = 1
+
+        for rank, level in enumerate(self.levels):
+            for entry in levels[level]:
+                parts = WORD_PATTERN.findall(entry.lower())
+                if not parts:
+                    continue
+                self.entries += 1
+                if len(parts) == 1:
+                    self.words.setdefault(parts[0], rank)
+                    continue
+                self.max_phrase_words = max(self.max_phrase_words, len(parts))
+                node = self.phrases
+                for part in parts:
+                    node = node.setdefault(part, {})
+                node.setdefault(_LEVEL, rank)
+
+        serialized = json.dumps(levels, sort_keys=True, ensure_ascii=False)
+        self.version = hashlib.sha256(serialized.encode('utf-8')).hexdigest()[:16]
+
+    def count(self, terms: List[str]) -> List[int]:
+        """Aciertos por nivel en la secuencia de palabras en minúsculas."""
+        counts = [0] * len(self.levels)
+        words = self.words
+        phrases = self.phrases
+        size = len(terms)
+        i = 0
+        while i < size:
+            term = terms[i]
+            node = phrases.get(term)
+            if node is not None:
+                end, rank = _longest_phrase(node, terms, i + 1)
+                if rank is not None:
+                    counts[rank] += 1
+                    i = end
+                    continue
+            rank = words.get(term)
+            if rank is not None:
+                counts[rank] += 1
+            i += 1
+        return counts
+
+    def match_at(self, terms: List[str], i: int) -> Tuple[int, Optional[int]]:
+        """
+        (fin, nivel) de la entrada que `count` reconoce en la posición `i`:
+        la expresión más larga, si no la palabra suelta; nivel None si no hay.
+        Decide igual que `count` siempre que `terms` tenga al menos
+        `max_phrase_words` palabras a partir de `i`.
+        """
+        node = self.phrases.get(terms[i])
+        if node is not None:
+            end, rank = _longest_phrase(node, terms, i + 1)
+            if rank is not None:
+                return end, rank
+        return i + 1, self.words.get(terms[i])
+
+    def crosses(self, left: List[str], right: List[str]) -> bool:
+        """
+        True si alguna expresión empieza en `left` y termina en `right`. Si no
+        ocurre, contar `left + right` equivale a sumar los conteos de cada parte.
+        """
+        if self.max_phrase_words == 1:
+            return False
+        reach = self.max_phrase_words - 1
+        tail, head = left[-reach:], right[:reach]
+        terms = tail + head
+        for i in range(len(tail)):
+            node = self.phrases.get(terms[i])
+            j = i + 1
+            while node is not None and j < len(terms):
+                node = node.get(terms[j])
+                j += 1
+                if node is not None and j > len(tail) and _LEVEL in node:
+                    return True
+        return False
+
+    def weighted_hits(self, terms: List[str]) -> int:
+        """Suma de aciertos ponderada por nivel (principiante = 0)."""
+        return sum(rank * hits for rank, hits in enumerate(self.count(terms)))
+
+    @staticmethod
+    def level_bonus(weighted_hits: int, word_count: int) -> int:
+        """
+        Bonus de vocabulario por uso de palabras de nivel intermedio/avanzado
+        a partir de `weighted_hits` (ver `weighted_hits`).
+        """
+        if word_count == 0:
+            return 0
+        return min(MAX_LEVEL_BONUS, int(weighted_hits / word_count * 100))
+
+    def __len__(self) -> int:
+        return self.entries
+
+
+class LevelStream:
+    """
+    Conteo de niveles sobre palabras que llegan por partes (streaming).
+
+    Las posiciones con al menos `max_phrase_words` palabras por delante ya
+    se pueden decidir igual que `count` sobre el texto completo; se suman y
+    se descartan, de modo que sólo se retiene una cola corta de palabras.
+    """
+
+    def __init__(self, index: VocabularyIndex):
+        self.index = index
+        self.settled_hits = 0
+        self.pending: List[str] = []
+
+    def feed(self, terms: List[str]) -> None:
+        """Añade palabras y consolida las posiciones ya decididas."""
+        pending = self.pending
+        pending.extend(terms)
+        window = self.index.max_phrase_words
+        i = 0
+        while i + window <= len(pending):
+            end, rank = self.index.match_at(pending, i)
+            if rank is not None:
+                self.settled_hits += rank
+            i = end
+        del pending[:i]
+
+    def weighted_hits(self, extra: Optional[List[str]] = None) -> int:
+        """Aciertos ponderados de todo lo recibido (más `extra`, sin añadirlo)."""
+        tail = self.pending + extra if extra else self.pending
+        return self.settled_hits + self.index.weighted_hits(tail)
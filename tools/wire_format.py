@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Formatos de respuesta de la API - Tutorium
+Además del JSON de siempre, los endpoints de análisis pueden responder en
+un formato compacto por columnas, en JSON o en MessagePack, según la
+cabecera `Accept` (negociación de contenido).
+
+En el formato compacto las correcciones y sugerencias no se envían como una
+lista de objetos que repiten sus claves, sino como columnas paralelas. Cada
+posición [inicio, fin] pasa a `start_delta` (inicio menos el inicio de la
+fila anterior) y `length` (fin menos inicio), que comprimen mejor que las
+posiciones absolutas. Los textos (mensajes de corrección, errores, tipos)
+son índices en una tabla `strings` común a toda la respuesta, de modo que
+cada mensaje repetido se envía una sola vez. `expand()` reconstruye el
+formato detallado.
+
+Con un `AnalysisResult` (ver `analysis_result`) las columnas salen
+directamente de su tabla de coincidencias (`compact_result`), sin crear ni
+recorrer los diccionarios de cada corrección. En MessagePack las columnas
+de posiciones de ese camino son binario: enteros de 64 bits little-endian
+calculados con NumPy sobre la tabla, sin un objeto por posición.
+
+    {"compact": 2, "strings": ["grammar", "He are", "Use \"he is\""],
+     "corrections": {"type": [0], "error": [1], "correction": [2],
+                     "start_delta": [0], "length": [6]},
+     "suggestions": {}, "scores": {...}, ...}
+
+MessagePack necesita el paquete `msgpack` (backend opcional, ver `backends`);
+si no está instalado la negociación no lo ofrece.
+"""
+
+import json
+from array import array
+from itertools import chain
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backends import BACKENDS
+
+COMPACT_VERSION = 2
+
+# Campos de la respuesta que se envían por columnas
+COLUMNAR_FIELDS = ('corrections', 'suggestions')
+
+
+class WireFormat(NamedTuple):
+    name: str
+    media_type: str          # respuesta individual
+    stream_media_type: str   # lotes: una respuesta tras otra
+    compact: bool
+    backend: Optional[str]   # backend necesario para codificar
+
+    def available(self) -> bool:
+        return self.backend is None or BACKENDS.is_available(self.backend)
+
+    def encode(self, payload: Dict) -> bytes:
+        """Codifica una respuesta (compactándola si el formato lo es)."""
+        if self.compact:
+            payload = compact(payload)
+        if self.backend == 'msgpack':
+            return BACKENDS.get('msgpack').packb(payload, use_bin_type=True)
+        return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def encode_result(self, result, extra: Optional[Dict] = None) -> bytes:
+        """
+        Codifica un `AnalysisResult` (sin timestamp) más los campos de
+        `extra`. En los formatos compactos las columnas salen de la tabla de
+        coincidencias; en JSON detallado se materializa con `to_dict()`.
+        """
+        if not self.compact:
+            payload = result.to_dict()
+            payload.pop('timestamp', None)
+            payload.update(extra or {})
+            return self.encode(payload)
+        binary = self.backend == 'msgpack'
+        payload = compact_result(result, extra, binary=binary)
+        if binary:
+            return BACKENDS.get('msgpack').packb(payload, use_bin_type=True)
+        return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def encode_item(self, item: Dict) -> bytes:
+        """
+        Un elemento de un lote ({"index", "analysis" | "error"}). En JSON es
+        una línea; los objetos MessagePack se delimitan solos.
+        """
+        if self.compact and 'analysis' in item:
+            item = dict(item, analysis=compact(item['analysis']))
+        if self.backend == 'msgpack':
+            return BACKENDS.get('msgpack').packb(item, use_bin_type=True)
+        return json.dumps(item, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+JSON = WireFormat('json', 'application/json', 'application/x-ndjson', False, None)
+COMPACT_JSON = WireFormat('compact-json', 'application/vnd.tutorium.compact+json',
+                          'application/vnd.tutorium.compact+ndjson', True, None)
+COMPACT_MSGPACK = WireFormat('compact-msgpack', 'application/vnd.tutorium.compact+msgpack',
+                             'application/vnd.tutorium.compact+msgpack', True, 'msgpack')
+
+FORMATS = (JSON, COMPACT_JSON, COMPACT_MSGPACK)
+
+# Tipos genéricos que también se aceptan para cada formato
+_ALIASES = {
+    'application/msgpack': COMPACT_MSGPACK,
+    'application/x-msgpack': COMPACT_MSGPACK,
+}
+
+
+def _media_ranges(accept: str) -> List[Tuple[str, float]]:
+    """(tipo, q) de cada elemento de `Accept`, de mayor a menor preferencia."""
+    ranges = []
+    for part in accept.split(','):
+        media_type, *params = [piece.strip() for piece in part.split(';')]
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((media_type.lower(), quality))
+    # `sorted` es estable: a igual q se respeta el orden de la cabecera
+    return sorted(ranges, key=lambda item: -item[1])
+
+
+def negotiate(accept: Optional[str]) -> WireFormat:
+    """
+    Formato de respuesta para la cabecera `Accept`. Sin cabecera, con
+    comodines o sin ningún tipo conocido disponible se usa JSON.
+    """
+    if not accept:
+        return JSON
+    for media_type, quality in _media_ranges(accept):
+        if quality <= 0:
+            continue
+        if media_type in ('*/*', 'application/*'):
+            return JSON
+        for wire_format in FORMATS:
+            if media_type in (wire_format.media_type, wire_format.stream_media_type) \
+                    and wire_format.available():
+                return wire_format
+        alias = _ALIASES.get(media_type)
+        if alias is not None and alias.available():
+            return alias
+    return JSON
+
+
+def _position_columns(positions: Sequence[Optional[Sequence[int]]]) -> Tuple[List, List]:
+    """
+    (start_delta, length) de una lista de posiciones [inicio, fin]: cada
+    inicio se envía relativo al anterior, lo que repite más dígitos y
+    comprime mejor con gzip que las posiciones absolutas.
+    """
+    deltas, lengths = [], []
+    previous = 0
+    for position in positions:
+        if position is None:
+            deltas.append(None)
+            lengths.append(None)
+            continue
+        start, end = position
+        deltas.append(start - previous)
+        lengths.append(end - start)
+        previous = start
+    return deltas, lengths
+
+
+def _columns(rows: List[Dict], strings: Dict[str, int]) -> Dict[str, List[Any]]:
+    """
+    Lista de objetos -> columnas. Salvo `position`, que pasa a `start_delta`
+    y `length`, los valores son textos y pasan a índices de `strings`.
+    """
+    intern = strings.setdefault
+    columns: Dict[str, List[Any]] = {}
+    for key in dict.fromkeys(key for row in rows for key in row):
+        values = [row.get(key) for row in rows]
+        if key == 'position':
+            columns['start_delta'], columns['length'] = _position_columns(values)
+        else:
+            columns[key] = [None if value is None else intern(value, len(strings))
+                            for value in values]
+    return columns
+
+
+def compact(analysis: Dict) -> Dict:
+    """Formato compacto de una respuesta de análisis."""
+    strings: Dict[str, int] = {}
+    result: Dict[str, Any] = {'compact': COMPACT_VERSION}
+    for key, value in analysis.items():
+        if key in COLUMNAR_FIELDS and isinstance(value, list):
+            result[key] = _columns(value, strings)
+        else:
+            result[key] = value
+    result['strings'] = list(strings)
+    return result
+
+
+def _binary_positions(starts: array, ends: array) -> Tuple[bytes, bytes]:
+    """(start_delta, length) como bytes de enteros de 64 bits little-endian."""
+    starts = np.frombuffer(starts, dtype=np.int64)
+    ends = np.frombuffer(ends, dtype=np.int64)
+    return (np.diff(starts, prepend=0).astype('<i8').tobytes(),
+            (ends - starts).astype('<i8').tobytes())
+
+
+def compact_result(result, extra: Optional[Dict] = None, binary: bool = False) -> Dict:
+    """
+    Formato compacto de un `AnalysisResult`, igual que `compact` sobre su
+    `to_dict()` sin timestamp más `extra`. Con `binary` las posiciones van
+    como bytes (ver el docstring del módulo).
+    """
+    try:
+        strings: Dict[str, int] = {}
+        corrections, suggestions = result.finding_columns(strings)
+    except ValueError:
+        # Resultado ya materializado (p. ej. de la caché)
+        payload = dict(result.to_dict())
+        payload.pop('timestamp', None)
+        payload.update(extra or {})
+        return compact(payload)
+    for columns in (corrections, suggestions):
+        if not columns:
+            continue
+        starts, ends = columns.pop('start'), columns.pop('end')
+        if binary:
+            columns['start_delta'], columns['length'] = _binary_positions(starts, ends)
+        else:
+            columns['start_delta'] = [start - previous for previous, start
+                                      in zip(chain((0,), starts), starts)]
+            columns['length'] = [end - start for start, end in zip(starts, ends)]
+    payload = {
+        'compact': COMPACT_VERSION,
+        'language': result.language,
+        'text_length': result.text_length,
+        'scores': result.scores,
+        'corrections': corrections,
+        'suggestions': suggestions,
+        'overall_score': result.overall_score,
+    }
+    payload.update(extra or {})
+    payload['strings'] = list(strings)
+    return payload
+
+
+def _column_values(column: Any) -> List[Any]:
+    """Valores de una columna (las posiciones binarias pasan a enteros)."""
+    if isinstance(column, (bytes, bytearray, memoryview)):
+        return np.frombuffer(column, dtype='<i8').tolist()
+    return column
+
+
+def expand(payload: Dict) -> Dict:
+    """Reconstruye el formato detallado a partir del compacto."""
+    strings = payload.get('strings', [])
+    result = {}
+    for key, value in payload.items():
+        if key in ('compact', 'strings'):
+            continue
+        if key not in COLUMNAR_FIELDS:
+            result[key] = value
+            continue
+        value = {name: _column_values(column) for name, column in value.items()}
+        count = max((len(column) for column in value.values()), default=0)
+        deltas, lengths = value.get('start_delta'), value.get('length')
+        rows = []
+        start = 0
+        for number in range(count):
+            row = {name: strings[column[number]] for name, column in value.items()
+                   if name not in ('start_delta', 'length') and column[number] is not None}
+            if deltas is not None and deltas[number] is not None:
+                start += deltas[number]
+                row['position'] = [start, start + lengths[number]]
+            rows.append(row)
+        result[key] = rows
+    return result
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Pool de procesos de puntuación para la API de Idiomas - Tutorium
+Pre-crea un conjunto de procesos que construyen su `LanguageScoringSystem`
+una sola vez, de modo que el análisis (regex, CPU) no compite por el GIL del
+proceso que atiende HTTP. Limita las peticiones en espera para aplicar
+contrapresión en lugar de encolar sin límite.
+"""
+
+import multiprocessing
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from backends import BACKENDS
+from config import SystemConfig
+from metrics import REGISTRY
+
+# Sistema de puntuación propio de cada proceso del pool y versión de la
+# instantánea de reglas con la que se construyó
+_worker_scorer = None
+_worker_snapshot = None
+
+
+class PoolBusyError(Exception):
+    """Todos los procesos están ocupados y la cola de espera está llena."""
+
+
+def _init_worker() -> None:
+    """Inicializa el proceso: construye el sistema de puntuación una vez."""
+    global _worker_scorer
+    from analysis_cache import AnalysisCache
+    from language_scoring_system import LanguageScoringSystem
+
+    cache = AnalysisCache(
+        max_entries=SystemConfig.CACHE_MAX_ENTRIES,
+        ttl=SystemConfig.CACHE_TIMEOUT,
+        db_path=SystemConfig.CACHE_DB_PATH or None
+    )
+    _worker_scorer = LanguageScoringSystem(cache=cache)
+    if SystemConfig.RULE_SNAPSHOT:
+        try:
+            _use_snapshot((SystemConfig.RULE_SNAPSHOT, None))
+        except (OSError, ValueError):
+            pass  # reglas del código hasta que la API instale una instantánea
+    # Con fork los backends precargados ya vienen del proceso padre
+    BACKENDS.preload(SystemConfig.NLP_PRELOAD)
+    # Las series heredadas del proceso padre (fork) no son de este proceso
+    REGISTRY.clear()
+
+
+def _use_snapshot(snapshot: Optional[Tuple[str, Optional[str]]]) -> None:
+    """
+    Carga la instantánea (ruta, versión) si el proceso tiene otra. Una tarea
+    en curso termina con las reglas anteriores; la recarga ocurre al empezar
+    la siguiente.
+    """
+    global _worker_scorer, _worker_snapshot
+    if snapshot is None or (snapshot[1] is not None and snapshot[1] == _worker_snapshot):
+        return
+    from language_scoring_system import LanguageScoringSystem
+    from rule_snapshot import load_snapshot
+
+    header, rule_set = load_snapshot(snapshot[0])
+    _worker_scorer = LanguageScoringSystem(cache=_worker_scorer.cache, rule_set=rule_set)
+    # Si el archivo ya se ha vuelto a reemplazar, la versión pedida evita
+    # recargarlo en cada tarea hasta que la API anuncie la nueva
+    _worker_snapshot = snapshot[1] or header['version']
+
+
+def _analyze_text(text: str, language: str, deep: bool = False,
+                  snapshot: Optional[Tuple[str, str]] = None) -> Dict:
+    _use_snapshot(snapshot)
+    return _worker_scorer.analyze_text(text, language, deep)
+
+
+def _analyze_batch(texts: List[str], language: str, deep: bool = False,
+                   snapshot: Optional[Tuple[str, str]] = None) -> List[Dict]:
+    _use_snapshot(snapshot)
+    return _worker_scorer.analyze_batch(texts, language, deep)
+
+
+def _analyze_result_measured(text: str, language: str,
+                             snapshot: Optional[Tuple[str, str]] = None):
+    """`AnalysisResult` (sin el motor de reglas, ver `bind_engine`) más métricas."""
+    _use_snapshot(snapshot)
+    return _worker_scorer.analyze(text, language), REGISTRY.drain()
+
+
+def _analyze_shard(text: str, language: str,
+                   snapshot: Optional[Tuple[str, str]] = None):
+    """Un fragmento de un documento largo (ver `long_document`)."""
+    from long_document import analyze_shard
+
+    _use_snapshot(snapshot)
+    return analyze_shard(_worker_scorer, language, text)
+
+
+def _analyze_text_measured(text: str, language: str, deep: bool = False,
+                           snapshot: Optional[Tuple[str, str]] = None) -> Tuple[Dict, Dict]:
+    """Análisis más las métricas del proceso acumuladas desde el último envío."""
+    return _analyze_text(text, language, deep, snapshot), REGISTRY.drain()
+
+
+def _analyze_batch_measured(texts: List[str], language: str, deep: bool = False,
+                            snapshot: Optional[Tuple[str, str]] = None) -> Tuple[List[Dict], Dict]:
+    return _analyze_batch(texts, language, deep, snapshot), REGISTRY.drain()
+
+
+class ScoringPool:
+    """
+    Pool pre-creado de `workers` procesos de puntuación.
+
+    Admite como máximo `workers + queue_size` peticiones a la vez (en
+    ejecución o en cola); por encima de eso `acquire` falla de inmediato y la
+    API responde 503 con `Retry-After`.
+    """
+
+    def __init__(self, workers: int, queue_size: int = 32, timeout: float = 30):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._pool = multiprocessing.Pool(processes=workers, initializer=_init_worker)
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        # Instantánea de reglas (ruta, versión) que deben usar los procesos
+        self.snapshot: Optional[Tuple[str, str]] = None
+
+    def acquire(self) -> None:
+        """Reserva un hueco de la cola o lanza PoolBusyError si está llena."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusyError('Scoring queue is full')
+        with self._lock:
+            self.in_flight += 1
+
+    def release(self) -> None:
+        """Libera el hueco reservado con `acquire`."""
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def analyze_text(self, text: str, language: str, deep: bool = False) -> Dict:
+        """Analiza un texto en un proceso del pool (el llamador tiene hueco)."""
+        analysis, metrics = self._pool.apply_async(
+            _analyze_text_measured, (text, language, deep, self.snapshot)).get(self.timeout)
+        REGISTRY.merge(metrics)
+        return analysis
+
+    def analyze(self, text: str, language: str):
+        """
+        Como `analyze_text` pero retorna el `AnalysisResult`; el llamador le
+        asigna su motor de reglas con `bind_engine`.
+        """
+        result, metrics = self._pool.apply_async(
+            _analyze_result_measured, (text, language, self.snapshot)).get(self.timeout)
+        REGISTRY.merge(metrics)
+        return result
+
+    def analyze_batch(self, texts: List[str], language: str, deep: bool = False) -> List[Dict]:
+        """Analiza un bloque de textos en un proceso del pool."""
+        analyses, metrics = self._pool.apply_async(
+            _analyze_batch_measured, (texts, language, deep, self.snapshot)).get(self.timeout)
+        REGISTRY.merge(metrics)
+        return analyses
+
+    def analyze_document(self, scorer, text: str, language: str):
+        """
+        Analiza un documento largo repartiendo sus fragmentos entre los
+        procesos del pool; retorna (`AnalysisResult`, número de fragmentos).
+        `scorer` (con las mismas reglas que los procesos) combina los
+        fragmentos en este proceso.
+        Con un fragmento en curso por proceso las tareas de otras peticiones
+        se intercalan con las del documento en lugar de esperar a que acabe.
+        """
+        from long_document import analyze_document
+
+        snapshot = self.snapshot
+        submit = lambda piece: self._pool.apply_async(_analyze_shard, (piece, language, snapshot))
+        return analyze_document(scorer, text, language, submit,
+                                window=self.workers, timeout=self.timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Estado del pool y contadores de contrapresión."""
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    def close(self) -> None:
+        """Detiene los procesos del pool."""
+        self._pool.terminate()
+        self._pool.join()
+
+
+def create_pool(workers: Optional[int] = None, queue_size: Optional[int] = None) -> ScoringPool:
+    """Crea un pool con los valores de `SystemConfig` por defecto."""
+    return ScoringPool(
+        workers=workers or SystemConfig.API_WORKERS or multiprocessing.cpu_count(),
+        queue_size=SystemConfig.API_QUEUE_SIZE if queue_size is None else queue_size,
+        timeout=SystemConfig.API_WORKER_TIMEOUT
+    )